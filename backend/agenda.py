@@ -0,0 +1,260 @@
+import heapq
+from datetime import datetime, timedelta
+
+from bson.objectid import ObjectId
+from pymongo import UpdateOne
+
+# Janela diária usada quando o pedido não informa a disponibilidade das quadras.
+HORARIO_PADRAO = ("08:00", "20:00")
+
+DURACAO_PADRAO_MIN = 40
+DESCANSO_PADRAO_MIN = 20
+
+# Campos das partidas lidos pelo agendamento.
+AGENDA_PROJECTION = {
+    "rodadaNumero": 1, "partidaNumero": 1, "categoriaNome": 1, "jogador1.id": 1, "jogador2.id": 1,
+    "proximaPartidaId": 1, "dataHora": 1, "quadra": 1,
+}
+
+
+class AgendaError(ValueError):
+    """Parâmetro de agendamento inválido; a mensagem é devolvida ao cliente com status 400."""
+
+
+def _data_hora(value, campo):
+    if isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise AgendaError(f"'{campo}' deve ser uma data/hora ISO (AAAA-MM-DDTHH:MM).")
+
+
+def _minutos(data, campo, padrao):
+    value = data.get(campo, padrao)
+    if not isinstance(value, int) or isinstance(value, bool) or value < 0 or (campo.startswith("duracao") and value == 0):
+        raise AgendaError(f"'{campo}' deve ser um número inteiro de minutos.")
+    return timedelta(minutes=value)
+
+
+def janelas_padrao(tournament):
+    """Um período por dia do torneio (`dataInicio` a `dataFim`) no HORARIO_PADRAO."""
+    inicio = _data_hora(tournament.get("dataInicio"), "dataInicio").date()
+    try:
+        fim = _data_hora(tournament.get("dataFim"), "dataFim").date()
+    except AgendaError:
+        fim = inicio
+    abre, fecha = (datetime.strptime(h, "%H:%M").time() for h in HORARIO_PADRAO)
+    dias = max((fim - inicio).days, 0) + 1
+    return [
+        (datetime.combine(inicio + timedelta(days=d), abre), datetime.combine(inicio + timedelta(days=d), fecha))
+        for d in range(dias)
+    ]
+
+
+def _janelas(raw, campo):
+    if not isinstance(raw, list) or not raw:
+        raise AgendaError(f"'{campo}' deve ser uma lista de períodos com 'inicio' e 'fim'.")
+    janelas = []
+    for periodo in raw:
+        if not isinstance(periodo, dict):
+            raise AgendaError(f"'{campo}' deve ser uma lista de períodos com 'inicio' e 'fim'.")
+        inicio, fim = _data_hora(periodo.get("inicio"), "inicio"), _data_hora(periodo.get("fim"), "fim")
+        if fim <= inicio:
+            raise AgendaError(f"Período inválido em '{campo}': 'fim' deve ser posterior a 'inicio'.")
+        janelas.append((inicio, fim))
+    return _unir(janelas)
+
+
+def _unir(janelas):
+    janelas = sorted(janelas)
+    unidas = []
+    for inicio, fim in janelas:
+        if unidas and inicio <= unidas[-1][1]:
+            unidas[-1] = (unidas[-1][0], max(unidas[-1][1], fim))
+        else:
+            unidas.append((inicio, fim))
+    return unidas
+
+
+def parse_agenda(data, tournament):
+    """Lê o corpo de `POST /tournaments/<id>/schedule`.
+
+    `quadras` é um número, uma lista de nomes ou de objetos `{"nome", "janelas"}`;
+    quadras sem `janelas` próprias usam as `janelas` do pedido ou, sem elas, os dias do
+    torneio no HORARIO_PADRAO. Devolve `(quadras, duracao, descanso)`, com `quadras`
+    como lista de `(nome, [(inicio, fim), ...])`.
+    """
+    raw = data.get("quadras")
+    if isinstance(raw, int) and not isinstance(raw, bool) and raw > 0:
+        raw = [f"Quadra {i}" for i in range(1, raw + 1)]
+    if not isinstance(raw, list) or not raw:
+        raise AgendaError("'quadras' deve ser o número de quadras ou uma lista de quadras.")
+
+    padrao = _janelas(data["janelas"], "janelas") if data.get("janelas") else janelas_padrao(tournament)
+    quadras = []
+    for quadra in raw:
+        if isinstance(quadra, str) and quadra:
+            quadras.append((quadra, padrao))
+        elif isinstance(quadra, dict) and quadra.get("nome"):
+            janelas = _janelas(quadra["janelas"], "janelas") if quadra.get("janelas") else padrao
+            quadras.append((quadra["nome"], janelas))
+        else:
+            raise AgendaError("Cada quadra precisa de um 'nome'.")
+    if len({nome for nome, _ in quadras}) != len(quadras):
+        raise AgendaError("Nomes de quadra repetidos.")
+
+    duracao = _minutos(data, "duracaoPartidaMin", DURACAO_PADRAO_MIN)
+    descanso = _minutos(data, "descansoMinimoMin", DESCANSO_PADRAO_MIN)
+    return quadras, duracao, descanso
+
+
+def _jogadores(partida):
+    return {
+        jogador["id"] for jogador in (partida.get("jogador1"), partida.get("jogador2"))
+        if jogador and jogador.get("id") not in (None, "BYE")
+    }
+
+
+def _subtrair(janelas, ocupados):
+    """Remove das janelas os intervalos já ocupados (partidas mantidas na quadra)."""
+    for ocupado_inicio, ocupado_fim in sorted(ocupados):
+        restantes = []
+        for inicio, fim in janelas:
+            if ocupado_fim <= inicio or ocupado_inicio >= fim:
+                restantes.append((inicio, fim))
+                continue
+            if inicio < ocupado_inicio:
+                restantes.append((inicio, ocupado_inicio))
+            if ocupado_fim < fim:
+                restantes.append((ocupado_fim, fim))
+        janelas = restantes
+    return janelas
+
+
+def agendar(partidas, quadras, duracao, descanso, mantidas=()):
+    """Distribui `partidas` pelas quadras e horários.
+
+    Agendamento por lista com duas filas de prioridade: as quadras por horário livre e
+    as partidas prontas por (rodada, número da partida), de modo que rodadas anteriores
+    de todas as categorias saem primeiro. Os horários de início são atribuídos em ordem
+    crescente, então basta guardar, por jogador, quando ele volta a estar disponível.
+
+    - Uma partida só começa `descanso` após o fim das partidas que a alimentam.
+    - Jogadores de rodadas futuras ainda não são conhecidos: cada partida reserva todos
+      os jogadores que podem chegar a ela, o que garante o descanso mínimo de quem
+      joga em mais de uma categoria.
+    - Partidas só são colocadas inteiramente dentro de uma janela de disponibilidade.
+
+    `mantidas` são partidas já agendadas (com `dataHora`/`quadra`) que não mudam: o
+    horário delas é retirado da quadra e bloqueia os seus jogadores.
+    Devolve `({id: (inicio, quadra)}, [ids sem horário])`.
+    """
+    partidas, mantidas = list(partidas), list(mantidas)
+    todas = partidas + mantidas
+    por_id = {str(p["_id"]): p for p in todas}
+    alimentadoras = {}
+    for partida in todas:
+        if partida.get("proximaPartidaId") in por_id:
+            alimentadoras.setdefault(partida["proximaPartidaId"], []).append(str(partida["_id"]))
+
+    possiveis = {}
+    for partida in sorted(todas, key=lambda p: p.get("rodadaNumero") or 0):
+        pid = str(partida["_id"])
+        jogadores = _jogadores(partida)
+        for anterior in alimentadoras.get(pid, ()):
+            jogadores |= possiveis[anterior]
+        possiveis[pid] = jogadores
+
+    livre_em = {}
+    fim_de = {}
+    ocupacao = {}
+    for partida in mantidas:
+        try:
+            inicio = _data_hora(partida["dataHora"], "dataHora")
+        except AgendaError:
+            continue
+        pid = str(partida["_id"])
+        fim_de[pid] = inicio + duracao
+        ocupacao.setdefault(partida.get("quadra"), []).append((inicio, fim_de[pid]))
+        for jogador in possiveis[pid]:
+            livre_em[jogador] = max(livre_em.get(jogador, datetime.min), fim_de[pid] + descanso)
+
+    a_agendar = {str(p["_id"]) for p in partidas}
+    faltando = {}
+    liberacao = {}
+    for pid in a_agendar:
+        anteriores = alimentadoras.get(pid, ())
+        faltando[pid] = sum(1 for a in anteriores if a in a_agendar)
+        liberacao[pid] = max((fim_de[a] + descanso for a in anteriores if a in fim_de), default=datetime.min)
+
+    def mais_cedo(pid):
+        return max([liberacao[pid]] + [livre_em.get(j, datetime.min) for j in possiveis[pid]])
+
+    def chave(pid):
+        partida = por_id[pid]
+        return partida.get("rodadaNumero") or 0, partida.get("partidaNumero") or 0, pid
+
+    # `espera`: partidas sem pendências, por horário mais cedo possível;
+    # `prontas`: as que já podem começar no horário da quadra em análise, por prioridade.
+    espera = [(mais_cedo(pid), *chave(pid)) for pid in a_agendar if faltando[pid] == 0]
+    heapq.heapify(espera)
+    prontas = []
+
+    janelas = [_subtrair(j, ocupacao.get(nome, ())) for nome, j in quadras]
+    livres = [(j[0][0], q, 0) for q, j in enumerate(janelas) if j]
+    heapq.heapify(livres)
+
+    atribuicoes = {}
+    while livres and (espera or prontas):
+        horario, q, w = heapq.heappop(livres)
+        if horario + duracao > janelas[q][w][1]:
+            if w + 1 < len(janelas[q]):
+                heapq.heappush(livres, (max(horario, janelas[q][w + 1][0]), q, w + 1))
+            continue
+
+        while espera and espera[0][0] <= horario:
+            _, rodada, numero, pid = heapq.heappop(espera)
+            heapq.heappush(prontas, (rodada, numero, pid))
+        escolhida = None
+        while prontas:
+            rodada, numero, pid = heapq.heappop(prontas)
+            cedo = mais_cedo(pid)
+            if cedo <= horario:
+                escolhida = pid
+                break
+            heapq.heappush(espera, (cedo, rodada, numero, pid))
+        if escolhida is None:
+            if espera:
+                heapq.heappush(livres, (espera[0][0], q, w))
+            continue
+
+        fim = horario + duracao
+        atribuicoes[escolhida] = (horario, quadras[q][0])
+        for jogador in possiveis[escolhida]:
+            livre_em[jogador] = max(livre_em.get(jogador, datetime.min), fim + descanso)
+        seguinte = por_id[escolhida].get("proximaPartidaId")
+        if seguinte in a_agendar:
+            liberacao[seguinte] = max(liberacao[seguinte], fim + descanso)
+            faltando[seguinte] -= 1
+            if faltando[seguinte] == 0:
+                heapq.heappush(espera, (mais_cedo(seguinte), *chave(seguinte)))
+        heapq.heappush(livres, (fim, q, w))
+
+    sem_horario = sorted((pid for pid in a_agendar if pid not in atribuicoes), key=chave)
+    return atribuicoes, sem_horario
+
+
+def salvar_agenda(matches_collection, atribuicoes, sem_horario=()):
+    """Grava todos os horários e quadras em um único `bulk_write`. Partidas que ficaram
+    sem horário perdem o agendamento anterior."""
+    operacoes = [
+        UpdateOne({"_id": ObjectId(pid)}, {"$set": {"dataHora": inicio, "quadra": quadra}})
+        for pid, (inicio, quadra) in atribuicoes.items()
+    ]
+    operacoes.extend(
+        UpdateOne({"_id": ObjectId(pid), "dataHora": {"$ne": None}}, {"$set": {"dataHora": None, "quadra": None}})
+        for pid in sem_horario
+    )
+    if operacoes:
+        matches_collection.bulk_write(operacoes, ordered=False)
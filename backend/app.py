@@ -1,38 +1,212 @@
+import hashlib
 import os
-from flask import Flask, jsonify, request
-from pymongo import MongoClient
+from itertools import chain
+from flask import Blueprint, Flask, Response, jsonify, request, make_response
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
 from dotenv import load_dotenv
 from datetime import datetime
 from bson.objectid import ObjectId
 from flask_cors import CORS
-
-from PIL import Image, ImageDraw, ImageFont
-import qrcode
-import base64
-import io
+from werkzeug.local import LocalProxy
+
+from draw import distribuir_chave, montar_chave, registrar_resultado
+from grupos import (
+    FASE_GRUPOS, TAMANHO_GRUPO_PADRAO, PlacarError, dividir_grupos, montar_grupos, ordenar_classificacao,
+    recalcular_classificacoes, registrar_resultado_grupo,
+)
+from bracket_image import (
+    BRACKET_PROJECTION, FORMATS, bracket_version, bump_bracket_version, bump_bracket_versions, encode, render_bracket,
+)
+from agenda import AGENDA_PROJECTION, AgendaError, agendar, parse_agenda, salvar_agenda
+from events import (
+    EVENT_BUFFER_SIZE, HEARTBEAT_SECONDS, MATCH_EVENT_PROJECTION, MAX_STREAM_SECONDS, ChangeStreamRelay, EventBus,
+    parse_last_event_id, sse_stream,
+)
+from indexes import ensure_indexes, verify_query_plans
+from pagination import QueryParamError, date_range, paginated_response, parse_expand, parse_limit
+from bulk_import import MAX_ROWS, ImportFormatError, import_registrations, parse_rows
+from vagas import (
+    category_vagas, occupies, reconcile_slots, release, release_many, reserve, reserve_up_to, sync_slots, transition,
+)
+from metrics import Metrics
+from cache import ResponseCache, SingleFlight, TTLCache, shared_backend_from_env
+from summary import tournament_summary
+from busca import (
+    MAX_SEARCH_LIMIT, SEARCH_LIMIT, SEARCH_PROJECTION, backfill_search_tokens, buscar_jogadores, search_fields,
+    search_query,
+)
+from pix import PIX_RECEIVER, QRCodeCache, build_br_code, build_pix_details
+from mongo import Mongo, settings_from_env
+from serializer import MongoJSONProvider
+from jobs import JobQueue, JobWorker, enqueue
+from exclusao import ACTIVE_FILTER, excluir_jogador, excluir_torneio, varrer_orfaos
+from ranking import (
+    RANKING_LIST_PROJECTION, atualizar_ranking, recalcular_rankings, retirar_jogador, retirar_torneio, tabela_pontos,
+)
 
 load_dotenv()
 
-app = Flask(__name__)
-CORS(app) 
-
-mongo_uri = os.getenv("MONGO_URI")
-if not mongo_uri:
-    raise ValueError("MONGO_URI não encontrada nas variáveis de ambiente.")
-
-client = MongoClient(mongo_uri)
-db = client.torneiobt_db
-
-players_collection = db.players
-tournaments_collection = db.tournaments
-registrations_collection = db.registrations
-matches_collection = db.matches 
-
-@app.route('/')
+api = Blueprint("api", __name__, cli_group=None)
+
+# Latência por rota, comandos Mongo por requisição e tamanho das respostas em /metrics.
+# SLOW_REQUEST_MS liga o log de requisições lentas com o detalhamento dos comandos.
+slow_request_ms = os.getenv("SLOW_REQUEST_MS")
+metrics = Metrics(slow_request_ms=float(slow_request_ms) if slow_request_ms else None)
+
+
+def _prepare_db(database):
+    if os.getenv("MONGO_ENSURE_INDEXES", "1") == "1":
+        ensure_indexes(database)
+
+
+# O cliente é aberto na primeira consulta de cada worker (ver mongo.py); as coleções
+# abaixo são proxies resolvidos a cada uso.
+mongo = Mongo(event_listeners=[metrics.listener], on_connect=_prepare_db)
+db = LocalProxy(lambda: mongo.db)
+
+players_collection = mongo.collection("players")
+tournaments_collection = mongo.collection("tournaments")
+registrations_collection = mongo.collection("registrations")
+matches_collection = mongo.collection("matches")
+pix_images_collection = mongo.collection("pix_images")
+category_slots_collection = mongo.collection("category_slots")
+group_standings_collection = mongo.collection("group_standings")
+bracket_versions_collection = mongo.collection("bracket_versions")
+jobs_collection = mongo.collection("jobs")
+rankings_collection = mongo.collection("rankings")
+
+qr_code_cache = QRCodeCache(pix_images_collection)
+
+# Resumo do painel por torneio; invalidado a cada escrita de inscrição do torneio.
+summary_cache = TTLCache(ttl_seconds=int(os.getenv("SUMMARY_CACHE_TTL", "30")))
+
+# Imagens/PDFs das chaves por (torneio, categoria, versão, formato). A versão muda a
+# cada escrita em partidas da categoria; renderizações simultâneas da mesma versão
+# são feitas uma única vez.
+bracket_image_cache = TTLCache(ttl_seconds=int(os.getenv("BRACKET_IMAGE_TTL", "3600")), maxsize=64)
+bracket_renders = SingleFlight()
+
+# Páginas públicas (torneios e partidas): LRU+TTL local e, se RESPONSE_CACHE_URL
+# estiver definida, um backend compartilhado entre workers.
+response_cache = ResponseCache(
+    ttl_seconds=int(os.getenv("RESPONSE_CACHE_TTL", "60")),
+    shared=shared_backend_from_env(),
+)
+
+# Eventos ao vivo por torneio (GET /tournaments/<id>/events). Com EVENTS_CHANGE_STREAM=1
+# (exige replica set), os eventos vêm do change stream de `matches` e incluem escritas
+# de todos os workers; sem ele, cada worker publica as próprias escritas.
+event_bus = EventBus(buffer_size=int(os.getenv("EVENT_BUFFER_SIZE", str(EVENT_BUFFER_SIZE))))
+change_stream_relay = (
+    ChangeStreamRelay(event_bus, lambda: matches_collection) if os.getenv("EVENTS_CHANGE_STREAM") == "1" else None
+)
+sse_heartbeat = float(os.getenv("SSE_HEARTBEAT_SECONDS", str(HEARTBEAT_SECONDS)))
+sse_max_seconds = float(os.getenv("SSE_MAX_SECONDS", str(MAX_STREAM_SECONDS)))
+
+
+def publish_event(torneio_id, event_type, data):
+    if change_stream_relay is None:
+        event_bus.publish(torneio_id, event_type, data)
+
+# Exclusões em cascata (inscrições, partidas, imagens PIX) rodam em segundo plano, em
+# lotes de JOB_BATCH_SIZE; a rota só marca o documento como excluído (`excluidoEm`).
+job_batch_size = int(os.getenv("JOB_BATCH_SIZE", "1000"))
+job_queue = JobQueue(jobs_collection, {
+    "excluir_torneio": lambda torneio_id: chain(
+        retirar_torneio(db, torneio_id, job_batch_size),
+        excluir_torneio(db, qr_code_cache, torneio_id, job_batch_size),
+    ),
+    "excluir_jogador": lambda jogador_id: chain(
+        retirar_jogador(db, jogador_id),
+        excluir_jogador(db, qr_code_cache, jogador_id, job_batch_size, on_release=summary_cache.delete),
+    ),
+})
+job_worker = JobWorker(job_queue)
+
+# Pontos do ranking por fase alcançada na chave (ver ranking.py); RANKING_POINTS
+# substitui valores, ex.: '{"Campeão": 2000}'. Depois de mudar, rode `flask rebuild-rankings`.
+ranking_points = tabela_pontos(os.getenv("RANKING_POINTS"))
+
+
+@api.before_app_request
+def _start_job_worker():
+    # Uma thread por processo; JOBS_WORKER=0 deixa os jobs para `flask run-jobs`.
+    if os.getenv("JOBS_WORKER", "1") == "1":
+        job_worker.ensure_started()
+
+
+# A chave de busca é interna e fica fora das respostas.
+PLAYER_PROJECTION = {"buscaTokens": 0, "nomeBusca": 0}
+
+def create_app(config=None):
+    """Cria a aplicação. Uso com gunicorn: `gunicorn 'app:create_app()'`.
+
+    Nada aqui abre conexão com o MongoDB; pool e timeouts vêm de `MONGO_*`
+    (ver mongo.py) ou de `config`.
+    """
+    app = Flask(__name__)
+    app.json = MongoJSONProvider(app)
+    app.config.from_mapping(settings_from_env())
+    if config:
+        app.config.update(config)
+    CORS(app)
+    metrics.init_app(app)
+    mongo.init_app(app)
+    app.register_blueprint(api)
+    return app
+
+@api.cli.command("ensure-indexes")
+def ensure_indexes_command():
+    """Cria os índices exigidos pela API (idempotente)."""
+    for collection_name, names in ensure_indexes(db).items():
+        print(f"{collection_name}: {', '.join(names)}")
+
+@api.cli.command("reconcile-slots")
+def reconcile_slots_command():
+    """Recalcula os contadores de vagas por categoria a partir das inscrições."""
+    print(f"{reconcile_slots(db)} contadores de vagas recalculados.")
+
+@api.cli.command("rebuild-standings")
+def rebuild_standings_command():
+    """Reconstrói as classificações dos grupos a partir das partidas."""
+    print(f"{recalcular_classificacoes(db)} classificações de grupo recalculadas.")
+
+@api.cli.command("backfill-player-search")
+def backfill_player_search_command():
+    """Preenche os campos de busca (`buscaTokens` e `nomeBusca`) dos jogadores já cadastrados."""
+    print(f"{backfill_search_tokens(players_collection)} jogadores atualizados.")
+
+@api.cli.command("run-jobs")
+def run_jobs_command():
+    """Processa a fila de jobs em primeiro plano (alternativa à thread dos workers web)."""
+    job_worker.run_forever()
+
+@api.cli.command("purge-orphans")
+def purge_orphans_command():
+    """Apaga documentos órfãos de torneios e jogadores excluídos e imagens PIX sem uso."""
+    totals = {}
+    for name, count in varrer_orfaos(db, qr_code_cache, job_batch_size):
+        totals[name] = totals.get(name, 0) + count
+    for name, count in totals.items():
+        print(f"{name}: {count} removidos")
+
+@api.cli.command("rebuild-rankings")
+def rebuild_rankings_command():
+    """Recalcula todos os rankings a partir das partidas (uma agregação com `$out`)."""
+    print(f"{recalcular_rankings(db, ranking_points)} posições de ranking recalculadas.")
+
+@api.cli.command("verify-indexes")
+def verify_indexes_command():
+    """Falha se alguma consulta quente for planejada com COLLSCAN."""
+    for entry in verify_query_plans(db):
+        print(f"{entry['collection']} {entry['query']}: {' -> '.join(entry['stages'])}")
+
+@api.route('/')
 def hello_world():
     return jsonify(message="Olá do backend Python com MongoDB conectado!")
 
-@app.route('/test_db')
+@api.route('/test_db')
 def test_db_connection():
     try:
         db.test_collection.insert_one({"test": "conexao_ok", "timestamp": datetime.utcnow()})
@@ -41,7 +215,7 @@ def test_db_connection():
     except Exception as e:
         return jsonify(message=f"Erro ao conectar ou testar o MongoDB: {e}", status="error"), 500
 
-@app.route('/players', methods=['POST'])
+@api.route('/players', methods=['POST'])
 def create_player():
     data = request.get_json()
     if not data:
@@ -51,43 +225,65 @@ def create_player():
     for field in required_fields:
         if field not in data:
             return jsonify(message=f"Campo '{field}' é obrigatório."), 400
+    if not all(isinstance(data[field], str) for field in ("nomeCompleto", "email")):
+        return jsonify(message="nomeCompleto e email devem ser textos."), 400
     
     if players_collection.find_one({"email": data["email"]}):
         return jsonify(message="Um jogador com este email já existe."), 409
 
     data['dataCadastro'] = datetime.utcnow()
+    data.update(search_fields(data))
 
     try:
         result = players_collection.insert_one(data)
         return jsonify(message="Jogador criado com sucesso!", playerId=str(result.inserted_id)), 201
+    except DuplicateKeyError:
+        return jsonify(message="Um jogador com este email já existe."), 409
     except Exception as e:
         print(f"Erro ao criar jogador: {e}")
         return jsonify(message=f"Erro ao criar jogador: {e}", status="error"), 500
 
-@app.route('/players', methods=['GET'])
+@api.route('/players', methods=['GET'])
 def get_all_players():
-    email = request.args.get('email')
-    
+    query = dict(ACTIVE_FILTER)
+    for param in ("email", "genero", "nivelHabilidade"):
+        if request.args.get(param):
+            query[param] = request.args[param]
+
     try:
-        players_list = []
-        query = {}
-        if email:
-            query["email"] = email
-        
-        for player in players_collection.find(query):
-            player['_id'] = str(player['_id'])
-            players_list.append(player)
-        return jsonify(players_list), 200
+        return paginated_response(players_collection, query, PLAYER_PROJECTION), 200
+    except QueryParamError as e:
+        return jsonify(message=str(e)), 400
+    except Exception as e:
+        print(f"Erro ao buscar jogadores: {e}")
+        return jsonify(message=f"Erro ao buscar jogadores: {e}", status="error"), 500
+
+@api.route('/players/search', methods=['GET'])
+def search_players():
+    """Autocompletar: prefixo de palavras do nome ou do email, sem diferenciar acentos
+    nem maiúsculas (`?q=joao si`). `limit` padrão 10, máximo 50."""
+    q = request.args.get('q', '')
+    query = search_query(q)
+    if query is None:
+        return jsonify(message="Parâmetro 'q' deve conter letras ou números."), 400
+    try:
+        limit = int(request.args.get('limit', SEARCH_LIMIT))
+    except ValueError:
+        return jsonify(message="Parâmetro 'limit' deve ser um inteiro."), 400
+    if limit < 1 or limit > MAX_SEARCH_LIMIT:
+        return jsonify(message=f"Parâmetro 'limit' deve estar entre 1 e {MAX_SEARCH_LIMIT}."), 400
+
+    try:
+        return jsonify(buscar_jogadores(players_collection, {**query, **ACTIVE_FILTER}, q, limit, SEARCH_PROJECTION)), 200
     except Exception as e:
         print(f"Erro ao buscar jogadores: {e}")
         return jsonify(message=f"Erro ao buscar jogadores: {e}", status="error"), 500
 
-@app.route('/players/<string:player_id>', methods=['GET'])
+@api.route('/players/<string:player_id>', methods=['GET'])
 def get_player_by_id(player_id):
     try:
-        player = players_collection.find_one({"_id": ObjectId(player_id)})
+        player = players_collection.find_one({"_id": ObjectId(player_id), **ACTIVE_FILTER}, PLAYER_PROJECTION)
         if player:
-            player['_id'] = str(player['_id'])
             return jsonify(player), 200
         else:
             return jsonify(message="Jogador não encontrado."), 404
@@ -95,7 +291,7 @@ def get_player_by_id(player_id):
         print(f"Erro ao buscar jogador: {e}")
         return jsonify(message=f"Erro ao buscar jogador: {e}", status="error"), 500
 
-@app.route('/players/<string:player_id>', methods=['PUT'])
+@api.route('/players/<string:player_id>', methods=['PUT'])
 def update_player(player_id):
     data = request.get_json()
     if not data:
@@ -106,25 +302,30 @@ def update_player(player_id):
     except Exception:
         return jsonify(message="ID de jogador inválido."), 400
 
-    update_data = {k: v for k, v in data.items() if k not in ['_id', 'dataCadastro']}
+    update_data = {k: v for k, v in data.items() if k not in ['_id', 'dataCadastro', 'buscaTokens', 'nomeBusca', 'excluidoEm']}
+    if not all(isinstance(update_data[field], str) for field in ("nomeCompleto", "email") if field in update_data):
+        return jsonify(message="nomeCompleto e email devem ser textos."), 400
 
     try:
-        result = players_collection.update_one({"_id": obj_id}, {"$set": update_data})
+        if 'nomeCompleto' in update_data or 'email' in update_data:
+            current = players_collection.find_one({"_id": obj_id}, {"nomeCompleto": 1, "email": 1}) or {}
+            update_data.update(search_fields({**current, **update_data}))
+        updated_player = players_collection.find_one_and_update(
+            {"_id": obj_id, **ACTIVE_FILTER}, {"$set": update_data}, projection=PLAYER_PROJECTION,
+            return_document=ReturnDocument.AFTER
+        )
 
-        if result.matched_count == 0:
+        if not updated_player:
             return jsonify(message="Jogador não encontrado para atualização."), 404
-        if result.modified_count == 0:
-            return jsonify(message="Nenhuma alteração detectada ou jogador já atualizado."), 200
-            
-        updated_player = players_collection.find_one({"_id": obj_id})
-        updated_player['_id'] = str(updated_player['_id'])
-            
+
         return jsonify(message="Jogador atualizado com sucesso!", player=updated_player), 200
+    except DuplicateKeyError:
+        return jsonify(message="Um jogador com este email já existe."), 409
     except Exception as e:
         print(f"Erro ao atualizar jogador: {e}")
         return jsonify(message=f"Erro ao atualizar jogador: {e}", status="error"), 500
 
-@app.route('/players/<string:player_id>', methods=['DELETE'])
+@api.route('/players/<string:player_id>', methods=['DELETE'])
 def delete_player(player_id):
     try:
         obj_id = ObjectId(player_id)
@@ -132,19 +333,24 @@ def delete_player(player_id):
         return jsonify(message="ID de jogador inválido."), 400
 
     try:
-        result = players_collection.delete_one({"_id": obj_id})
+        result = players_collection.update_one({"_id": obj_id, **ACTIVE_FILTER}, {"$set": {"excluidoEm": datetime.utcnow()}})
 
-        if result.deleted_count == 0:
+        if result.matched_count == 0:
             return jsonify(message="Jogador não encontrado para exclusão."), 404
-            
-        registrations_collection.delete_many({"jogadorId": player_id})
 
-        return jsonify(message="Jogador excluído com sucesso!"), 200
+        # Inscrições e imagens PIX saem em segundo plano; vagas são liberadas pelo job.
+        job_id = enqueue(jobs_collection, "excluir_jogador", player_id)
+        job_worker.notify()
+
+        return jsonify(
+            message="Jogador excluído com sucesso! As inscrições relacionadas serão removidas em segundo plano.",
+            jobId=job_id
+        ), 202, {"Location": f"/jobs/{job_id}"}
     except Exception as e:
         print(f"Erro ao excluir jogador: {e}")
         return jsonify(message=f"Erro ao excluir jogador: {e}", status="error"), 500
 
-@app.route('/tournaments', methods=['POST'])
+@api.route('/tournaments', methods=['POST'])
 def create_tournament():
     data = request.get_json()
     if not data:
@@ -168,29 +374,39 @@ def create_tournament():
 
     try:
         result = tournaments_collection.insert_one(data)
+        sync_slots(category_slots_collection, str(result.inserted_id), data["categorias"])
+        response_cache.invalidate("tournaments")
         return jsonify(message="Torneio criado com sucesso!", tournamentId=str(result.inserted_id)), 201
     except Exception as e:
         print(f"Erro ao criar torneio: {e}")
         return jsonify(message=f"Erro ao criar torneio: {e}", status="error"), 500
 
-@app.route('/tournaments', methods=['GET'])
+@api.route('/tournaments', methods=['GET'])
+@response_cache.cached(lambda: ["tournaments"])
 def get_all_tournaments():
+    query = dict(ACTIVE_FILTER)
+    if request.args.get('status'):
+        query["status"] = request.args['status']
+    if request.args.get('categoria'):
+        query["categorias.nome"] = request.args['categoria']
+
     try:
-        tournaments = []
-        for tournament in tournaments_collection.find():
-            tournament['_id'] = str(tournament['_id'])
-            tournaments.append(tournament)
-        return jsonify(tournaments), 200
+        periodo = date_range(request.args, as_datetime=False)
+        if periodo:
+            query["dataInicio"] = periodo
+        return paginated_response(tournaments_collection, query), 200
+    except QueryParamError as e:
+        return jsonify(message=str(e)), 400
     except Exception as e:
         print(f"Erro ao buscar torneios: {e}")
         return jsonify(message=f"Erro ao buscar torneios: {e}", status="error"), 500
 
-@app.route('/tournaments/<string:tournament_id>', methods=['GET'])
+@api.route('/tournaments/<string:tournament_id>', methods=['GET'])
+@response_cache.cached(lambda tournament_id: [f"tournament:{tournament_id}"])
 def get_tournament_by_id(tournament_id):
     try:
-        tournament = tournaments_collection.find_one({"_id": ObjectId(tournament_id)})
+        tournament = tournaments_collection.find_one({"_id": ObjectId(tournament_id), **ACTIVE_FILTER})
         if tournament:
-            tournament['_id'] = str(tournament['_id'])
             return jsonify(tournament), 200
         else:
             return jsonify(message="Torneio não encontrado."), 404
@@ -198,7 +414,7 @@ def get_tournament_by_id(tournament_id):
         print(f"Erro ao buscar torneio: {e}")
         return jsonify(message=f"Erro ao buscar torneio: {e}", status="error"), 500
 
-@app.route('/tournaments/<string:tournament_id>', methods=['PUT'])
+@api.route('/tournaments/<string:tournament_id>', methods=['PUT'])
 def update_tournament(tournament_id):
     data = request.get_json()
     if not data:
@@ -209,7 +425,7 @@ def update_tournament(tournament_id):
     except Exception:
         return jsonify(message="ID de torneio inválido."), 400
 
-    update_data = {k: v for k, v in data.items() if k not in ['_id', 'dataCriacao']}
+    update_data = {k: v for k, v in data.items() if k not in ['_id', 'dataCriacao', 'excluidoEm']}
     
     if 'categorias' in update_data:
         if not isinstance(update_data["categorias"], list) or not isinstance(update_data["categorias"], list):
@@ -221,22 +437,23 @@ def update_tournament(tournament_id):
                 return jsonify(message="valorInscricao deve ser um número e vagas deve ser um inteiro."), 400
 
     try:
-        result = tournaments_collection.update_one({"_id": obj_id}, {"$set": update_data})
+        updated_tournament = tournaments_collection.find_one_and_update(
+            {"_id": obj_id, **ACTIVE_FILTER}, {"$set": update_data}, return_document=ReturnDocument.AFTER
+        )
 
-        if result.matched_count == 0:
+        if not updated_tournament:
             return jsonify(message="Torneio não encontrado para atualização."), 404
-        if result.modified_count == 0:
-            return jsonify(message="Nenhuma alteração detectada ou torneio já atualizado."), 200
-
-        updated_tournament = tournaments_collection.find_one({"_id": obj_id})
-        updated_tournament['_id'] = str(updated_tournament['_id'])
+        response_cache.invalidate("tournaments", f"tournament:{tournament_id}")
+        if 'categorias' in update_data:
+            sync_slots(category_slots_collection, tournament_id, update_data["categorias"])
+            summary_cache.delete(tournament_id)
 
         return jsonify(message="Torneio atualizado com sucesso!", tournament=updated_tournament), 200
     except Exception as e:
         print(f"Erro ao atualizar torneio: {e}")
         return jsonify(message=f"Erro ao atualizar torneio: {e}", status="error"), 500
 
-@app.route('/tournaments/<string:tournament_id>', methods=['DELETE'])
+@api.route('/tournaments/<string:tournament_id>', methods=['DELETE'])
 def delete_tournament(tournament_id):
     try:
         obj_id = ObjectId(tournament_id)
@@ -244,19 +461,26 @@ def delete_tournament(tournament_id):
         return jsonify(message="ID de torneio inválido."), 400
 
     try:
-        result = tournaments_collection.delete_one({"_id": obj_id})
+        result = tournaments_collection.update_one({"_id": obj_id, **ACTIVE_FILTER}, {"$set": {"excluidoEm": datetime.utcnow()}})
 
-        if result.deleted_count == 0:
+        if result.matched_count == 0:
             return jsonify(message="Torneio não encontrado para exclusão."), 404
-        
-        registrations_collection.delete_many({"torneioId": tournament_id})
 
-        return jsonify(message="Torneio excluído com sucesso! Inscrições relacionadas também foram removidas."), 200
+        # Inscrições, partidas e imagens PIX saem em segundo plano, em lotes.
+        job_id = enqueue(jobs_collection, "excluir_torneio", tournament_id)
+        job_worker.notify()
+        response_cache.invalidate("tournaments", f"tournament:{tournament_id}", f"matches:{tournament_id}")
+        summary_cache.delete(tournament_id)
+
+        return jsonify(
+            message="Torneio excluído com sucesso! Inscrições e partidas relacionadas serão removidas em segundo plano.",
+            jobId=job_id
+        ), 202, {"Location": f"/jobs/{job_id}"}
     except Exception as e:
         print(f"Erro ao excluir torneio: {e}")
         return jsonify(message=f"Erro ao excluir torneio: {e}", status="error"), 500
 
-@app.route('/registrations', methods=['POST'])
+@api.route('/registrations', methods=['POST'])
 def create_registration():
     data = request.get_json()
     if not data:
@@ -267,13 +491,17 @@ def create_registration():
         if field not in data:
             return jsonify(message=f"Campo '{field}' é obrigatório."), 400
             
-    if not all(k in data["categoriaInscrita"] for k in ["nome", "valorInscricao"]):
+    if not isinstance(data["categoriaInscrita"], dict) or not all(k in data["categoriaInscrita"] for k in ["nome", "valorInscricao"]):
         return jsonify(message="categoriaInscrita deve conter nome e valorInscricao."), 400
+
+    if data.get('statusPagamento', 'Pendente') not in ['Pendente', 'Confirmado', 'Cancelado']:
+        return jsonify(message="Status de pagamento inválido."), 400
     
     try:
-        if not tournaments_collection.find_one({"_id": ObjectId(data["torneioId"])}):
+        tournament = tournaments_collection.find_one({"_id": ObjectId(data["torneioId"]), **ACTIVE_FILTER}, {"categorias": 1})
+        if not tournament:
             return jsonify(message="Torneio não encontrado."), 404
-        if not players_collection.find_one({"_id": ObjectId(data["jogadorId"])}):
+        if not players_collection.find_one({"_id": ObjectId(data["jogadorId"]), **ACTIVE_FILTER}):
             return jsonify(message="Jogador não encontrado."), 404
     except Exception:
         return jsonify(message="IDs de Torneio ou Jogador inválidos (formato)."), 400
@@ -286,43 +514,135 @@ def create_registration():
     if existing_registration:
         return jsonify(message="Este atleta já está inscrito nesta categoria do torneio."), 409
 
+    categoria_nome = data["categoriaInscrita"]["nome"]
+    if category_vagas(tournament, categoria_nome) is None:
+        return jsonify(message=f"Categoria '{categoria_nome}' não encontrada no torneio."), 404
+
     data['dataInscricao'] = datetime.utcnow()
     data['statusPagamento'] = data.get('statusPagamento', 'Pendente')
     data['pixDetails'] = {} 
 
+    new_slot = (data["torneioId"], categoria_nome, data['statusPagamento'])
+    if not transition(category_slots_collection, None, new_slot, lambda nome: category_vagas(tournament, nome)):
+        return jsonify(message="Não há vagas disponíveis nesta categoria."), 409
+
     try:
         result = registrations_collection.insert_one(data)
+        summary_cache.delete(data["torneioId"])
         return jsonify(message="Inscrição criada com sucesso!", registrationId=str(result.inserted_id)), 201
     except Exception as e:
+        transition(category_slots_collection, new_slot, None, None)
         print(f"Erro ao criar inscrição: {e}")
         return jsonify(message=f"Erro ao criar inscrição: {e}", status="error"), 500
 
-@app.route('/registrations', methods=['GET'])
+# Listagens de inscrições não trazem a imagem do QR Code, a menos que pedida em `fields`.
+REGISTRATION_LIST_PROJECTION = {"pixDetails.qrCodeBase64": 0}
+
+# `?expand=player,tournament`: dados de exibição embutidos em `jogador`/`torneio`.
+REGISTRATION_EXPANSIONS = {
+    "player": ("players", "jogadorId", "jogador",
+               {"nomeCompleto": 1, "email": 1, "nivelHabilidade": 1, "genero": 1}),
+    "tournament": ("tournaments", "torneioId", "torneio",
+                   {"nome": 1, "local": 1, "dataInicio": 1, "dataFim": 1, "status": 1}),
+}
+
+def registration_filters(args):
+    query = {}
+    if args.get('status'):
+        query["statusPagamento"] = args['status']
+    if args.get('categoria'):
+        query["categoriaInscrita.nome"] = args['categoria']
+    periodo = date_range(args)
+    if periodo:
+        query["dataInscricao"] = periodo
+    return query
+
+@api.route('/registrations', methods=['GET'])
 def get_all_registrations():
     try:
-        registrations = []
-        for reg in registrations_collection.find():
-            reg['_id'] = str(reg['_id'])
-            registrations.append(reg)
-        return jsonify(registrations), 200
+        query = registration_filters(request.args)
+        for param in ("torneioId", "jogadorId"):
+            if request.args.get(param):
+                query[param] = request.args[param]
+        lookups = parse_expand(request.args, REGISTRATION_EXPANSIONS)
+        return paginated_response(registrations_collection, query, REGISTRATION_LIST_PROJECTION, lookups), 200
+    except QueryParamError as e:
+        return jsonify(message=str(e)), 400
     except Exception as e:
         print(f"Erro ao buscar inscrições: {e}")
         return jsonify(message=f"Erro ao buscar inscrições: {e}", status="error"), 500
 
-@app.route('/registrations/<string:registration_id>', methods=['GET'])
+@api.route('/registrations/<string:registration_id>', methods=['GET'])
 def get_registration_by_id(registration_id):
     try:
-        reg = registrations_collection.find_one({"_id": ObjectId(registration_id)})
+        lookups = parse_expand(request.args, REGISTRATION_EXPANSIONS)
+        if lookups:
+            pipeline = [{"$match": {"_id": ObjectId(registration_id)}}, *lookups]
+            reg = next(registrations_collection.aggregate(pipeline), None)
+        else:
+            reg = registrations_collection.find_one({"_id": ObjectId(registration_id)})
         if reg:
-            reg['_id'] = str(reg['_id'])
             return jsonify(reg), 200
         else:
             return jsonify(message="Inscrição não encontrada."), 404
+    except QueryParamError as e:
+        return jsonify(message=str(e)), 400
     except Exception as e:
         print(f"Erro ao buscar inscrição: {e}")
         return jsonify(message=f"Erro ao buscar inscrição: {e}", status="error"), 500
 
-@app.route('/registrations/<string:registration_id>', methods=['PUT'])
+REGISTRATION_SLOT_PROJECTION = {"torneioId": 1, "categoriaInscrita.nome": 1, "statusPagamento": 1}
+
+def registration_slot(reg):
+    """(torneioId, categoria, statusPagamento): o que decide qual vaga a inscrição ocupa."""
+    return (reg.get("torneioId"), reg.get("categoriaInscrita", {}).get("nome"), reg.get("statusPagamento"))
+
+def tournament_vagas_lookup(torneio_id):
+    def vagas_of(categoria_nome):
+        tournament = tournaments_collection.find_one({"_id": ObjectId(torneio_id), **ACTIVE_FILTER}, {"categorias": 1})
+        return category_vagas(tournament, categoria_nome) if tournament else None
+    return vagas_of
+
+def update_registration_with_slots(obj_id, update_data):
+    """Atualiza a inscrição mantendo os contadores de vagas coerentes quando o status
+    ou a categoria mudam. Devolve (inscrição atualizada, erro); o erro já é uma
+    resposta pronta."""
+    current = registrations_collection.find_one({"_id": obj_id}, REGISTRATION_SLOT_PROJECTION)
+    if not current:
+        return None, None
+    old_slot = registration_slot(current)
+    new_slot = (
+        update_data.get("torneioId", old_slot[0]),
+        update_data.get("categoriaInscrita", {}).get("nome", old_slot[1]),
+        update_data.get("statusPagamento", old_slot[2]),
+    )
+    old_key = old_slot[:2] if occupies(old_slot[2]) else None
+    new_key = new_slot[:2] if occupies(new_slot[2]) else None
+    moves = old_key != new_key
+    if moves and new_key:
+        vagas = tournament_vagas_lookup(new_key[0])(new_key[1])
+        if vagas is None or not reserve(category_slots_collection, *new_key, vagas):
+            return None, (jsonify(message="Não há vagas disponíveis nesta categoria."), 409)
+
+    # O filtro pelo estado lido garante que duas alterações concorrentes não
+    # liberem ou reservem a mesma vaga duas vezes. A vaga antiga só é liberada
+    # depois da gravação; se ela falhar, desfaz-se apenas a reserva nova.
+    updated = registrations_collection.find_one_and_update(
+        {"_id": obj_id, "torneioId": old_slot[0], "statusPagamento": old_slot[2], "categoriaInscrita.nome": old_slot[1]},
+        {"$set": update_data},
+        return_document=ReturnDocument.AFTER
+    )
+    if not updated:
+        if moves and new_key:
+            release(category_slots_collection, *new_key)
+        return None, (jsonify(message="A inscrição foi alterada por outra requisição. Tente novamente."), 409)
+    if moves and old_key:
+        release(category_slots_collection, *old_key)
+    summary_cache.delete(old_slot[0])
+    summary_cache.delete(new_slot[0])
+    return updated, None
+
+@api.route('/registrations/<string:registration_id>', methods=['PUT'])
 def update_registration(registration_id):
     data = request.get_json()
     if not data:
@@ -335,23 +655,32 @@ def update_registration(registration_id):
 
     update_data = {k: v for k, v in data.items() if k not in ['_id', 'dataInscricao']}
 
+    if 'statusPagamento' in update_data and update_data['statusPagamento'] not in ['Pendente', 'Confirmado', 'Cancelado']:
+        return jsonify(message="Status de pagamento inválido."), 400
+    if 'categoriaInscrita' in update_data and not isinstance(update_data['categoriaInscrita'], dict):
+        return jsonify(message="categoriaInscrita deve ser um objeto com nome e valorInscricao."), 400
+    if 'torneioId' in update_data and not (isinstance(update_data['torneioId'], str) and ObjectId.is_valid(update_data['torneioId'])):
+        return jsonify(message="ID de torneio inválido."), 400
+
     try:
-        result = registrations_collection.update_one({"_id": obj_id}, {"$set": update_data})
+        if 'statusPagamento' in update_data or 'categoriaInscrita' in update_data or 'torneioId' in update_data:
+            updated_reg, error = update_registration_with_slots(obj_id, update_data)
+            if error:
+                return error
+        else:
+            updated_reg = registrations_collection.find_one_and_update(
+                {"_id": obj_id}, {"$set": update_data}, return_document=ReturnDocument.AFTER
+            )
 
-        if result.matched_count == 0:
+        if not updated_reg:
             return jsonify(message="Inscrição não encontrada para atualização."), 404
-        if result.modified_count == 0:
-            return jsonify(message="Nenhuma alteração detectada ou inscrição já atualizada."), 200
-
-        updated_reg = registrations_collection.find_one({"_id": obj_id})
-        updated_reg['_id'] = str(updated_reg['_id'])
 
         return jsonify(message="Inscrição atualizada com sucesso!", registration=updated_reg), 200
     except Exception as e:
         print(f"Erro ao atualizar inscrição: {e}")
         return jsonify(message=f"Erro ao atualizar inscrição: {e}", status="error"), 500
 
-@app.route('/registrations/<string:registration_id>', methods=['DELETE'])
+@api.route('/registrations/<string:registration_id>', methods=['DELETE'])
 def delete_registration(registration_id):
     try:
         obj_id = ObjectId(registration_id)
@@ -359,90 +688,122 @@ def delete_registration(registration_id):
         return jsonify(message="ID de inscrição inválido."), 400
 
     try:
-        result = registrations_collection.delete_one({"_id": obj_id})
+        deleted = registrations_collection.find_one_and_delete({"_id": obj_id}, projection=REGISTRATION_SLOT_PROJECTION)
 
-        if result.deleted_count == 0:
+        if not deleted:
             return jsonify(message="Inscrição não encontrada para exclusão."), 404
 
+        transition(category_slots_collection, registration_slot(deleted), None, None)
+        summary_cache.delete(deleted.get("torneioId"))
+
         return jsonify(message="Inscrição excluída com sucesso!"), 200
     except Exception as e:
         print(f"Erro ao excluir inscrição: {e}")
         return jsonify(message=f"Erro ao excluir inscrição: {e}", status="error"), 500
 
-@app.route('/tournaments/<string:torneio_id>/registrations', methods=['GET'])
+@api.route('/tournaments/<string:torneio_id>/registrations', methods=['GET'])
 def get_registrations_by_tournament(torneio_id):
     try:
-        registrations = []
-        for reg in registrations_collection.find({"torneioId": torneio_id}):
-            reg['_id'] = str(reg['_id'])
-            registrations.append(reg)
-        return jsonify(registrations), 200
+        query = {**registration_filters(request.args), "torneioId": torneio_id}
+        lookups = parse_expand(request.args, REGISTRATION_EXPANSIONS)
+        return paginated_response(registrations_collection, query, REGISTRATION_LIST_PROJECTION, lookups), 200
+    except QueryParamError as e:
+        return jsonify(message=str(e)), 400
     except Exception as e:
         print(f"Erro ao buscar inscrições por torneio: {e}")
         return jsonify(message=f"Erro ao buscar inscrições por torneio: {e}", status="error"), 500
 
-@app.route('/players/<string:jogador_id>/registrations', methods=['GET'])
+@api.route('/players/<string:jogador_id>/registrations', methods=['GET'])
 def get_registrations_by_player(jogador_id):
     try:
-        registrations = []
-        for reg in registrations_collection.find({"jogadorId": jogador_id}):
-            reg['_id'] = str(reg['_id'])
-            registrations.append(reg)
-        return jsonify(registrations), 200
+        query = {**registration_filters(request.args), "jogadorId": jogador_id}
+        lookups = parse_expand(request.args, REGISTRATION_EXPANSIONS)
+        return paginated_response(registrations_collection, query, REGISTRATION_LIST_PROJECTION, lookups), 200
+    except QueryParamError as e:
+        return jsonify(message=str(e)), 400
     except Exception as e:
         print(f"Erro ao buscar inscrições por jogador: {e}")
         return jsonify(message=f"Erro ao buscar inscrições por jogador: {e}", status="error"), 500
 
-# --- Rota para Gerar PIX para uma Inscrição Específica (SIMULADO) ---
-@app.route('/registrations/<string:registration_id>/generate_pix', methods=['POST'])
+# --- Rota para o Resumo do Painel do Organizador ---
+@api.route('/tournaments/<string:torneio_id>/summary', methods=['GET'])
+def get_tournament_summary(torneio_id):
+    cached = summary_cache.get(torneio_id)
+    if cached is not None:
+        return jsonify(cached), 200
+
+    try:
+        tournament = tournaments_collection.find_one({"_id": ObjectId(torneio_id), **ACTIVE_FILTER}, {"categorias": 1})
+    except Exception:
+        return jsonify(message="ID de torneio inválido."), 400
+    if not tournament:
+        return jsonify(message="Torneio não encontrado."), 404
+
+    try:
+        summary = tournament_summary(registrations_collection, tournament)
+        summary_cache.set(torneio_id, summary)
+        return jsonify(summary), 200
+    except Exception as e:
+        print(f"Erro ao gerar resumo do torneio: {e}")
+        return jsonify(message=f"Erro ao gerar resumo do torneio: {e}", status="error"), 500
+
+# --- Rota para Importação de Inscrições em Lote (CSV ou JSON) ---
+@api.route('/tournaments/<string:torneio_id>/registrations/bulk', methods=['POST'])
+def bulk_create_registrations(torneio_id):
+    try:
+        rows = parse_rows(request)
+    except ImportFormatError as e:
+        return jsonify(message=str(e)), 400
+    if not rows:
+        return jsonify(message="Nenhuma linha para importar."), 400
+    if len(rows) > MAX_ROWS:
+        return jsonify(message=f"A importação aceita no máximo {MAX_ROWS} linhas por vez."), 400
+
+    try:
+        tournament = tournaments_collection.find_one({"_id": ObjectId(torneio_id), **ACTIVE_FILTER}, {"categorias": 1})
+    except Exception:
+        return jsonify(message="ID de torneio inválido."), 400
+    if not tournament:
+        return jsonify(message="Torneio não encontrado."), 404
+
+    try:
+        report = import_registrations(
+            tournament, rows, players_collection, registrations_collection, category_slots_collection
+        )
+        inserted = sum(1 for r in report if r["status"] == "ok")
+        summary_cache.delete(torneio_id)
+        return jsonify(
+            message="Importação concluída.",
+            total=len(report),
+            inserted=inserted,
+            failed=len(report) - inserted,
+            rows=report
+        ), 200
+    except Exception as e:
+        print(f"Erro ao importar inscrições: {e}")
+        return jsonify(message=f"Erro ao importar inscrições: {e}", status="error"), 500
+
+# --- Rota para Gerar PIX para uma Inscrição Específica ---
+@api.route('/registrations/<string:registration_id>/generate_pix', methods=['POST'])
 def generate_pix_for_registration(registration_id):
     try:
         obj_id = ObjectId(registration_id)
     except Exception:
         return jsonify(message="ID de inscrição inválido."), 400
     
-    registration = registrations_collection.find_one({"_id": obj_id})
+    registration = registrations_collection.find_one({"_id": obj_id}, {"categoriaInscrita": 1})
     if not registration:
         return jsonify(message="Inscrição não encontrada."), 404
     
     valor_inscricao = registration['categoriaInscrita']['valorInscricao']
-    
-    # === GERAÇÃO DO PIX COPIA E COLA (BR CODE) USANDO UM TEMPLATE VÁLIDO DE TESTE ===
-    # Este é um PIX de teste que aponta para um recebedor genérico do Mercado Pago (OSASCO).
-    # O valor é fixo em R$ 1.00 NESTA STRING DE TESTE.
-    # O QR Code gerado a partir desta string será LIDO pelo aplicativo do banco.
-    # A sua chave, nome e valor da inscrição serão exibidos TEXTUALMENTE abaixo do QR.
-    
-    # String PIX de teste (gerada de um ambiente real de simulação do Mercado Pago)
-    pix_copia_e_cola_data = f"00020126580014BR.GOV.BCB.PIX0136d2466986-7a7d-417c-95ea-65f58535031b52040000530398654051.005802BR5913MERCADO PAGO6009OSASCO62070503***6304ED25"
-    
-    # Geração do QR Code como imagem
-    qr = qrcode.QRCode(
-        version=1,
-        error_correction=qrcode.constants.ERROR_CORRECT_L,
-        box_size=10,
-        border=4,
+
+    # BR Code com o valor real da inscrição e o ID da inscrição como txid.
+    # A imagem do QR Code é renderizada uma vez por payload e servida em /pix.png.
+    pix_copia_e_cola_data = build_br_code(
+        PIX_RECEIVER["chave"], PIX_RECEIVER["nome"], PIX_RECEIVER["cidade"], valor_inscricao, registration_id
     )
-    qr.add_data(pix_copia_e_cola_data) # O QR Code é gerado a partir da string de teste acima
-    qr.make(fit=True)
-    img = qr.make_image(fill_color="black", back_color="white")
-
-    # Converte a imagem do QR Code para formato Base64
-    buffer = io.BytesIO()
-    img.save(buffer, format="PNG")
-    qr_code_base64 = base64.b64encode(buffer.getvalue()).decode('utf-8')
-    
-    # === DETALHES PIX PARA O FRONTEND (ESTES SÃO OS QUE APARECERÃO NO TEXTO DA PÁGINA) ===
-    # Estes dados são os seus dados PIX REAIS que você me passou.
-    # Eles são exibidos textualmente para o usuário, ao lado do QR Code de teste.
-    pix_details = {
-        "pixCopiaECola": pix_copia_e_cola_data, # A string completa do PIX de teste
-        "qrCodeBase64": qr_code_base64,         # A imagem do QR Code em Base64
-        "valor": valor_inscricao,               # <--- VALOR REAL DA INSCRIÇÃO
-        "chaveRecebedor": "jlteambt@gmail.com", # <--- SUA CHAVE PIX REAL
-        "nomeRecebedor": "ASSESP",              # <--- SEU NOME REAL
-        "cidadeRecebedor": "Santos"             # <--- SUA CIDADE
-    }
+    qr_code_hash, _ = qr_code_cache.get_or_render(pix_copia_e_cola_data)
+    pix_details = build_pix_details(registration_id, valor_inscricao, qr_code_hash, pix_copia_e_cola_data)
     
     result = registrations_collection.update_one(
         {"_id": obj_id},
@@ -457,8 +818,84 @@ def generate_pix_for_registration(registration_id):
         pixDetails=pix_details
     ), 200
 
+# --- Rota para Gerar PIX para Todas as Inscrições Pendentes de um Torneio ---
+@api.route('/tournaments/<string:torneio_id>/generate_pix', methods=['POST'])
+def generate_pix_for_tournament(torneio_id):
+    try:
+        pending = list(registrations_collection.find(
+            {"torneioId": torneio_id, "statusPagamento": "Pendente"},
+            {"categoriaInscrita.valorInscricao": 1}
+        ))
+        if not pending:
+            return jsonify(message="Nenhuma inscrição pendente para gerar PIX.", generated=0), 200
+
+        payloads = {}
+        errors = {}
+        for reg in pending:
+            registration_id = str(reg["_id"])
+            valor = (reg.get("categoriaInscrita") or {}).get("valorInscricao")
+            if not isinstance(valor, (int, float)) or isinstance(valor, bool):
+                # Uma inscrição sem valor não impede o PIX das demais.
+                errors[registration_id] = "Inscrição sem valorInscricao numérico."
+                continue
+            payloads[registration_id] = (
+                build_br_code(PIX_RECEIVER["chave"], PIX_RECEIVER["nome"], PIX_RECEIVER["cidade"], valor, registration_id),
+                valor,
+            )
+
+        hashes = qr_code_cache.get_or_render_many([payload for payload, _ in payloads.values()])
+
+        operations = []
+        for reg in pending:
+            registration_id = str(reg["_id"])
+            if registration_id not in payloads:
+                continue
+            payload, valor = payloads[registration_id]
+            operations.append(UpdateOne(
+                {"_id": reg["_id"]},
+                {"$set": {"pixDetails": build_pix_details(registration_id, valor, hashes[payload], payload)}}
+            ))
+        generated = registrations_collection.bulk_write(operations, ordered=False).matched_count if operations else 0
+
+        return jsonify(
+            message="PIX gerado com sucesso para as inscrições pendentes!",
+            generated=generated,
+            registrationIds=list(payloads),
+            errors=errors
+        ), 200
+    except Exception as e:
+        print(f"Erro ao gerar PIX do torneio: {e}")
+        return jsonify(message=f"Erro ao gerar PIX do torneio: {e}", status="error"), 500
+
+@api.route('/registrations/<string:registration_id>/pix.png', methods=['GET'])
+def get_registration_pix_image(registration_id):
+    try:
+        obj_id = ObjectId(registration_id)
+    except Exception:
+        return jsonify(message="ID de inscrição inválido."), 400
+
+    registration = registrations_collection.find_one({"_id": obj_id}, {"pixDetails.qrCodeHash": 1})
+    if not registration:
+        return jsonify(message="Inscrição não encontrada."), 404
+    qr_code_hash = registration.get("pixDetails", {}).get("qrCodeHash")
+    if not qr_code_hash:
+        return jsonify(message="PIX ainda não gerado para esta inscrição."), 404
+
+    # O hash do payload é um ETag forte: mesma string PIX, mesma imagem.
+    if qr_code_hash in request.if_none_match:
+        response = make_response('', 304)
+    else:
+        png = qr_code_cache.get(qr_code_hash)
+        if png is None:
+            return jsonify(message="Imagem do PIX não encontrada."), 404
+        response = make_response(png)
+        response.mimetype = 'image/png'
+    response.set_etag(qr_code_hash)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
 # --- Rota para Atualizar Status de Pagamento Manualmente ---
-@app.route('/registrations/<string:registration_id>/status', methods=['PUT'])
+@api.route('/registrations/<string:registration_id>/status', methods=['PUT'])
 def update_registration_status(registration_id):
     data = request.get_json()
     new_status = data.get('statusPagamento')
@@ -472,130 +909,203 @@ def update_registration_status(registration_id):
         return jsonify(message="ID de inscrição inválido."), 400
 
     try:
-        result = registrations_collection.update_one(
-            {"_id": obj_id},
-            {"$set": {"statusPagamento": new_status}}
-        )
+        updated_reg, error = update_registration_with_slots(obj_id, {"statusPagamento": new_status})
+        if error:
+            return error
 
-        if result.matched_count == 0:
+        if not updated_reg:
             return jsonify(message="Inscrição não encontrada para atualizar status."), 404
-        if result.modified_count == 0:
-            return jsonify(message="Nenhuma alteração detectada ou status já atualizado."), 200
-
-        updated_reg = registrations_collection.find_one({"_id": obj_id})
-        updated_reg['_id'] = str(updated_reg['_id'])
 
         return jsonify(message="Status de pagamento atualizado com sucesso!", registration=updated_reg), 200
     except Exception as e:
         print(f"Erro ao atualizar status de pagamento: {e}")
         return jsonify(message=f"Erro ao atualizar status de pagamento: {e}", status="error"), 500
 
+# --- Rota para Confirmação de Pagamentos em Lote ---
+@api.route('/registrations/status/bulk', methods=['PUT'])
+def bulk_update_registration_status():
+    data = request.get_json()
+    updates = data.get('updates') if isinstance(data, dict) else data
+    if not isinstance(updates, list) or not updates:
+        return jsonify(message="Envie uma lista 'updates' com id e statusPagamento."), 400
+
+    results = {}
+    wanted = {}
+    for item in updates:
+        reg_id = item.get('id') if isinstance(item, dict) else None
+        new_status = item.get('statusPagamento') if isinstance(item, dict) else None
+        if not reg_id or not ObjectId.is_valid(reg_id):
+            results[str(reg_id)] = {"status": "erro", "message": "ID de inscrição inválido."}
+        elif new_status not in ['Pendente', 'Confirmado', 'Cancelado']:
+            results[reg_id] = {"status": "erro", "message": "Status de pagamento inválido."}
+        else:
+            wanted[reg_id] = new_status
 
-# --- Rotas para Geração e Visualização de Confrontos/Chaves ---
-@app.route('/tournaments/<string:torneio_id>/<string:categoria_nome>/generate_draw', methods=['POST'])
-def generate_draw(torneio_id, categoria_nome):
     try:
-        tournament = tournaments_collection.find_one({"_id": ObjectId(torneio_id)})
-        if not tournament:
-            return jsonify(message="Torneio não encontrado."), 404
+        current = {
+            str(reg["_id"]): reg
+            for reg in registrations_collection.find(
+                {"_id": {"$in": [ObjectId(i) for i in wanted]}}, REGISTRATION_SLOT_PROJECTION
+            )
+        }
+
+        # Reativações (Cancelado -> Pendente/Confirmado) precisam de vaga; as demais
+        # mudanças são gravadas primeiro, para que as vagas liberadas no mesmo lote
+        # já estejam disponíveis às reativações.
+        reactivations = {}
+        changes = []
+        for reg_id, new_status in wanted.items():
+            reg = current.get(reg_id)
+            if not reg:
+                results[reg_id] = {"status": "erro", "message": "Inscrição não encontrada."}
+                continue
+            torneio_id, categoria_nome, old_status = registration_slot(reg)
+            if old_status == new_status:
+                results[reg_id] = {"status": "inalterado", "statusPagamento": new_status}
+            elif occupies(new_status) and not occupies(old_status):
+                reactivations.setdefault((torneio_id, categoria_nome), []).append((reg_id, old_status, new_status))
+            else:
+                changes.append((reg_id, old_status, new_status, torneio_id, categoria_nome))
+
+        def apply(rows):
+            """Grava o lote `rows` = [(id, status lido, status novo, torneioId, categoria)]
+            com um único `bulk_write` e devolve as linhas efetivamente aplicadas."""
+            if not rows:
+                return []
+            # Filtro pelo status lido, como em `update_registration_with_slots`: uma
+            # alteração concorrente faz a linha falhar em vez de mexer nas vagas.
+            registrations_collection.bulk_write([
+                UpdateOne({"_id": ObjectId(reg_id), "statusPagamento": old_status}, {"$set": {"statusPagamento": new_status}})
+                for reg_id, old_status, new_status, _, _ in rows
+            ], ordered=False)
+            # O resultado do bulk_write só traz contagens; uma leitura diz quais linhas valeram.
+            now = {
+                str(reg["_id"]): reg["statusPagamento"]
+                for reg in registrations_collection.find(
+                    {"_id": {"$in": [ObjectId(row[0]) for row in rows]},
+                     "statusPagamento": {"$in": list({row[2] for row in rows})}},
+                    {"_id": 1, "statusPagamento": 1}
+                )
+            }
+            applied = []
+            for row in rows:
+                reg_id, _, new_status, torneio_id, _ = row
+                if now.get(reg_id) == new_status:
+                    results[reg_id] = {"status": "atualizado", "statusPagamento": new_status}
+                    summary_cache.delete(torneio_id)
+                    applied.append(row)
+                else:
+                    results[reg_id] = {"status": "erro", "message": "A inscrição foi alterada por outra requisição. Tente novamente."}
+            return applied
+
+        releases = {}
+        for _, old_status, new_status, torneio_id, categoria_nome in apply(changes):
+            if occupies(old_status) and not occupies(new_status):
+                releases[(torneio_id, categoria_nome)] = releases.get((torneio_id, categoria_nome), 0) + 1
+        release_many(category_slots_collection, releases)
+
+        if reactivations:
+            tournaments = {
+                str(t["_id"]): t
+                for t in tournaments_collection.find(
+                    {"_id": {"$in": [ObjectId(tid) for tid, _ in reactivations if ObjectId.is_valid(tid)]}, **ACTIVE_FILTER},
+                    {"categorias": 1}
+                )
+            }
+            reserved = {}
+            granted_rows = []
+            for (torneio_id, categoria_nome), rows in reactivations.items():
+                vagas = category_vagas(tournaments.get(torneio_id, {}), categoria_nome)
+                granted = reserve_up_to(category_slots_collection, torneio_id, categoria_nome, vagas, len(rows)) if vagas else 0
+                for reg_id, _, _ in rows[granted:]:
+                    results[reg_id] = {"status": "erro", "message": "Não há vagas disponíveis nesta categoria."}
+                reserved[(torneio_id, categoria_nome)] = granted
+                granted_rows.extend(
+                    (reg_id, old_status, new_status, torneio_id, categoria_nome)
+                    for reg_id, old_status, new_status in rows[:granted]
+                )
+            # Devolve as vagas reservadas para linhas que não foram gravadas.
+            for _, _, _, torneio_id, categoria_nome in apply(granted_rows):
+                reserved[(torneio_id, categoria_nome)] -= 1
+            release_many(category_slots_collection, reserved)
 
-        category_details = None
-        for cat in tournament.get('categorias', []):
-            if cat['nome'] == categoria_nome:
-                category_details = cat
-                break
-        if not category_details:
-            return jsonify(message=f"Categoria '{categoria_nome}' não encontrada no torneio."), 404
+        return jsonify(
+            message="Status de pagamento atualizados.",
+            updated=sum(1 for r in results.values() if r["status"] == "atualizado"),
+            results=results
+        ), 200
+    except Exception as e:
+        print(f"Erro ao atualizar status em lote: {e}")
+        return jsonify(message=f"Erro ao atualizar status em lote: {e}", status="error"), 500
 
-        registered_players_ids = registrations_collection.find({
-            "torneioId": torneio_id,
-            "categoriaInscrita.nome": categoria_nome,
-            "statusPagamento": "Confirmado" 
-        }, {"jogadorId": 1, "_id": 0})
 
-        players_for_draw_raw = [reg["jogadorId"] for reg in registered_players_ids]
-        
-        players_details = []
-        for p_id in players_for_draw_raw:
-            player_info = players_collection.find_one({"_id": ObjectId(p_id)})
-            if player_info:
-                players_details.append({"id": str(player_info["_id"]), "nome": player_info["nomeCompleto"]})
-        
-        import random
-        random.shuffle(players_details)
+# --- Rotas para Geração e Visualização de Confrontos/Chaves ---
+def find_category(torneio_id, categoria_nome):
+    """Devolve `(categoria, resposta_de_erro)` para as rotas de geração de partidas."""
+    tournament = tournaments_collection.find_one({"_id": ObjectId(torneio_id), **ACTIVE_FILTER}, {"categorias": 1})
+    if not tournament:
+        return None, (jsonify(message="Torneio não encontrado."), 404)
+    for cat in tournament.get('categorias', []):
+        if cat['nome'] == categoria_nome:
+            return cat, None
+    return None, (jsonify(message=f"Categoria '{categoria_nome}' não encontrada no torneio."), 404)
+
+def confirmed_players(torneio_id, categoria_nome):
+    """Jogadores com inscrição confirmada na categoria: `{"id", "nome", "nivel"}`."""
+    registered_players_ids = registrations_collection.find({
+        "torneioId": torneio_id,
+        "categoriaInscrita.nome": categoria_nome,
+        "statusPagamento": "Confirmado"
+    }, {"jogadorId": 1, "_id": 0})
+
+    players_object_ids = [ObjectId(reg["jogadorId"]) for reg in registered_players_ids if ObjectId.is_valid(reg.get("jogadorId"))]
+
+    return [
+        {"id": str(player_info["_id"]), "nome": player_info["nomeCompleto"], "nivel": player_info.get("nivelHabilidade")}
+        for player_info in players_collection.find(
+            {"_id": {"$in": players_object_ids}, **ACTIVE_FILTER}, {"nomeCompleto": 1, "nivelHabilidade": 1}
+        )
+    ]
+
+@api.route('/tournaments/<string:torneio_id>/<string:categoria_nome>/generate_draw', methods=['POST'])
+def generate_draw(torneio_id, categoria_nome):
+    try:
+        _, error = find_category(torneio_id, categoria_nome)
+        if error:
+            return error
+
+        players_details = [{"id": p["id"], "nome": p["nome"]} for p in confirmed_players(torneio_id, categoria_nome)]
 
         num_players = len(players_details)
         
         if num_players == 0:
             return jsonify(message="Não há jogadores inscritos e confirmados para gerar a chave para esta categoria."), 400
-        
-        import math
-        next_power_of_2 = 2**math.ceil(math.log2(num_players))
-        num_byes = next_power_of_2 - num_players
-
-        draw_size = next_power_of_2
-        
-        players_in_draw = list(players_details)
-
-        for _ in range(num_byes):
-            players_in_draw.append({"id": "BYE", "nome": "BYE"})
-        
-        random.shuffle(players_in_draw)
-        
-        if len(players_in_draw) < 2 and num_byes == 0:
+        if num_players < 2:
             return jsonify(message="Número insuficiente de jogadores para formar partidas (mínimo 2)."), 400
+
+        confrontos, draw_size, num_byes = distribuir_chave(players_details)
+        bracket_matches = montar_chave(torneio_id, categoria_nome, confrontos)
         
+        # A fase de grupos da categoria, se houver, é mantida.
         matches_collection.delete_many({
             "torneioId": torneio_id,
-            "categoriaNome": categoria_nome
+            "categoriaNome": categoria_nome,
+            "fase": {"$ne": FASE_GRUPOS}
         })
+        matches_collection.insert_many(bracket_matches)
+        response_cache.invalidate(f"matches:{torneio_id}:{categoria_nome}")
+        bump_bracket_version(bracket_versions_collection, torneio_id, categoria_nome)
+        atualizar_ranking(db, ranking_points, torneio_id, categoria_nome)
+        publish_event(torneio_id, "draw", {"categoria": categoria_nome, "totalMatches": len(bracket_matches)})
 
-        match_counter = 0
-        first_round_matches_ids = []
-
-        for i in range(0, len(players_in_draw), 2):
-            player1 = players_in_draw[i]
-            player2 = players_in_draw[i+1]
-            match_counter += 1
-
-            if player1["id"] == "BYE" or player2["id"] == "BYE":
-                vencedor_id = player1["id"] if player2["id"] == "BYE" else player2["id"]
-                match_data = {
-                    "torneioId": torneio_id,
-                    "categoriaNome": categoria_nome,
-                    "rodada": f"Primeira Rodada ({draw_size} Participantes)",
-                    "partidaNumero": match_counter,
-                    "jogador1": player1,
-                    "jogador2": player2,
-                    "vencedorId": vencedor_id,
-                    "placar": "BYE",
-                    "dataHora": None,
-                    "quadra": None,
-                    "status": "Finalizada"
-                }
-            else:
-                match_data = {
-                    "torneioId": torneio_id,
-                    "categoriaNome": categoria_nome,
-                    "rodada": f"Primeira Rodada ({draw_size} Participantes)",
-                    "partidaNumero": match_counter,
-                    "jogador1": player1,
-                    "jogador2": player2,
-                    "vencedorId": None,
-                    "placar": None,
-                    "dataHora": None,
-                    "quadra": None,
-                    "status": "Agendada"
-                }
-            
-            result = matches_collection.insert_one(match_data)
-            first_round_matches_ids.append(str(result.inserted_id))
+        first_round_matches_ids = [str(m["_id"]) for m in bracket_matches if m["rodadaNumero"] == 1]
 
         return jsonify(
             message=f"Chave de eliminação simples gerada com sucesso para a categoria '{categoria_nome}'.",
             totalPlayers=num_players,
             byesAssigned=num_byes,
             drawSize=draw_size,
+            totalMatches=len(bracket_matches),
             firstRoundMatchesCount=len(first_round_matches_ids),
             firstRoundMatchIds=first_round_matches_ids
         ), 201
@@ -604,20 +1114,297 @@ def generate_draw(torneio_id, categoria_nome):
         print(f"Erro ao gerar chave: {e}")
         return jsonify(message=f"Erro ao gerar chave: {e}", status="error"), 500
 
-@app.route('/tournaments/<string:torneio_id>/<string:categoria_nome>/matches', methods=['GET'])
+@api.route('/tournaments/<string:torneio_id>/<string:categoria_nome>/generate_groups', methods=['POST'])
+def generate_groups(torneio_id, categoria_nome):
+    data = request.get_json(silent=True) or {}
+    group_size = data.get("tamanhoGrupo", TAMANHO_GRUPO_PADRAO)
+    if not isinstance(group_size, int) or isinstance(group_size, bool) or group_size < 2:
+        return jsonify(message="'tamanhoGrupo' deve ser um inteiro maior ou igual a 2."), 400
+
+    try:
+        _, error = find_category(torneio_id, categoria_nome)
+        if error:
+            return error
+
+        players_details = confirmed_players(torneio_id, categoria_nome)
+        if len(players_details) < 2:
+            return jsonify(message="Número insuficiente de jogadores para formar grupos (mínimo 2)."), 400
+
+        groups = dividir_grupos(players_details, group_size)
+        group_matches, standings = montar_grupos(torneio_id, categoria_nome, groups)
+
+        matches_collection.delete_many({"torneioId": torneio_id, "categoriaNome": categoria_nome, "fase": FASE_GRUPOS})
+        group_standings_collection.delete_many({"torneioId": torneio_id, "categoriaNome": categoria_nome})
+        matches_collection.insert_many(group_matches)
+        group_standings_collection.insert_many(standings)
+        response_cache.invalidate(f"matches:{torneio_id}:{categoria_nome}", f"standings:{torneio_id}:{categoria_nome}")
+        bump_bracket_version(bracket_versions_collection, torneio_id, categoria_nome)
+        publish_event(torneio_id, "draw", {
+            "categoria": categoria_nome, "fase": FASE_GRUPOS, "totalMatches": len(group_matches)
+        })
+
+        return jsonify(
+            message=f"Fase de grupos gerada com sucesso para a categoria '{categoria_nome}'.",
+            totalPlayers=len(players_details),
+            groups=[{"grupo": doc["grupo"], "jogadores": len(doc["jogadores"])} for doc in standings],
+            totalMatches=len(group_matches)
+        ), 201
+    except Exception as e:
+        print(f"Erro ao gerar grupos: {e}")
+        return jsonify(message=f"Erro ao gerar grupos: {e}", status="error"), 500
+
+@api.route('/tournaments/<string:torneio_id>/<string:categoria_nome>/standings', methods=['GET'])
+@response_cache.cached(lambda torneio_id, categoria_nome: [f"standings:{torneio_id}:{categoria_nome}"])
+def get_group_standings(torneio_id, categoria_nome):
+    try:
+        standings = [
+            ordenar_classificacao(doc)
+            for doc in group_standings_collection.find(
+                {"torneioId": torneio_id, "categoriaNome": categoria_nome}
+            ).sort("grupo", 1)
+        ]
+        return jsonify(standings), 200
+    except Exception as e:
+        print(f"Erro ao buscar classificação: {e}")
+        return jsonify(message=f"Erro ao buscar classificação: {e}", status="error"), 500
+
+@api.route('/tournaments/<string:torneio_id>/<string:categoria_nome>/matches', methods=['GET'])
+@response_cache.cached(lambda torneio_id, categoria_nome: [f"matches:{torneio_id}", f"matches:{torneio_id}:{categoria_nome}"])
 def get_matches_for_category(torneio_id, categoria_nome):
     try:
-        matches = []
-        for match in matches_collection.find({
+        matches = list(matches_collection.find({
             "torneioId": torneio_id,
             "categoriaNome": categoria_nome
-        }).sort([("rodada", 1), ("partidaNumero", 1)]):
-            match['_id'] = str(match['_id'])
-            matches.append(match)
+        }).sort([("rodadaNumero", 1), ("partidaNumero", 1)]))
         return jsonify(matches), 200
     except Exception as e:
         print(f"Erro ao buscar partidas: {e}")
         return jsonify(message=f"Erro ao buscar partidas: {e}", status="error"), 500
 
+@api.route('/tournaments/<string:torneio_id>/schedule', methods=['POST'])
+def schedule_tournament(torneio_id):
+    data = request.get_json(silent=True) or {}
+    try:
+        tournament = tournaments_collection.find_one({"_id": ObjectId(torneio_id), **ACTIVE_FILTER})
+    except Exception:
+        return jsonify(message="ID de torneio inválido."), 400
+    if not tournament:
+        return jsonify(message="Torneio não encontrado."), 404
+
+    try:
+        quadras, duracao, descanso = parse_agenda(data, tournament)
+        query = {"torneioId": torneio_id, "status": {"$ne": "Finalizada"}}
+        if data.get("categorias"):
+            query["categoriaNome"] = {"$in": list(data["categorias"])}
+
+        # Partidas com horário são mantidas, a menos que `reagendar` seja verdadeiro.
+        reagendar = bool(data.get("reagendar"))
+        partidas, mantidas = [], []
+        for match in matches_collection.find(query, AGENDA_PROJECTION):
+            (mantidas if match.get("dataHora") and not reagendar else partidas).append(match)
+
+        atribuicoes, sem_horario = agendar(partidas, quadras, duracao, descanso, mantidas)
+        salvar_agenda(matches_collection, atribuicoes, sem_horario)
+        response_cache.invalidate(f"matches:{torneio_id}")
+        bump_bracket_versions(bracket_versions_collection, torneio_id, [m["categoriaNome"] for m in partidas])
+        publish_event(torneio_id, "schedule", {
+            "categorias": sorted({m["categoriaNome"] for m in partidas}),
+            "scheduled": len(atribuicoes),
+            "unscheduled": len(sem_horario)
+        })
+
+        horarios = [inicio for inicio, _ in atribuicoes.values()]
+        return jsonify(
+            message=f"{len(atribuicoes)} partidas agendadas.",
+            scheduled=len(atribuicoes),
+            kept=len(mantidas),
+            unscheduledMatchIds=sem_horario,
+            firstStart=min(horarios).isoformat() if horarios else None,
+            lastEnd=(max(horarios) + duracao).isoformat() if horarios else None
+        ), 200
+    except AgendaError as e:
+        return jsonify(message=str(e)), 400
+    except Exception as e:
+        print(f"Erro ao agendar partidas: {e}")
+        return jsonify(message=f"Erro ao agendar partidas: {e}", status="error"), 500
+
+@api.route('/rankings', methods=['GET'])
+def get_rankings():
+    """Ranking de uma categoria (`?categoria=`, obrigatório), opcionalmente por
+    `genero`, já ordenado por pontos no índice; `limit` padrão 100."""
+    categoria = request.args.get('categoria')
+    if not categoria:
+        return jsonify(message="Parâmetro 'categoria' é obrigatório."), 400
+    query = {"categoria": categoria}
+    if request.args.get('genero'):
+        query["genero"] = request.args['genero']
+
+    try:
+        limit = parse_limit(request.args)
+        rankings = list(
+            rankings_collection.find(query, RANKING_LIST_PROJECTION)
+            .sort([("pontos", -1), ("jogadorId", 1)])
+            .limit(limit)
+        )
+        for posicao, ranking in enumerate(rankings, start=1):
+            ranking['posicao'] = posicao
+        return jsonify(rankings), 200
+    except QueryParamError as e:
+        return jsonify(message=str(e)), 400
+    except Exception as e:
+        print(f"Erro ao buscar ranking: {e}")
+        return jsonify(message=f"Erro ao buscar ranking: {e}", status="error"), 500
+
+@api.route('/jobs/<string:job_id>', methods=['GET'])
+def get_job(job_id):
+    """Andamento de um job em segundo plano: `status` (pendente, executando, concluido,
+    falhou), `tentativas` e `progresso` com os documentos removidos por coleção."""
+    try:
+        job = job_queue.status(job_id)
+        if not job:
+            return jsonify(message="Job não encontrado."), 404
+        return jsonify(job), 200
+    except Exception as e:
+        print(f"Erro ao buscar job: {e}")
+        return jsonify(message=f"Erro ao buscar job: {e}", status="error"), 500
+
+@api.route('/tournaments/<string:torneio_id>/events', methods=['GET'])
+def tournament_events(torneio_id):
+    """Stream SSE com as alterações de chaves, resultados e agenda do torneio.
+
+    Eventos: `draw` (chave ou grupos gerados), `match` (partidas alteradas, só os
+    campos de exibição) e `schedule` (agenda refeita). `Last-Event-ID` (ou
+    `?lastEventId=`) retoma de onde a conexão parou; `?timeout=` encurta a conexão.
+    Cada assinante ocupa uma thread/greenlet do worker durante a conexão: em produção,
+    use workers assíncronos (ex.: `gunicorn -k gevent`).
+    """
+    if not ObjectId.is_valid(torneio_id):
+        return jsonify(message="ID de torneio inválido."), 400
+    try:
+        max_seconds = min(float(request.args.get('timeout', sse_max_seconds)), sse_max_seconds)
+    except ValueError:
+        return jsonify(message="'timeout' deve ser um número de segundos."), 400
+    try:
+        if not tournaments_collection.find_one({"_id": ObjectId(torneio_id), **ACTIVE_FILTER}, {"_id": 1}):
+            return jsonify(message="Torneio não encontrado."), 404
+    except Exception as e:
+        print(f"Erro ao abrir eventos do torneio: {e}")
+        return jsonify(message=f"Erro ao abrir eventos do torneio: {e}", status="error"), 500
+
+    if change_stream_relay is not None:
+        change_stream_relay.ensure_started()
+    last_event_id = parse_last_event_id(request.headers.get('Last-Event-ID') or request.args.get('lastEventId'))
+    response = Response(
+        sse_stream(event_bus, torneio_id, last_event_id, sse_heartbeat, max_seconds),
+        mimetype='text/event-stream'
+    )
+    response.headers['Cache-Control'] = 'no-cache'
+    # Desliga o buffer do nginx para os eventos saírem na hora.
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+def render_bracket_file(torneio_id, categoria_nome, version, formato):
+    key = (torneio_id, categoria_nome, version, formato)
+    body = bracket_image_cache.get(key)
+    if body is not None:
+        return body
+    matches = list(matches_collection.find(
+        {"torneioId": torneio_id, "categoriaNome": categoria_nome, "fase": {"$ne": FASE_GRUPOS}},
+        BRACKET_PROJECTION
+    ))
+    if not matches:
+        return None
+    tournament = tournaments_collection.find_one({"_id": ObjectId(torneio_id)}, {"nome": 1}) or {}
+    title = f"{tournament.get('nome', 'Torneio')} - {categoria_nome}"
+    body = encode(render_bracket(title, matches), formato)
+    bracket_image_cache.set(key, body)
+    return body
+
+@api.route('/tournaments/<string:torneio_id>/<string:categoria_nome>/bracket.<any(png, pdf):formato>', methods=['GET'])
+def get_bracket_image(torneio_id, categoria_nome, formato):
+    if not ObjectId.is_valid(torneio_id):
+        return jsonify(message="ID de torneio inválido."), 400
+    try:
+        version = bracket_version(bracket_versions_collection, torneio_id, categoria_nome)
+        etag = hashlib.sha1(f"{torneio_id}:{categoria_nome}:{version}:{formato}".encode('utf-8')).hexdigest()
+        if etag in request.if_none_match:
+            response = make_response('', 304)
+            response.set_etag(etag)
+            return response
+
+        body = bracket_renders.do(
+            (torneio_id, categoria_nome, version, formato),
+            lambda: render_bracket_file(torneio_id, categoria_nome, version, formato)
+        )
+        if body is None:
+            return jsonify(message="Chave ainda não gerada para esta categoria."), 404
+
+        response = make_response(body)
+        response.mimetype = FORMATS[formato]
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        response.headers['Content-Disposition'] = f'inline; filename="chave.{formato}"'
+        return response
+    except Exception as e:
+        print(f"Erro ao gerar imagem da chave: {e}")
+        return jsonify(message=f"Erro ao gerar imagem da chave: {e}", status="error"), 500
+
+@api.route('/matches/<string:match_id>/result', methods=['PUT'])
+def report_match_result(match_id):
+    data = request.get_json()
+    if not data:
+        return jsonify(message="Dados inválidos ou ausentes"), 400
+    for field in ["placar", "vencedorId"]:
+        if not data.get(field):
+            return jsonify(message=f"Campo '{field}' é obrigatório."), 400
+
+    try:
+        obj_id = ObjectId(match_id)
+    except Exception:
+        return jsonify(message="ID de partida inválido."), 400
+
+    try:
+        match = matches_collection.find_one({"_id": obj_id})
+        if not match:
+            return jsonify(message="Partida não encontrada."), 404
+        if not match.get("jogador1") or not match.get("jogador2"):
+            return jsonify(message="A partida ainda não tem os dois jogadores definidos."), 400
+        if "BYE" in (match["jogador1"]["id"], match["jogador2"]["id"]):
+            return jsonify(message="Partidas com BYE são decididas automaticamente."), 400
+        if data["vencedorId"] not in (match["jogador1"]["id"], match["jogador2"]["id"]):
+            return jsonify(message="O vencedor deve ser um dos jogadores da partida."), 400
+
+        if match.get("fase") == FASE_GRUPOS:
+            registrar_resultado_grupo(matches_collection, group_standings_collection, match, data["vencedorId"], data["placar"])
+            changed_ids = [match_id]
+            response_cache.invalidate(f"standings:{match['torneioId']}:{match['categoriaNome']}")
+        else:
+            changed_ids = registrar_resultado(matches_collection, match, data["vencedorId"], data["placar"])
+            # Trocar o vencedor reabre as partidas seguintes e tira quem avançou das
+            # rodadas acima: aí a categoria inteira é recalculada.
+            corrigido = match.get("vencedorId") not in (None, data["vencedorId"])
+            atualizar_ranking(
+                db, ranking_points, match['torneioId'], match['categoriaNome'],
+                None if corrigido else {**match, "vencedorId": data["vencedorId"]}
+            )
+        response_cache.invalidate(f"matches:{match['torneioId']}:{match['categoriaNome']}")
+        bump_bracket_version(bracket_versions_collection, match['torneioId'], match['categoriaNome'])
+        if change_stream_relay is None:
+            changed = matches_collection.find(
+                {"_id": {"$in": [ObjectId(i) for i in changed_ids]}}, MATCH_EVENT_PROJECTION
+            )
+            event_bus.publish(match['torneioId'], "match", {"matches": list(changed)})
+
+        return jsonify(
+            message="Resultado registrado com sucesso!",
+            matchId=match_id,
+            updatedMatchIds=changed_ids
+        ), 200
+    except PlacarError as e:
+        return jsonify(message=str(e)), 400
+    except Exception as e:
+        print(f"Erro ao registrar resultado: {e}")
+        return jsonify(message=f"Erro ao registrar resultado: {e}", status="error"), 500
+
 if __name__ == '__main__':
-    app.run(debug=True, port=5000)
\ No newline at end of file
+    create_app().run(debug=True, port=5000)
\ No newline at end of file
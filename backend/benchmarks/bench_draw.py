@@ -0,0 +1,137 @@
+"""Benchmark da geração de chaves de eliminação simples.
+
+Uso (a partir de backend/):
+
+    python benchmarks/bench_draw.py [--repeticoes 20]
+    python benchmarks/bench_draw.py --memory [--scale 1k]
+    python benchmarks/bench_draw.py --uri mongodb://localhost:27017 --drop
+
+Sem banco, mede o tempo de montagem da chave completa (todas as rodadas) para 8 a
+1024 inscritos. Com `--memory` (mongomock) ou `--uri`, mede também a rota
+`POST /tournaments/<id>/<categoria>/generate_draw` inteira sobre o banco populado
+por `seed.py`: leitura das inscrições confirmadas e dos jogadores, `delete_many`,
+`insert_many` e as escritas de versão da chave e de ranking, com as idas ao MongoDB
+contadas pelo listener de comandos do `metrics.py`.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(1, os.path.dirname(os.path.abspath(__file__)))
+
+from draw import distribuir_chave, montar_chave  # noqa: E402
+
+TAMANHOS = [8, 16, 32, 64, 128, 256, 512, 1024]
+
+
+def medir(num_jogadores, repeticoes, rng):
+    jogadores = [{"id": f"{i:024x}", "nome": f"Jogador {i}"} for i in range(num_jogadores)]
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        confrontos, _, _ = distribuir_chave(jogadores, rng)
+        partidas = montar_chave("torneio", "Categoria", confrontos)
+        tempos.append(time.perf_counter() - inicio)
+    return partidas, tempos
+
+
+def p95(tempos):
+    tempos = sorted(tempos)
+    return tempos[min(len(tempos) - 1, int(len(tempos) * 0.95))]
+
+
+def categoria_confirmada(db, num_jogadores):
+    """Torneio com uma categoria de `num_jogadores` inscritos confirmados."""
+    categoria = f"Benchmark {num_jogadores}"
+    torneio_id = str(db.tournaments.insert_one({
+        "nome": f"Torneio Benchmark {num_jogadores}",
+        "local": "Santos",
+        "dataInicio": "2026-03-01",
+        "dataFim": "2026-03-03",
+        "dataLimiteInscricao": "2026-02-20",
+        "categorias": [{"nome": categoria, "valorInscricao": 100, "vagas": num_jogadores}],
+    }).inserted_id)
+    jogadores = db.players.insert_many([
+        {
+            "nomeCompleto": f"Atleta Chave {num_jogadores}.{i}",
+            "email": f"chave.{num_jogadores}.{i}@exemplo.com.br",
+            "dataNascimento": "1990-01-01",
+            "nivelHabilidade": "Intermediário",
+            "genero": "Feminino",
+        }
+        for i in range(num_jogadores)
+    ]).inserted_ids
+    db.registrations.insert_many([
+        {
+            "torneioId": torneio_id,
+            "jogadorId": str(jogador_id),
+            "categoriaInscrita": {"nome": categoria, "valorInscricao": 100},
+            "dataInscricao": datetime(2026, 1, 1),
+            "statusPagamento": "Confirmado",
+            "pixDetails": {},
+        }
+        for jogador_id in jogadores
+    ])
+    return torneio_id, categoria
+
+
+def medir_rota(args):
+    from bench_endpoints import load_app
+    from seed import SCALES, seed
+
+    app_module, flask_app = load_app(args)
+    if not args.memory and not args.drop and app_module.db.players.estimated_document_count():
+        raise SystemExit("O banco já tem dados; use --drop para apagá-los (nunca contra produção).")
+    seed(app_module.db, args.scale if args.scale in SCALES else int(args.scale))
+
+    idas = {}
+    original_observe = app_module.metrics.registry.observe_request
+
+    def observe_request(route, method, status, seconds, stats, size):
+        idas["comandos"] = len(stats.commands) if stats else 0
+        return original_observe(route, method, status, seconds, stats, size)
+    app_module.metrics.registry.observe_request = observe_request
+
+    client = flask_app.test_client()
+    print(f"\nRota generate_draw ({'mongomock' if args.memory else 'mongod'}, seed {args.scale})")
+    print(f"{'inscritos':>9} {'mediana ms':>11} {'p95 ms':>8} {'idas':>6}")
+    for n in TAMANHOS:
+        torneio_id, categoria = categoria_confirmada(app_module.db, n)
+        tempos, contagens = [], []
+        for _ in range(args.repeticoes):
+            inicio = time.perf_counter()
+            response = client.post(f"/tournaments/{torneio_id}/{categoria}/generate_draw")
+            tempos.append(time.perf_counter() - inicio)
+            if response.status_code != 201:
+                raise SystemExit(f"generate_draw respondeu {response.status_code}: {response.get_json()}")
+            contagens.append(idas.get("comandos", 0))
+        print(f"{n:>9} {statistics.median(tempos) * 1000:>11.2f} {p95(tempos) * 1000:>8.2f} {statistics.median(contagens):>6.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeticoes", type=int, default=20)
+    parser.add_argument("--memory", action="store_true", help="mede a rota com um MongoDB em memória (mongomock)")
+    parser.add_argument("--uri", help="mede a rota contra este MongoDB")
+    parser.add_argument("--scale", default="1k", help="dados de fundo gerados por seed.py")
+    parser.add_argument("--drop", action="store_true", help="apaga as coleções existentes antes de popular")
+    args = parser.parse_args()
+    rng = random.Random(42)
+
+    print(f"{'inscritos':>9} {'partidas':>9} {'mediana ms':>11} {'p95 ms':>8}")
+    for n in TAMANHOS:
+        partidas, tempos = medir(n, args.repeticoes, rng)
+        print(f"{n:>9} {len(partidas):>9} {statistics.median(tempos) * 1000:>11.2f} {p95(tempos) * 1000:>8.2f}")
+
+    if args.memory or args.uri:
+        args.uri = args.uri or "mongodb://localhost:27017"
+        medir_rota(args)
+
+
+if __name__ == "__main__":
+    main()
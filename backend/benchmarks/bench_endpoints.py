@@ -0,0 +1,370 @@
+"""Benchmark reprodutível das rotas da API.
+
+Uso (a partir de backend/):
+
+    python benchmarks/bench_endpoints.py --memory --scale 1k --output resultados.json
+    python benchmarks/bench_endpoints.py --uri mongodb://localhost:27017 --scale 100k
+    python benchmarks/bench_endpoints.py --memory --compare antes.json
+
+Popula o banco com `seed.py`, chama cada rota pelo test client do Flask e registra
+p50/p95/p99 de latência e idas ao MongoDB por requisição (via listener de comandos
+do `metrics.py`). Os resultados são gravados em JSON para comparar execuções.
+Rotas sem cenário definido aparecem em "semCenario". Cenários com alguma resposta
+fora de 2xx aparecem em "falhas" e fazem o script terminar com erro; com `--memory`,
+os que exigem um mongod real (REQUIRES_MONGOD) são pulados.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import threading
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+MONGOMOCK_COMMANDS = {
+    "find": "find", "find_one": "find", "insert_one": "insert", "insert_many": "insert",
+    "update_one": "update", "update_many": "update", "delete_one": "delete", "delete_many": "delete",
+    "find_one_and_update": "findAndModify", "find_one_and_delete": "findAndModify",
+    "aggregate": "aggregate", "bulk_write": "bulkWrite", "count_documents": "aggregate",
+    "create_indexes": "createIndexes", "distinct": "distinct",
+}
+
+
+def _instrument_mongomock(listener):
+    """O mongomock não emite eventos de comando: cada chamada de coleção vira um evento
+    para o listener do app, com a mesma contagem de idas que o PyMongo teria."""
+    import mongomock
+
+    # Métodos do mongomock chamam uns aos outros (find_one -> find): só a chamada
+    # mais externa conta como ida ao banco.
+    depth = threading.local()
+
+    for method, command in MONGOMOCK_COMMANDS.items():
+        original = getattr(mongomock.Collection, method)
+
+        def wrapper(self, *args, _original=original, _command=command, **kwargs):
+            outermost = not getattr(depth, "value", 0)
+            depth.value = getattr(depth, "value", 0) + 1
+            started = time.perf_counter()
+            try:
+                return _original(self, *args, **kwargs)
+            finally:
+                depth.value -= 1
+                if outermost:
+                    listener.succeeded(SimpleNamespace(
+                        command_name=_command,
+                        database_name=self.database.name,
+                        duration_micros=int((time.perf_counter() - started) * 1e6),
+                    ))
+        setattr(mongomock.Collection, method, wrapper)
+
+
+def load_app(args):
+    os.environ.setdefault("MONGO_URI", args.uri)
+    os.environ["MONGO_URI"] = args.uri
+    if args.memory:
+        import mongomock
+        import pymongo
+        pymongo.MongoClient = mongomock.MongoClient
+    import app as app_module
+    flask_app = app_module.create_app({"MONGO_URI": args.uri})
+    if args.memory:
+        _instrument_mongomock(app_module.metrics.listener)
+    return app_module, flask_app
+
+
+def build_context(db, rng):
+    from jobs import enqueue
+
+    tournament = db.tournaments.find_one({"categorias.0": {"$exists": True}})
+    match = db.matches.find_one({"status": "Agendada", "jogador1.id": {"$ne": "BYE"}, "jogador2.id": {"$ne": "BYE"}})
+    category = match["categoriaNome"] if match else tournament["categorias"][0]["nome"]
+    torneio_id = match["torneioId"] if match else str(tournament["_id"])
+    registration = db.registrations.find_one({"torneioId": torneio_id})
+    player = db.players.find_one({})
+    return SimpleNamespace(
+        db=db,
+        rng=rng,
+        torneio_id=torneio_id,
+        categoria=category,
+        player_id=str(player["_id"]),
+        player_email=player["email"],
+        player_prefix=" ".join(word[:3] for word in player["nomeCompleto"].split()[:2]),
+        registration_id=str(registration["_id"]),
+        bulk_registration_ids=[
+            str(r["_id"]) for r in db.registrations.find({"statusPagamento": {"$ne": "Cancelado"}}, {"_id": 1}).limit(50)
+        ],
+        match=match,
+        job_id=enqueue(db.jobs, "excluir_torneio", "0" * 24),
+    )
+
+
+def _new_player(ctx, i):
+    return {
+        "nomeCompleto": f"Atleta Benchmark {i}",
+        "email": f"benchmark.{i}.{ctx.rng.random()}@exemplo.com.br",
+        "dataNascimento": "1990-01-01",
+        "nivelHabilidade": "Intermediário",
+        "genero": "Feminino",
+    }
+
+
+def _tournament_body(i):
+    return {
+        "nome": f"Torneio Benchmark {i}",
+        "local": "Santos",
+        "dataInicio": "2026-03-01",
+        "dataFim": "2026-03-03",
+        "dataLimiteInscricao": "2026-02-20",
+        "categorias": [{"nome": "Misto Aberto", "valorInscricao": 150, "vagas": 100000}],
+    }
+
+
+def _scratch_player(ctx, i):
+    """Jogador criado direto no banco, fora da requisição medida."""
+    return str(ctx.db.players.insert_one(_new_player(ctx, i)).inserted_id)
+
+
+def _scratch_registration(ctx, i):
+    return str(ctx.db.registrations.insert_one({
+        "torneioId": ctx.torneio_id,
+        "jogadorId": _scratch_player(ctx, i),
+        "categoriaInscrita": {"nome": ctx.categoria, "valorInscricao": 100},
+        "statusPagamento": "Cancelado",
+        "pixDetails": {},
+    }).inserted_id)
+
+
+def _new_registration(ctx, i):
+    return {
+        "torneioId": ctx.scratch_tournament_id,
+        "jogadorId": _scratch_player(ctx, i),
+        "categoriaInscrita": {"nome": "Misto Aberto", "valorInscricao": 150},
+    }
+
+
+def _bulk_rows(ctx, i):
+    return [{"jogadorId": _scratch_player(ctx, f"{i}.{n}"), "categoria": "Misto Aberto"} for n in range(100)]
+
+
+def _match_result(ctx, i):
+    match = ctx.match
+    winner = match["jogador1"] if i % 2 == 0 else match["jogador2"]
+    return f"/matches/{match['_id']}/result", {"json": {"placar": "6-4", "vencedorId": winner["id"]}}
+
+
+# (nome, método, regra da rota, função que monta (url, kwargs) a partir do contexto)
+SCENARIOS = [
+    ("home", "GET", "/", lambda c, i: ("/", {})),
+    ("listar_jogadores", "GET", "/players", lambda c, i: ("/players", {})),
+    ("buscar_jogador_email", "GET", "/players", lambda c, i: (f"/players?email={c.player_email}", {})),
+    ("autocompletar_jogador", "GET", "/players/search",
+     lambda c, i: (f"/players/search?q={c.player_prefix[:2 + i % 6]}", {})),
+    ("criar_jogador", "POST", "/players", lambda c, i: ("/players", {"json": _new_player(c, i)})),
+    ("obter_jogador", "GET", "/players/<string:player_id>", lambda c, i: (f"/players/{c.player_id}", {})),
+    ("atualizar_jogador", "PUT", "/players/<string:player_id>",
+     lambda c, i: (f"/players/{c.player_id}", {"json": {"nivelHabilidade": f"Nível {i % 3}"}})),
+    ("inscricoes_jogador", "GET", "/players/<string:jogador_id>/registrations",
+     lambda c, i: (f"/players/{c.player_id}/registrations", {})),
+    ("listar_torneios", "GET", "/tournaments", lambda c, i: ("/tournaments", {})),
+    ("obter_torneio", "GET", "/tournaments/<string:tournament_id>", lambda c, i: (f"/tournaments/{c.torneio_id}", {})),
+    ("inscricoes_torneio", "GET", "/tournaments/<string:torneio_id>/registrations",
+     lambda c, i: (f"/tournaments/{c.torneio_id}/registrations", {})),
+    # $lookup com $convert: exige um mongod real (o mongomock não implementa `let`/`$convert`);
+    # pulado com --memory (ver REQUIRES_MONGOD).
+    ("inscricoes_torneio_expand", "GET", "/tournaments/<string:torneio_id>/registrations",
+     lambda c, i: (f"/tournaments/{c.torneio_id}/registrations?expand=player,tournament", {})),
+    ("exportar_inscricoes_ndjson", "GET", "/registrations",
+     lambda c, i: ("/registrations", {"headers": {"Accept": "application/x-ndjson"}})),
+    ("listar_inscricoes", "GET", "/registrations", lambda c, i: ("/registrations", {})),
+    ("obter_inscricao", "GET", "/registrations/<string:registration_id>",
+     lambda c, i: (f"/registrations/{c.registration_id}", {})),
+    ("resumo_torneio", "GET", "/tournaments/<string:torneio_id>/summary",
+     lambda c, i: (f"/tournaments/{c.torneio_id}/summary", {})),
+    ("gerar_pix", "POST", "/registrations/<string:registration_id>/generate_pix",
+     lambda c, i: (f"/registrations/{c.registration_id}/generate_pix", {})),
+    ("imagem_pix", "GET", "/registrations/<string:registration_id>/pix.png",
+     lambda c, i: (f"/registrations/{c.registration_id}/pix.png", {})),
+    ("status_pagamento", "PUT", "/registrations/<string:registration_id>/status",
+     lambda c, i: (f"/registrations/{c.registration_id}/status",
+                   {"json": {"statusPagamento": ["Confirmado", "Pendente"][i % 2]}})),
+    ("status_pagamento_lote_50", "PUT", "/registrations/status/bulk",
+     lambda c, i: ("/registrations/status/bulk", {"json": {"updates": [
+         {"id": reg_id, "statusPagamento": ["Confirmado", "Pendente"][i % 2]} for reg_id in c.bulk_registration_ids
+     ]}})),
+    ("partidas_categoria", "GET", "/tournaments/<string:torneio_id>/<string:categoria_nome>/matches",
+     lambda c, i: (f"/tournaments/{c.torneio_id}/{c.categoria}/matches", {})),
+    ("imagem_chave", "GET", "/tournaments/<string:torneio_id>/<string:categoria_nome>/bracket.<any(png, pdf):formato>",
+     lambda c, i: (f"/tournaments/{c.torneio_id}/{c.categoria}/bracket.{['png', 'pdf'][i % 2]}", {})),
+    # Antes de "gerar_chave", que refaz a chave e apaga `ctx.match`.
+    ("registrar_resultado", "PUT", "/matches/<string:match_id>/result", _match_result),
+    ("gerar_chave", "POST", "/tournaments/<string:torneio_id>/<string:categoria_nome>/generate_draw",
+     lambda c, i: (f"/tournaments/{c.torneio_id}/{c.categoria}/generate_draw", {})),
+    ("gerar_grupos", "POST", "/tournaments/<string:torneio_id>/<string:categoria_nome>/generate_groups",
+     lambda c, i: (f"/tournaments/{c.torneio_id}/{c.categoria}/generate_groups", {"json": {"tamanhoGrupo": 4}})),
+    ("classificacao_grupos", "GET", "/tournaments/<string:torneio_id>/<string:categoria_nome>/standings",
+     lambda c, i: (f"/tournaments/{c.torneio_id}/{c.categoria}/standings", {})),
+    # timeout=0: só o preâmbulo e os eventos pendentes, sem manter a conexão aberta.
+    ("eventos_torneio", "GET", "/tournaments/<string:torneio_id>/events",
+     lambda c, i: (f"/tournaments/{c.torneio_id}/events?timeout=0", {})),
+    ("agendar_partidas", "POST", "/tournaments/<string:torneio_id>/schedule",
+     lambda c, i: (f"/tournaments/{c.torneio_id}/schedule", {"json": {"quadras": 8, "reagendar": True}})),
+    ("criar_torneio", "POST", "/tournaments", lambda c, i: ("/tournaments", {"json": _tournament_body(i)})),
+    ("atualizar_torneio", "PUT", "/tournaments/<string:tournament_id>",
+     lambda c, i: (f"/tournaments/{c.scratch_tournament_id}", {"json": {"local": f"Quadra {i}"}})),
+    ("criar_inscricao", "POST", "/registrations", lambda c, i: ("/registrations", {"json": _new_registration(c, i)})),
+    ("atualizar_inscricao", "PUT", "/registrations/<string:registration_id>",
+     lambda c, i: (f"/registrations/{c.registration_id}", {"json": {"observacao": f"nota {i}"}})),
+    ("importar_inscricoes_100", "POST", "/tournaments/<string:torneio_id>/registrations/bulk",
+     lambda c, i: (f"/tournaments/{c.scratch_tournament_id}/registrations/bulk", {"json": _bulk_rows(c, i)})),
+    ("gerar_pix_torneio", "POST", "/tournaments/<string:torneio_id>/generate_pix",
+     lambda c, i: (f"/tournaments/{c.torneio_id}/generate_pix", {})),
+    ("excluir_inscricao", "DELETE", "/registrations/<string:registration_id>",
+     lambda c, i: (f"/registrations/{_scratch_registration(c, i)}", {})),
+    ("excluir_jogador", "DELETE", "/players/<string:player_id>",
+     lambda c, i: (f"/players/{_scratch_player(c, i)}", {})),
+    ("excluir_torneio", "DELETE", "/tournaments/<string:tournament_id>",
+     lambda c, i: (f"/tournaments/{c.db.tournaments.insert_one(_tournament_body(i)).inserted_id}", {})),
+    ("status_job", "GET", "/jobs/<string:job_id>", lambda c, i: (f"/jobs/{c.job_id}", {})),
+    ("ranking_categoria", "GET", "/rankings", lambda c, i: (f"/rankings?categoria={c.categoria}", {})),
+    ("metricas", "GET", "/metrics", lambda c, i: ("/metrics", {})),
+]
+
+
+# Cenários que o mongomock não consegue executar.
+REQUIRES_MONGOD = {"inscricoes_torneio_expand"}
+
+
+def failed_scenarios(routes):
+    """Cenários com alguma resposta fora de 2xx: medem um erro, não a rota."""
+    return sorted(name for name, r in routes.items() if any(not status.startswith("2") for status in r["status"]))
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+
+def run(app_module, flask_app, ctx, iterations, warmup, skip=()):
+    client = flask_app.test_client()
+    captured = {}
+    original_observe = app_module.metrics.registry.observe_request
+
+    def observe_request(route, method, status, seconds, stats, size):
+        captured["commands"] = len(stats.commands) if stats else 0
+        return original_observe(route, method, status, seconds, stats, size)
+    app_module.metrics.registry.observe_request = observe_request
+
+    results = {}
+    for name, method, _, build in SCENARIOS:
+        if name in skip:
+            continue
+        latencies, roundtrips, statuses = [], [], {}
+        for i in range(warmup + iterations):
+            url, kwargs = build(ctx, i)
+            started = time.perf_counter()
+            response = client.open(url, method=method, **kwargs)
+            response.get_data()
+            elapsed = time.perf_counter() - started
+            if i < warmup:
+                continue
+            latencies.append(elapsed * 1000)
+            roundtrips.append(captured.get("commands", 0))
+            statuses[str(response.status_code)] = statuses.get(str(response.status_code), 0) + 1
+        latencies.sort()
+        results[name] = {
+            "method": method,
+            "p50_ms": round(percentile(latencies, 0.50), 3),
+            "p95_ms": round(percentile(latencies, 0.95), 3),
+            "p99_ms": round(percentile(latencies, 0.99), 3),
+            "mongo_roundtrips": round(sum(roundtrips) / len(roundtrips), 2),
+            "status": statuses,
+        }
+    return results
+
+
+def uncovered_routes(app):
+    covered = {(rule, method) for _, method, rule, _ in SCENARIOS}
+    missing = []
+    for rule in app.url_map.iter_rules():
+        for method in sorted(rule.methods - {"HEAD", "OPTIONS"}):
+            if rule.endpoint != "static" and (rule.rule, method) not in covered:
+                missing.append(f"{method} {rule.rule}")
+    return sorted(missing)
+
+
+def compare(previous, current):
+    print(f"{'rota':<28} {'p50 antes':>10} {'p50 agora':>10} {'p95 antes':>10} {'p95 agora':>10} {'idas':>11}")
+    for name, now in current["routes"].items():
+        before = previous.get("routes", {}).get(name)
+        if not before:
+            print(f"{name:<28} {'-':>10} {now['p50_ms']:>10} {'-':>10} {now['p95_ms']:>10} {now['mongo_roundtrips']:>11}")
+            continue
+        trips = f"{before['mongo_roundtrips']}->{now['mongo_roundtrips']}"
+        print(f"{name:<28} {before['p50_ms']:>10} {now['p50_ms']:>10} {before['p95_ms']:>10} {now['p95_ms']:>10} {trips:>11}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark das rotas da API.")
+    parser.add_argument("--scale", default="1k")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--uri", default="mongodb://localhost:27017")
+    parser.add_argument("--memory", action="store_true", help="usa um MongoDB em memória (mongomock)")
+    parser.add_argument("--drop", action="store_true", help="apaga as coleções existentes antes de popular")
+    parser.add_argument("--output", help="arquivo JSON para gravar os resultados")
+    parser.add_argument("--compare", help="JSON de uma execução anterior para comparar")
+    args = parser.parse_args()
+
+    from seed import SCALES, seed
+
+    app_module, flask_app = load_app(args)
+    if not args.memory and not args.drop and app_module.db.players.estimated_document_count():
+        raise SystemExit("O banco já tem dados; use --drop para apagá-los (nunca contra produção).")
+    scale = args.scale if args.scale in SCALES else int(args.scale)
+    counts = seed(app_module.db, scale, args.seed)
+    ctx = build_context(app_module.db, random.Random(args.seed))
+    ctx.scratch_tournament_id = str(app_module.db.tournaments.insert_one(_tournament_body("base")).inserted_id)
+
+    report = {
+        "meta": {
+            "scale": args.scale,
+            "seed": args.seed,
+            "iterations": args.iterations,
+            "backend": "mongomock" if args.memory else "mongod",
+            "documents": counts,
+            "python": platform.python_version(),
+            "timestamp": datetime.utcnow().isoformat() + "Z",
+        },
+        "routes": run(app_module, flask_app, ctx, args.iterations, args.warmup,
+                      REQUIRES_MONGOD if args.memory else ()),
+        "semCenario": uncovered_routes(flask_app),
+    }
+    report["falhas"] = failed_scenarios(report["routes"])
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), report)
+    else:
+        for name, r in report["routes"].items():
+            mark = f"  FALHA {r['status']}" if name in report["falhas"] else ""
+            print(f"{name:<28} p50 {r['p50_ms']:>9}ms  p95 {r['p95_ms']:>9}ms  p99 {r['p99_ms']:>9}ms  idas {r['mongo_roundtrips']}{mark}")
+    if report["semCenario"]:
+        print("Rotas sem cenário: " + ", ".join(report["semCenario"]))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    if report["falhas"]:
+        raise SystemExit("Cenários com respostas fora de 2xx: " + ", ".join(report["falhas"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Benchmark dos assinantes ociosos do stream de eventos (SSE).
+
+Uso (a partir de backend/):
+
+    python benchmarks/bench_events.py [--assinantes 5000] [--heartbeat 15] [--ocioso 5]
+
+Cada assinante roda o mesmo gerador de `GET /tournaments/<id>/events` em uma thread
+própria (o equivalente a uma conexão em um worker com threads ou greenlets), espalhados
+por alguns torneios. Mede a memória por assinante, o uso de CPU com todos ociosos e o
+tempo para um evento publicado chegar a todos os assinantes do torneio.
+"""
+import argparse
+import os
+import resource
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from events import EventBus, sse_stream  # noqa: E402
+
+
+def rss_bytes():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def cpu_seconds():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+class Assinante(threading.Thread):
+    def __init__(self, bus, torneio, heartbeat, recebido):
+        super().__init__(daemon=True)
+        self.stream = sse_stream(bus, torneio, heartbeat=heartbeat, max_seconds=float("inf"))
+        self.recebido = recebido
+        self.pronto = threading.Event()
+
+    def run(self):
+        next(self.stream)
+        self.pronto.set()
+        for chunk in self.stream:
+            if chunk.startswith("id: "):
+                self.recebido(time.perf_counter())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de assinantes SSE ociosos.")
+    parser.add_argument("--assinantes", type=int, default=5000)
+    parser.add_argument("--torneios", type=int, default=10)
+    parser.add_argument("--heartbeat", type=float, default=15, help="segundos entre heartbeats")
+    parser.add_argument("--ocioso", type=float, default=5, help="segundos medindo CPU com todos ociosos")
+    parser.add_argument("--eventos", type=int, default=20, help="eventos publicados para medir a entrega")
+    parser.add_argument("--stack-kb", type=int, default=256, help="pilha de cada thread assinante")
+    args = parser.parse_args()
+
+    threading.stack_size(args.stack_kb * 1024)
+    bus = EventBus()
+    torneios = [f"torneio-{t}" for t in range(args.torneios)]
+    lock = threading.Lock()
+    entregas = {"n": 0, "ultima": 0.0}
+    todos = threading.Event()
+    por_torneio = args.assinantes // args.torneios
+
+    def recebido(agora):
+        with lock:
+            entregas["n"] += 1
+            entregas["ultima"] = max(entregas["ultima"], agora)
+            if entregas["n"] == por_torneio:
+                todos.set()
+
+    antes = rss_bytes()
+    inicio = time.perf_counter()
+    assinantes = []
+    for i in range(args.assinantes):
+        assinante = Assinante(bus, torneios[i % args.torneios], args.heartbeat, recebido)
+        assinante.start()
+        assinantes.append(assinante)
+    for assinante in assinantes:
+        assinante.pronto.wait()
+    conectar = time.perf_counter() - inicio
+    por_assinante = (rss_bytes() - antes) / args.assinantes
+
+    cpu = cpu_seconds()
+    time.sleep(args.ocioso)
+    cpu_ocioso = (cpu_seconds() - cpu) / args.ocioso * 100
+
+    latencias = []
+    for e in range(args.eventos):
+        with lock:
+            entregas.update(n=0, ultima=0.0)
+        todos.clear()
+        publicado = time.perf_counter()
+        bus.publish(torneios[0], "match", {"matches": [{"_id": f"{e:024x}", "placar": "6-4", "status": "Finalizada"}]})
+        todos.wait(30)
+        latencias.append((entregas["ultima"] - publicado) * 1000)
+
+    latencias.sort()
+    print(f"{args.assinantes} assinantes em {args.torneios} torneios (heartbeat {args.heartbeat:g}s)")
+    print(f"conexão de todos: {conectar * 1000:.0f}ms  memória: {por_assinante / 1024:.1f} KiB por assinante")
+    print(f"CPU ociosa: {cpu_ocioso:.2f}% de um núcleo")
+    print(f"entrega a {por_torneio} assinantes: mediana {statistics.median(latencias):.1f}ms  "
+          f"máx {latencias[-1]:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Benchmark do agendamento de partidas em quadras e horários.
+
+Uso (a partir de backend/):
+
+    python benchmarks/bench_schedule.py [--categorias 8] [--jogadores 256] [--quadras 40]
+
+Monta chaves de várias categorias em memória (parte dos jogadores inscrita em mais de
+uma), agenda todas as partidas em dois dias de torneio e confere as restrições: uma
+partida por quadra por vez, janelas de disponibilidade, ordem das rodadas e descanso
+mínimo entre partidas de um mesmo jogador, inclusive entre categorias.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agenda import agendar  # noqa: E402
+from draw import distribuir_chave, montar_chave  # noqa: E402
+
+
+def montar_partidas(num_categorias, jogadores_por_categoria, multi, rng):
+    # Uma fração `multi` dos inscritos de cada categoria vem de um grupo comum, de modo
+    # que cada jogador desse grupo joga, em média, duas categorias.
+    por_categoria = int(jogadores_por_categoria * multi)
+    comuns = [{"id": f"c{i:023x}", "nome": f"Comum {i}"} for i in range(max(por_categoria * num_categorias // 2, por_categoria))]
+    partidas = []
+    for c in range(num_categorias):
+        proprios = [{"id": f"{c:04x}{i:020x}", "nome": f"Jogador {c}-{i}"} for i in range(jogadores_por_categoria)]
+        inscritos = rng.sample(comuns, por_categoria) + proprios[:jogadores_por_categoria - por_categoria]
+        confrontos, _, _ = distribuir_chave(inscritos, rng)
+        partidas.extend(montar_chave("torneio", f"Categoria {c}", confrontos))
+    return [p for p in partidas if p["status"] != "Finalizada"]
+
+
+def quadras_do_torneio(num_quadras):
+    dias = [datetime(2026, 3, 7), datetime(2026, 3, 8)]
+    janelas = [(d.replace(hour=8), d.replace(hour=22)) for d in dias]
+    quadras = [(f"Quadra {q + 1}", janelas) for q in range(num_quadras)]
+    # Uma quadra só fica disponível à tarde.
+    quadras[-1] = (quadras[-1][0], [(d.replace(hour=14), d.replace(hour=22)) for d in dias])
+    return quadras
+
+
+def conferir(partidas, quadras, atribuicoes, duracao, descanso):
+    por_id = {str(p["_id"]): p for p in partidas}
+    janelas = dict(quadras)
+    por_quadra = {}
+    for pid, (inicio, quadra) in atribuicoes.items():
+        fim = inicio + duracao
+        assert any(a <= inicio and fim <= b for a, b in janelas[quadra]), f"{pid} fora da janela"
+        por_quadra.setdefault(quadra, []).append((inicio, fim))
+        seguinte = por_id[pid].get("proximaPartidaId")
+        if seguinte in atribuicoes:
+            assert atribuicoes[seguinte][0] >= fim + descanso, f"{seguinte} começa antes do descanso"
+    for intervalos in por_quadra.values():
+        intervalos.sort()
+        for (_, fim), (inicio, _) in zip(intervalos, intervalos[1:]):
+            assert inicio >= fim, "partidas sobrepostas na mesma quadra"
+
+    por_jogador = {}
+    for pid, (inicio, _) in atribuicoes.items():
+        partida = por_id[pid]
+        for slot in ("jogador1", "jogador2"):
+            jogador = partida.get(slot)
+            if jogador and jogador["id"] != "BYE":
+                por_jogador.setdefault(jogador["id"], []).append(inicio)
+    for inicios in por_jogador.values():
+        inicios.sort()
+        for anterior, proximo in zip(inicios, inicios[1:]):
+            assert proximo >= anterior + duracao + descanso, "jogador sem descanso mínimo"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do agendamento de partidas.")
+    parser.add_argument("--categorias", type=int, default=8)
+    parser.add_argument("--jogadores", type=int, default=256, help="inscritos por categoria")
+    parser.add_argument("--multi", type=float, default=0.2, help="fração de inscritos em duas categorias")
+    parser.add_argument("--quadras", type=int, default=40)
+    parser.add_argument("--duracao", type=int, default=25, help="minutos por partida")
+    parser.add_argument("--descanso", type=int, default=15, help="descanso mínimo em minutos")
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    partidas = montar_partidas(args.categorias, args.jogadores, args.multi, rng)
+    quadras = quadras_do_torneio(args.quadras)
+    duracao, descanso = timedelta(minutes=args.duracao), timedelta(minutes=args.descanso)
+
+    tempos = []
+    for _ in range(args.repeticoes):
+        inicio = time.perf_counter()
+        atribuicoes, sem_horario = agendar(partidas, quadras, duracao, descanso)
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    conferir(partidas, quadras, atribuicoes, duracao, descanso)
+
+    horarios = [h for h, _ in atribuicoes.values()]
+    print(f"{len(partidas)} partidas, {args.categorias} categorias, {args.quadras} quadras")
+    print(f"agendadas: {len(atribuicoes)}  sem horário: {len(sem_horario)}")
+    if horarios:
+        print(f"primeira: {min(horarios):%d/%m %H:%M}  última termina: {max(horarios) + duracao:%d/%m %H:%M}")
+    print(f"tempo: mediana {statistics.median(tempos):.1f}ms  máx {max(tempos):.1f}ms  (restrições conferidas)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Benchmark da serialização das respostas JSON.
+
+Uso (a partir de backend/):
+
+    python benchmarks/bench_serializer.py [--documentos 10000] [--repeticoes 20]
+
+Monta respostas de lista com `--documentos` jogadores e inscrições gerados por
+seed.py (ObjectId, datas e subdocumentos, como vêm do PyMongo) e compara o caminho
+antigo (cópia dos documentos com `_id` convertido à mão e `jsonify` do provider
+padrão do Flask) com o `MongoJSONProvider`, com orjson e com o módulo json.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bson.objectid import ObjectId  # noqa: E402
+from flask import Flask  # noqa: E402
+from flask.json.provider import DefaultJSONProvider  # noqa: E402
+
+import serializer  # noqa: E402
+from seed import generate_players, generate_registrations, generate_tournaments  # noqa: E402
+
+
+def documentos(quantidade):
+    rng = random.Random(42)
+    base_date = datetime(2026, 1, 1)
+    players = list(generate_players(rng, quantidade, base_date))
+    tournaments = list(generate_tournaments(rng, max(quantidade // 200, 1), base_date))
+    registrations = list(generate_registrations(rng, quantidade, tournaments, [p["_id"] for p in players]))
+    for reg in registrations:
+        reg["_id"] = ObjectId()
+    return {"jogadores": players, "inscricoes": registrations}
+
+
+def caminho_antigo(app, docs):
+    copias = [dict(doc) for doc in docs]
+    for doc in copias:
+        doc["_id"] = str(doc["_id"])
+    return app.json.response(copias).get_data()
+
+
+def caminho_novo(app, docs):
+    return app.json.response(docs).get_data()
+
+
+def medir(funcao, app, docs, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        corpo = funcao(app, docs)
+        tempos.append(time.perf_counter() - inicio)
+    return corpo, tempos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--documentos", type=int, default=10_000)
+    parser.add_argument("--repeticoes", type=int, default=20)
+    args = parser.parse_args()
+
+    antigo = Flask("antigo")
+    antigo.json = DefaultJSONProvider(antigo)
+    novo = Flask("novo")
+    novo.json = serializer.MongoJSONProvider(novo)
+    cenarios = [("jsonify padrão", caminho_antigo, antigo)]
+    if serializer.orjson is not None:
+        cenarios.append(("provider (orjson)", caminho_novo, novo))
+    else:
+        print("orjson não instalado: medindo só o fallback json.")
+    # O mesmo provider com o fallback da biblioteca padrão, como sem orjson instalado.
+    fallback = Flask("fallback")
+    fallback.json = serializer.MongoJSONProvider(fallback)
+    fallback.json.encode = serializer.json_dumps
+    cenarios.append(("provider (json)", caminho_novo, fallback))
+
+    print(f"{'resposta':<11} {'caminho':<18} {'mediana ms':>11} {'p95 ms':>8} {'docs/s':>10} {'MiB/s':>8}")
+    for nome, docs in documentos(args.documentos).items():
+        for cenario, funcao, app in cenarios:
+            with app.app_context():
+                corpo, tempos = medir(funcao, app, docs, args.repeticoes)
+            tempos.sort()
+            mediana = statistics.median(tempos)
+            p95 = tempos[min(len(tempos) - 1, int(len(tempos) * 0.95))]
+            print(
+                f"{nome:<11} {cenario:<18} {mediana * 1000:>11.2f} {p95 * 1000:>8.2f} "
+                f"{len(docs) / mediana:>10.0f} {len(corpo) / mediana / 2 ** 20:>8.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Tempo de inicialização da API: import do módulo, criação da app e primeira requisição.
+
+Cada amostra roda em um processo Python novo (import a frio), como um worker do
+gunicorn recém-criado. Nenhuma conexão com o MongoDB é feita: a rota medida é `/`
+e a criação de índices fica desligada (MONGO_ENSURE_INDEXES=0).
+
+Uso (a partir de backend/):
+
+    python benchmarks/bench_startup.py --runs 10
+    python benchmarks/bench_startup.py --runs 10 --compare HEAD~1   # compara com outra revisão
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ("PIL", "qrcode")
+
+# Executado no processo filho; imprime uma linha JSON com as medidas.
+CHILD = """
+import json, sys, time
+started = time.perf_counter()
+import app as app_module
+imported = time.perf_counter()
+flask_app = app_module.create_app() if hasattr(app_module, "create_app") else app_module.app
+created = time.perf_counter()
+response = flask_app.test_client().get("/")
+served = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "create_app_ms": (created - imported) * 1000,
+    "first_request_ms": (served - created) * 1000,
+    "total_ms": (served - started) * 1000,
+    "status": response.status_code,
+    "loaded": [m for m in %r if m in sys.modules],
+}))
+""" % (HEAVY_MODULES,)
+
+
+def sample(source_dir, runs):
+    env = dict(
+        os.environ,
+        # URI fictícia: impede que o .env seja usado e nada aqui chega a conectar.
+        MONGO_URI="mongodb://localhost:27017",
+        MONGO_ENSURE_INDEXES="0",
+        PYTHONDONTWRITEBYTECODE="1",
+    )
+    results = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", CHILD], cwd=source_dir, env=env,
+            capture_output=True, text=True, check=True, timeout=120,
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    summary = {
+        key: round(statistics.median(r[key] for r in results), 1)
+        for key in ("import_ms", "create_app_ms", "first_request_ms", "total_ms")
+    }
+    summary["loaded"] = results[-1]["loaded"]
+    return summary
+
+
+def checkout(revision, target):
+    """Extrai só os .py de backend/ em `revision` (sem o .env)."""
+    files = subprocess.run(
+        ["git", "ls-tree", "-r", "--name-only", revision],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+    ).stdout.split()
+    for path in files:
+        if not path.endswith(".py"):
+            continue
+        content = subprocess.run(
+            ["git", "show", f"{revision}:./{path}"],
+            cwd=BACKEND_DIR, capture_output=True, check=True,
+        ).stdout
+        destination = os.path.join(target, path)
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        with open(destination, "wb") as f:
+            f.write(content)
+
+
+def show(label, summary):
+    print(f"{label:<12} import {summary['import_ms']:>8}ms  create_app {summary['create_app_ms']:>7}ms  "
+          f"1a requisição {summary['first_request_ms']:>7}ms  total {summary['total_ms']:>8}ms  "
+          f"carregados: {', '.join(summary['loaded']) or 'nenhum'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mede o tempo de inicialização da API.")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--compare", help="revisão git para comparar (ex.: HEAD~1)")
+    args = parser.parse_args()
+
+    if args.compare:
+        with tempfile.TemporaryDirectory() as target:
+            checkout(args.compare, target)
+            show(args.compare, sample(target, args.runs))
+    show("atual", sample(BACKEND_DIR, args.runs))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+import io
+import os
+import unicodedata
+from functools import lru_cache
+
+from pymongo import ReturnDocument, UpdateOne
+
+from vagas import slot_key
+
+# Dimensões em pixels de cada partida desenhada e dos espaços entre elas.
+BOX_WIDTH = 220
+BOX_HEIGHT = 40
+SLOT_HEIGHT = 52
+COLUMN_GAP = 36
+MARGIN = 24
+HEADER_HEIGHT = 56
+FONT_SIZE = 13
+
+# Proporção de uma página A4 em retrato, usada para paginar o PDF.
+A4_RATIO = 297 / 210
+PDF_RESOLUTION = 150
+
+FORMATS = {"png": "image/png", "pdf": "application/pdf"}
+
+# Fontes TrueType procuradas nos diretórios do sistema; BRACKET_FONT aceita um caminho.
+FONT_CANDIDATES = [os.getenv("BRACKET_FONT"), "DejaVuSans.ttf", "LiberationSans-Regular.ttf", "Arial.ttf"]
+
+# Campos das partidas usados no desenho.
+BRACKET_PROJECTION = {
+    "rodada": 1, "rodadaNumero": 1, "rodadasTotal": 1, "partidaNumero": 1, "jogador1": 1, "jogador2": 1,
+    "vencedorId": 1, "placar": 1, "dataHora": 1, "quadra": 1,
+}
+
+
+# --- Versão da chave ---
+
+def bracket_version(versions_collection, torneio_id, categoria_nome):
+    doc = versions_collection.find_one({"_id": slot_key(torneio_id, categoria_nome)}, {"versao": 1})
+    return doc["versao"] if doc else 0
+
+
+def bump_bracket_version(versions_collection, torneio_id, categoria_nome):
+    """Chamado a cada escrita em partidas da categoria; a imagem é refeita na versão seguinte."""
+    doc = versions_collection.find_one_and_update(
+        {"_id": slot_key(torneio_id, categoria_nome)},
+        {"$inc": {"versao": 1}, "$setOnInsert": {"torneioId": torneio_id, "categoriaNome": categoria_nome}},
+        projection={"versao": 1},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    return doc["versao"]
+
+
+def bump_bracket_versions(versions_collection, torneio_id, categorias):
+    """Várias categorias do mesmo torneio em um único `bulk_write` (ex.: agendamento)."""
+    categorias = sorted(set(categorias))
+    if not categorias:
+        return
+    versions_collection.bulk_write([
+        UpdateOne(
+            {"_id": slot_key(torneio_id, categoria_nome)},
+            {"$inc": {"versao": 1}, "$setOnInsert": {"torneioId": torneio_id, "categoriaNome": categoria_nome}},
+            upsert=True,
+        )
+        for categoria_nome in categorias
+    ], ordered=False)
+
+
+# --- Desenho ---
+
+@lru_cache(maxsize=8)
+def _font(size):
+    """Devolve `(fonte, acentos)`. A fonte embutida do Pillow não tem os acentos do
+    português, então, sem uma TrueType do sistema, os nomes são desenhados sem acento."""
+    from PIL import ImageFont
+
+    for candidate in FONT_CANDIDATES:
+        if not candidate:
+            continue
+        try:
+            return ImageFont.truetype(candidate, size), True
+        except OSError:
+            continue
+    try:
+        return ImageFont.load_default(size=size), False
+    except TypeError:
+        # Pillow < 10.1: só a fonte bitmap, sem tamanho configurável.
+        return ImageFont.load_default(), False
+
+
+def _sem_acentos(texto):
+    return unicodedata.normalize("NFKD", texto).encode("ascii", "ignore").decode("ascii")
+
+
+def _nome(jogador):
+    if not jogador:
+        return "A definir"
+    return jogador.get("nome") or jogador.get("id") or "A definir"
+
+
+def _encaixar(draw, texto, fonte, largura):
+    if draw.textlength(texto, font=fonte) <= largura:
+        return texto
+    while texto and draw.textlength(texto + "…", font=fonte) > largura:
+        texto = texto[:-1]
+    return texto + "…"
+
+
+def render_bracket(titulo, partidas):
+    """Desenha a chave de eliminação (uma coluna por rodada) e devolve a imagem PIL.
+
+    A partida `i` da rodada `r` fica centralizada sobre as duas partidas que a
+    alimentam, como na chave impressa; o vencedor aparece em preto e o perdedor em cinza.
+    """
+    from PIL import Image, ImageDraw
+
+    rodadas = {}
+    for partida in partidas:
+        rodadas.setdefault(partida["rodadaNumero"], []).append(partida)
+    for lista in rodadas.values():
+        lista.sort(key=lambda p: p["partidaNumero"])
+    numeros = sorted(rodadas)
+    primeira = len(rodadas[numeros[0]]) if numeros else 1
+
+    largura = MARGIN * 2 + max(len(numeros), 1) * (BOX_WIDTH + COLUMN_GAP) - COLUMN_GAP
+    altura = MARGIN * 2 + HEADER_HEIGHT + primeira * SLOT_HEIGHT
+    imagem = Image.new("L", (largura, altura), 255)
+    draw = ImageDraw.Draw(imagem)
+    fonte, acentos = _font(FONT_SIZE)
+    fonte_titulo, _ = _font(FONT_SIZE + 7)
+    texto_de = (lambda t: t) if acentos else _sem_acentos
+
+    draw.text((MARGIN, MARGIN), texto_de(titulo), fill=0, font=fonte_titulo)
+    for coluna, numero in enumerate(numeros):
+        x = MARGIN + coluna * (BOX_WIDTH + COLUMN_GAP)
+        lista = rodadas[numero]
+        draw.text((x, MARGIN + HEADER_HEIGHT - FONT_SIZE - 10), texto_de(lista[0].get("rodada", "")), fill=80, font=fonte)
+        # Cada partida ocupa o espaço das partidas da primeira rodada que levam a ela.
+        espaco = primeira * SLOT_HEIGHT / len(lista)
+        for indice, partida in enumerate(lista):
+            centro = MARGIN + HEADER_HEIGHT + espaco * (indice + 0.5)
+            topo = centro - BOX_HEIGHT / 2
+            draw.rectangle([x, topo, x + BOX_WIDTH, topo + BOX_HEIGHT], outline=0, fill=255)
+            draw.line([x, centro, x + BOX_WIDTH, centro], fill=190)
+
+            vencedor = partida.get("vencedorId")
+            placar = texto_de(partida.get("placar") or "")
+            largura_placar = draw.textlength(placar, font=fonte) if placar else 0
+            for linha, slot in enumerate(("jogador1", "jogador2")):
+                jogador = partida.get(slot)
+                perdeu = vencedor and jogador and jogador.get("id") != vencedor
+                y = topo + 3 + linha * (BOX_HEIGHT / 2)
+                texto = _encaixar(draw, texto_de(_nome(jogador)), fonte, BOX_WIDTH - 12 - largura_placar)
+                draw.text((x + 6, y), texto, fill=150 if perdeu else 0, font=fonte)
+                # O placar fica na linha do vencedor.
+                if placar and jogador and jogador.get("id") == vencedor:
+                    draw.text((x + BOX_WIDTH - 6 - largura_placar, y), placar, fill=60, font=fonte)
+
+            if coluna + 1 < len(numeros):
+                meio = x + BOX_WIDTH + COLUMN_GAP / 2
+                destino = centro + (espaco / 2 if indice % 2 == 0 else -espaco / 2)
+                draw.line([x + BOX_WIDTH, centro, meio, centro], fill=0)
+                draw.line([meio, centro, meio, destino], fill=0)
+                draw.line([meio, destino, meio + COLUMN_GAP / 2, destino], fill=0)
+    return imagem
+
+
+def encode(imagem, formato):
+    """PNG, ou PDF com uma página A4 (retrato) a cada trecho da chave."""
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    if formato == "png":
+        imagem.save(buffer, format="PNG", optimize=True)
+        return buffer.getvalue()
+
+    largura, altura = imagem.size
+    altura_pagina = int(largura * A4_RATIO)
+    paginas = []
+    for topo in range(0, altura, altura_pagina):
+        # Todas as páginas com o mesmo tamanho, para a impressão usar a mesma escala.
+        pagina = Image.new("L", (largura, altura_pagina), 255)
+        pagina.paste(imagem.crop((0, topo, largura, min(topo + altura_pagina, altura))), (0, 0))
+        paginas.append(pagina)
+    paginas[0].save(buffer, format="PDF", save_all=True, append_images=paginas[1:], resolution=PDF_RESOLUTION)
+    return buffer.getvalue()
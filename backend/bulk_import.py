@@ -0,0 +1,178 @@
+import csv
+import io
+from datetime import datetime
+
+from bson.objectid import ObjectId
+from pymongo.errors import BulkWriteError
+
+from exclusao import ACTIVE_FILTER
+from vagas import occupies, release_many, reserve_up_to
+
+VALID_STATUSES = ['Pendente', 'Confirmado', 'Cancelado']
+
+MAX_ROWS = 10000
+
+
+class ImportFormatError(ValueError):
+    """Corpo da importação ilegível; a mensagem é devolvida ao cliente com status 400."""
+
+
+def parse_rows(request):
+    """Linhas da importação: array JSON, CSV no corpo (`text/csv`) ou arquivo CSV
+    enviado no campo `file` de um formulário."""
+    if request.mimetype == 'application/json':
+        rows = request.get_json(silent=True)
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            raise ImportFormatError("O corpo JSON deve ser uma lista de objetos.")
+        return rows
+
+    if 'file' in request.files:
+        raw = request.files['file'].read()
+    else:
+        raw = request.get_data()
+    try:
+        text = raw.decode('utf-8-sig')
+    except UnicodeDecodeError:
+        raise ImportFormatError("O arquivo CSV deve estar em UTF-8.")
+    if not text.strip():
+        return []
+    dialect = csv.excel
+    try:
+        dialect = csv.Sniffer().sniff(text[:4096], delimiters=',;\t')
+    except csv.Error:
+        pass
+    return [
+        {k.strip(): (v.strip() if isinstance(v, str) else v) for k, v in row.items() if k}
+        for row in csv.DictReader(io.StringIO(text), dialect=dialect)
+    ]
+
+
+def _load_players(players_collection, rows):
+    """Jogadores referenciados pelas linhas (por `jogadorId` ou `email`), em uma consulta."""
+    ids = {row["jogadorId"] for row in rows if ObjectId.is_valid(row.get("jogadorId") or "")}
+    emails = {row["email"] for row in rows if not row.get("jogadorId") and row.get("email")}
+    clauses = []
+    if ids:
+        clauses.append({"_id": {"$in": [ObjectId(i) for i in ids]}})
+    if emails:
+        clauses.append({"email": {"$in": list(emails)}})
+    if not clauses:
+        return {}, {}
+
+    by_id, by_email = {}, {}
+    for player in players_collection.find({"$or": clauses, **ACTIVE_FILTER}, {"email": 1}):
+        by_id[str(player["_id"])] = player
+        by_email[player.get("email")] = player
+    return by_id, by_email
+
+
+def _reserve_slots(slots_collection, torneio_id, categories, to_insert, row_of_doc, report):
+    """Reserva as vagas das inscrições válidas, uma operação por categoria. Linhas que
+    excedem as vagas restantes viram erro no relatório e saem da inserção."""
+    wanted = {}
+    for doc in to_insert:
+        if occupies(doc["statusPagamento"]):
+            nome = doc["categoriaInscrita"]["nome"]
+            wanted[nome] = wanted.get(nome, 0) + 1
+    granted = {
+        nome: reserve_up_to(slots_collection, torneio_id, nome, categories[nome]["vagas"], quantidade)
+        for nome, quantidade in wanted.items()
+    }
+
+    kept_docs, kept_rows = [], []
+    for doc, index in zip(to_insert, row_of_doc):
+        nome = doc["categoriaInscrita"]["nome"]
+        if occupies(doc["statusPagamento"]):
+            if granted[nome] == 0:
+                report[index] = {"row": index + 1, "status": "erro", "message": "Não há vagas disponíveis nesta categoria."}
+                continue
+            granted[nome] -= 1
+        kept_docs.append(doc)
+        kept_rows.append(index)
+    return kept_docs, kept_rows
+
+
+def import_registrations(tournament, rows, players_collection, registrations_collection, slots_collection):
+    """Valida e insere as inscrições de `rows` no torneio.
+
+    Jogadores e inscrições existentes são carregados com uma consulta cada, as vagas
+    são reservadas por categoria e as inscrições válidas são gravadas com um único
+    `insert_many(ordered=False)`. Devolve o relatório por linha (numeradas a partir de 1)."""
+    torneio_id = str(tournament["_id"])
+    categories = {cat["nome"]: cat for cat in tournament.get("categorias", [])}
+    players_by_id, players_by_email = _load_players(players_collection, rows)
+
+    existing = set()
+    if players_by_id:
+        for reg in registrations_collection.find(
+            {"torneioId": torneio_id, "jogadorId": {"$in": list(players_by_id)}},
+            {"jogadorId": 1, "categoriaInscrita.nome": 1, "_id": 0}
+        ):
+            existing.add((reg["jogadorId"], reg["categoriaInscrita"]["nome"]))
+
+    report = [None] * len(rows)
+    to_insert = []
+    row_of_doc = []
+    now = datetime.utcnow()
+    for index, row in enumerate(rows):
+        categoria_nome = row.get("categoria") or row.get("categoriaNome")
+        status = row.get("statusPagamento") or 'Pendente'
+        if row.get("jogadorId"):
+            player = players_by_id.get(row["jogadorId"])
+        else:
+            player = players_by_email.get(row.get("email"))
+
+        error = None
+        if not row.get("jogadorId") and not row.get("email"):
+            error = "Campo 'jogadorId' ou 'email' é obrigatório."
+        elif not categoria_nome:
+            error = "Campo 'categoria' é obrigatório."
+        elif categoria_nome not in categories:
+            error = f"Categoria '{categoria_nome}' não encontrada no torneio."
+        elif status not in VALID_STATUSES:
+            error = "Status de pagamento inválido."
+        elif not player:
+            error = "Jogador não encontrado."
+        elif (str(player["_id"]), categoria_nome) in existing:
+            error = "Este atleta já está inscrito nesta categoria do torneio."
+        if error:
+            report[index] = {"row": index + 1, "status": "erro", "message": error}
+            continue
+
+        jogador_id = str(player["_id"])
+        # Também barra linhas repetidas dentro do próprio arquivo.
+        existing.add((jogador_id, categoria_nome))
+        category = categories[categoria_nome]
+        to_insert.append({
+            "torneioId": torneio_id,
+            "jogadorId": jogador_id,
+            "categoriaInscrita": {"nome": category["nome"], "valorInscricao": category["valorInscricao"]},
+            "dataInscricao": now,
+            "statusPagamento": status,
+            "pixDetails": {},
+        })
+        row_of_doc.append(index)
+
+    to_insert, row_of_doc = _reserve_slots(slots_collection, torneio_id, categories, to_insert, row_of_doc, report)
+
+    failed_docs = {}
+    if to_insert:
+        try:
+            registrations_collection.insert_many(to_insert, ordered=False)
+        except BulkWriteError as e:
+            for write_error in e.details.get("writeErrors", []):
+                failed_docs[write_error["index"]] = write_error.get("errmsg", "Erro ao inserir inscrição.")
+            unused = {}
+            for doc_index in failed_docs:
+                doc = to_insert[doc_index]
+                if occupies(doc["statusPagamento"]):
+                    key = (torneio_id, doc["categoriaInscrita"]["nome"])
+                    unused[key] = unused.get(key, 0) + 1
+            release_many(slots_collection, unused)
+
+    for doc_index, (index, doc) in enumerate(zip(row_of_doc, to_insert)):
+        if doc_index in failed_docs:
+            report[index] = {"row": index + 1, "status": "erro", "message": failed_docs[doc_index]}
+        else:
+            report[index] = {"row": index + 1, "status": "ok", "registrationId": str(doc["_id"])}
+    return report
@@ -0,0 +1,81 @@
+import re
+import unicodedata
+
+from pymongo import UpdateOne
+
+SEARCH_LIMIT = 10
+MAX_SEARCH_LIMIT = 50
+
+# Campos devolvidos pela busca de jogadores (autocompletar).
+SEARCH_PROJECTION = {"nomeCompleto": 1, "email": 1, "nivelHabilidade": 1, "genero": 1}
+
+_NAO_ALFANUMERICO = re.compile(r"[^a-z0-9]+")
+
+
+def normalizar(texto):
+    """Minúsculas, sem acentos e com tudo que não é letra ou dígito virando espaço."""
+    texto = unicodedata.normalize("NFKD", texto or "")
+    texto = "".join(c for c in texto if not unicodedata.combining(c)).casefold()
+    return _NAO_ALFANUMERICO.sub(" ", texto).strip()
+
+
+def tokens(texto):
+    return normalizar(texto).split()
+
+
+def search_tokens(player):
+    """Chave de busca gravada em `buscaTokens`: as palavras normalizadas do nome e da
+    parte local do email (antes do `@`; o domínio é comum a muitos jogadores e faria
+    `exemplo` ou `com` casarem com quase todos). Um índice multikey sobre ela atende
+    às buscas por prefixo de qualquer palavra."""
+    local = (player.get("email") or "").partition("@")[0]
+    return list(dict.fromkeys(tokens(player.get("nomeCompleto")) + tokens(local)))
+
+
+def search_fields(player):
+    """Campos internos de busca do jogador: `buscaTokens` e `nomeBusca` (o nome
+    normalizado, usado para ordenar os resultados no servidor)."""
+    return {"buscaTokens": search_tokens(player), "nomeBusca": normalizar(player.get("nomeCompleto"))}
+
+
+def search_query(q):
+    """Filtro em que cada palavra digitada é prefixo de alguma palavra do jogador
+    (`"joão si"` encontra "João da Silva"). As expressões são ancoradas, então o índice
+    percorre só o intervalo de cada prefixo. Devolve None se `q` não tem letras nem dígitos."""
+    palavras = tokens(q)
+    if not palavras:
+        return None
+    return {"$and": [{"buscaTokens": {"$regex": "^" + re.escape(p)}} for p in dict.fromkeys(palavras)]}
+
+
+def buscar_jogadores(players_collection, query, q, limit, projection):
+    """Executa a busca já ordenada e limitada no servidor: primeiro quem tem o nome
+    começando pelo texto digitado, depois os demais, cada grupo em ordem alfabética de
+    `nomeBusca`. A segunda consulta só é feita se a primeira não preencher `limit`."""
+    prefixo = {"$regex": "^" + re.escape(normalizar(q))}
+    players = list(
+        players_collection.find({**query, "nomeBusca": prefixo}, projection).sort("nomeBusca", 1).limit(limit)
+    )
+    if len(players) < limit:
+        players += players_collection.find(
+            {**query, "nomeBusca": {"$not": prefixo}}, projection
+        ).sort("nomeBusca", 1).limit(limit - len(players))
+    return players
+
+
+def backfill_search_tokens(players_collection, batch_size=1000):
+    """Recalcula os campos de busca (`buscaTokens` e `nomeBusca`) de todos os jogadores
+    em lotes de `bulk_write`."""
+    operacoes = []
+    total = 0
+    for player in players_collection.find({}, {"nomeCompleto": 1, "email": 1, "buscaTokens": 1, "nomeBusca": 1}):
+        campos = search_fields(player)
+        if all(player.get(campo) == valor for campo, valor in campos.items()):
+            continue
+        operacoes.append(UpdateOne({"_id": player["_id"]}, {"$set": campos}))
+        if len(operacoes) >= batch_size:
+            total += players_collection.bulk_write(operacoes, ordered=False).modified_count
+            operacoes = []
+    if operacoes:
+        total += players_collection.bulk_write(operacoes, ordered=False).modified_count
+    return total
@@ -0,0 +1,215 @@
+import hashlib
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import make_response, request
+
+
+class TTLCache:
+    """Cache LRU em memória com expiração por entrada, seguro entre threads."""
+
+    def __init__(self, ttl_seconds, maxsize=1024):
+        self.ttl_seconds = ttl_seconds
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl_seconds=None):
+        with self._lock:
+            ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+            self._items[key] = (time.monotonic() + ttl, value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._items.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+# --- Backends compartilhados entre processos ---
+
+class FakeSharedBackend:
+    """Substituto local do backend compartilhado (mesma interface do RedisBackend)."""
+
+    def __init__(self):
+        self._cache = TTLCache(ttl_seconds=60, maxsize=100000)
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        return self._cache.get(key)
+
+    def set(self, key, value, ttl_seconds):
+        self._cache.set(key, value, ttl_seconds)
+
+    def get_counters(self, names):
+        with self._lock:
+            return [self._counters.get(name, 0) for name in names]
+
+    def incr(self, name):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + 1
+
+
+class RedisBackend:
+    def __init__(self, url, prefix="torneiobt:"):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        return pickle.loads(raw) if raw is not None else None
+
+    def set(self, key, value, ttl_seconds):
+        self.client.set(self.prefix + key, pickle.dumps(value), ex=ttl_seconds)
+
+    def get_counters(self, names):
+        if not names:
+            return []
+        return [int(v or 0) for v in self.client.mget([self.prefix + "tag:" + n for n in names])]
+
+    def incr(self, name):
+        self.client.incr(self.prefix + "tag:" + name)
+
+
+def shared_backend_from_env():
+    url = os.getenv("RESPONSE_CACHE_URL")
+    if not url:
+        return None
+    if url == "fake://":
+        return FakeSharedBackend()
+    return RedisBackend(url)
+
+
+class SingleFlight:
+    """Chamadas simultâneas com a mesma chave compartilham uma única execução: a
+    primeira executa `fn`, as demais esperam e recebem o mesmo resultado (ou erro)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = {"done": threading.Event(), "result": None, "error": None}
+        if not leader:
+            call["done"].wait()
+            if call["error"] is not None:
+                raise call["error"]
+            return call["result"]
+
+        try:
+            call["result"] = fn()
+            return call["result"]
+        except Exception as e:
+            call["error"] = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call["done"].set()
+
+
+class ResponseCache:
+    """Cache de respostas GET com invalidação por tags.
+
+    Cada rota declara as tags de que depende (ex.: `tournament:<id>`); as escritas
+    invalidam só as tags afetadas. A invalidação incrementa a versão da tag, e a versão
+    faz parte da chave, então entradas antigas simplesmente deixam de ser lidas. Com um
+    backend compartilhado, as versões das tags vivem nele e valem para todos os workers.
+    """
+
+    def __init__(self, ttl_seconds=60, maxsize=2048, shared=None):
+        self.ttl_seconds = ttl_seconds
+        self.local = TTLCache(ttl_seconds, maxsize)
+        self.shared = shared
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def _tag_versions(self, tags):
+        if self.shared is not None:
+            return self.shared.get_counters(tags)
+        with self._lock:
+            return [self._versions.get(tag, 0) for tag in tags]
+
+    def invalidate(self, *tags):
+        for tag in tags:
+            if self.shared is not None:
+                self.shared.incr(tag)
+            else:
+                with self._lock:
+                    self._versions[tag] = self._versions.get(tag, 0) + 1
+
+    def _key(self, tags):
+        versions = self._tag_versions(tags)
+        args = "&".join(f"{k}={v}" for k, v in sorted(request.args.items(multi=True)))
+        accept = request.accept_mimetypes.best_match(['application/json', 'application/x-ndjson']) or ''
+        raw = f"{request.path}?{args}|{accept}|" + ",".join(f"{t}:{v}" for t, v in zip(tags, versions))
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+    def _lookup(self, key):
+        entry = self.local.get(key)
+        if entry is None and self.shared is not None:
+            entry = self.shared.get(key)
+            if entry is not None:
+                self.local.set(key, entry)
+        return entry
+
+    def _store(self, key, entry):
+        self.local.set(key, entry)
+        if self.shared is not None:
+            self.shared.set(key, entry, self.ttl_seconds)
+
+    def cached(self, tags):
+        """Decorador para rotas GET. `tags` recebe os argumentos da rota e devolve a
+        lista de tags. Respostas 200 são guardadas com ETag forte; `If-None-Match`
+        igual ao ETag devolve 304 sem corpo."""
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                key = self._key(tags(**kwargs))
+                entry = self._lookup(key)
+                if entry is None:
+                    response = make_response(view(*args, **kwargs))
+                    if response.status_code != 200 or response.is_streamed:
+                        return response
+                    body = response.get_data()
+                    headers = [(k, v) for k, v in response.headers.items() if k.lower() != 'content-length']
+                    entry = (body, headers, hashlib.sha1(body).hexdigest())
+                    self._store(key, entry)
+
+                body, headers, etag = entry
+                if etag in request.if_none_match:
+                    response = make_response('', 304)
+                else:
+                    response = make_response(body, 200, headers)
+                response.set_etag(etag)
+                return response
+            return wrapper
+        return decorator
@@ -0,0 +1,171 @@
+import math
+import random
+
+from bson.objectid import ObjectId
+from pymongo import UpdateOne
+
+BYE = {"id": "BYE", "nome": "BYE"}
+
+NOMES_RODADAS_FINAIS = ["Final", "Semifinal", "Quartas de Final", "Oitavas de Final"]
+
+# Status da partida seguinte calculado no próprio update, a partir dos dois slots já
+# gravados: resultados simultâneos das duas partidas irmãs não deixam a seguinte
+# presa em "Aguardando" com os dois jogadores definidos.
+STATUS_PELOS_JOGADORES = {"$cond": [
+    {"$and": [{"$ifNull": ["$jogador1", False]}, {"$ifNull": ["$jogador2", False]}]},
+    "Agendada",
+    "Aguardando",
+]}
+
+
+def nome_rodada(rodada_numero, rodadas_total):
+    """Rótulo exibido para a rodada, contado a partir da final."""
+    distancia_final = rodadas_total - rodada_numero
+    if distancia_final < len(NOMES_RODADAS_FINAIS):
+        return NOMES_RODADAS_FINAIS[distancia_final]
+    participantes = 2 ** (distancia_final + 1)
+    if rodada_numero == 1:
+        return f"Primeira Rodada ({participantes} Participantes)"
+    return f"Rodada {rodada_numero} ({participantes} Participantes)"
+
+
+def distribuir_chave(jogadores, rng=random):
+    """Embaralha os jogadores e completa a chave com BYEs.
+
+    Cada BYE enfrenta um jogador real, então nenhuma partida BYE x BYE é gerada
+    e a segunda rodada recebe apenas jogadores reais.
+    """
+    jogadores = list(jogadores)
+    rng.shuffle(jogadores)
+
+    tamanho_chave = 2 ** math.ceil(math.log2(len(jogadores)))
+    num_byes = tamanho_chave - len(jogadores)
+
+    confrontos = []
+    for jogador in jogadores[:num_byes]:
+        confrontos.append((jogador, BYE) if rng.random() < 0.5 else (BYE, jogador))
+    restantes = jogadores[num_byes:]
+    for i in range(0, len(restantes), 2):
+        confrontos.append((restantes[i], restantes[i + 1]))
+
+    rng.shuffle(confrontos)
+    return confrontos, tamanho_chave, num_byes
+
+
+def montar_chave(torneio_id, categoria_nome, confrontos):
+    """Monta todas as partidas da chave de eliminação simples.
+
+    Os `_id`s são gerados aqui para que cada partida já aponte para a seguinte
+    (`proximaPartidaId`/`proximaPartidaSlot`) e a chave inteira possa ser gravada
+    com um único `insert_many`. Vencedores por BYE já são promovidos à segunda rodada.
+    """
+    num_partidas_rodada = len(confrontos)
+    rodadas_total = int(math.log2(num_partidas_rodada)) + 1
+
+    rodadas = []
+    partida_numero = 0
+    for rodada_numero in range(1, rodadas_total + 1):
+        rodada = []
+        for _ in range(num_partidas_rodada):
+            partida_numero += 1
+            rodada.append({
+                "_id": ObjectId(),
+                "torneioId": torneio_id,
+                "categoriaNome": categoria_nome,
+                "rodada": nome_rodada(rodada_numero, rodadas_total),
+                "rodadaNumero": rodada_numero,
+                "rodadasTotal": rodadas_total,
+                "partidaNumero": partida_numero,
+                "jogador1": None,
+                "jogador2": None,
+                "vencedorId": None,
+                "placar": None,
+                "dataHora": None,
+                "quadra": None,
+                "status": "Aguardando",
+                "proximaPartidaId": None,
+                "proximaPartidaSlot": None,
+            })
+        rodadas.append(rodada)
+        num_partidas_rodada //= 2
+
+    for atual, seguinte in zip(rodadas, rodadas[1:]):
+        for indice, partida in enumerate(atual):
+            partida["proximaPartidaId"] = str(seguinte[indice // 2]["_id"])
+            partida["proximaPartidaSlot"] = "jogador1" if indice % 2 == 0 else "jogador2"
+
+    por_id = {str(p["_id"]): p for rodada in rodadas for p in rodada}
+    for partida, (jogador1, jogador2) in zip(rodadas[0], confrontos):
+        partida["jogador1"] = jogador1
+        partida["jogador2"] = jogador2
+        if jogador1["id"] == "BYE" or jogador2["id"] == "BYE":
+            vencedor = jogador1 if jogador2["id"] == "BYE" else jogador2
+            partida["vencedorId"] = vencedor["id"]
+            partida["placar"] = "BYE"
+            partida["status"] = "Finalizada"
+            if partida["proximaPartidaId"]:
+                por_id[partida["proximaPartidaId"]][partida["proximaPartidaSlot"]] = vencedor
+        else:
+            partida["status"] = "Agendada"
+
+    for rodada in rodadas[1:]:
+        for partida in rodada:
+            if partida["jogador1"] and partida["jogador2"]:
+                partida["status"] = "Agendada"
+
+    return [partida for rodada in rodadas for partida in rodada]
+
+
+def _outro_slot(slot):
+    return "jogador2" if slot == "jogador1" else "jogador1"
+
+
+def registrar_resultado(matches_collection, partida, vencedor_id, placar):
+    """Grava o resultado de `partida` e propaga o vencedor pela chave.
+
+    Só as partidas do caminho até a final são lidas (uma por rodada, O(log n)) e todas
+    as alterações vão em um único `bulk_write`. Ao corrigir um resultado, partidas
+    seguintes já disputadas pelo vencedor anterior são reabertas e ele é retirado das
+    rodadas acima. Adversários BYE geram avanço automático.
+    Devolve os IDs (str) das partidas alteradas.
+    """
+    vencedor = partida["jogador1"] if partida["jogador1"]["id"] == vencedor_id else partida["jogador2"]
+    operacoes = [UpdateOne(
+        {"_id": partida["_id"]},
+        {"$set": {"placar": placar, "vencedorId": vencedor_id, "status": "Finalizada"}},
+    )]
+    alteradas = [str(partida["_id"])]
+
+    atual, entrando = partida, vencedor
+    if partida.get("vencedorId") == vencedor_id:
+        atual = {}
+    while atual.get("proximaPartidaId"):
+        seguinte = matches_collection.find_one({"_id": ObjectId(atual["proximaPartidaId"])})
+        if not seguinte:
+            break
+        slot = atual["proximaPartidaSlot"]
+        outro = seguinte.get(_outro_slot(slot))
+        sets = {slot: entrando}
+        alteradas.append(str(seguinte["_id"]))
+
+        if entrando and outro and outro["id"] == "BYE":
+            sets.update(vencedorId=entrando["id"], placar="BYE", status="Finalizada")
+            operacoes.append(UpdateOne({"_id": seguinte["_id"]}, {"$set": sets}))
+            if seguinte.get("vencedorId") == entrando["id"]:
+                break
+            atual = seguinte
+            continue
+
+        finalizada = seguinte.get("status") == "Finalizada"
+        if finalizada:
+            sets.update(vencedorId=None, placar=None)
+        # Update com pipeline: `$literal` para gravar o jogador (ou None) como valor.
+        sets[slot] = {"$literal": entrando}
+        operacoes.append(UpdateOne({"_id": seguinte["_id"]}, [{"$set": sets}, {"$set": {"status": STATUS_PELOS_JOGADORES}}]))
+        if not finalizada:
+            break
+        # A partida reaberta já havia promovido alguém: retira-o da rodada seguinte.
+        atual, entrando = seguinte, None
+
+    matches_collection.bulk_write(operacoes, ordered=True)
+    return alteradas
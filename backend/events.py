@@ -0,0 +1,234 @@
+import os
+import threading
+import time
+from collections import deque
+
+from serializer import dumps
+
+# Eventos guardados por torneio para retomada via `Last-Event-ID`.
+EVENT_BUFFER_SIZE = 1000
+
+HEARTBEAT_SECONDS = 15
+
+# Tempo máximo de uma conexão; o navegador reconecta sozinho com `Last-Event-ID`,
+# o que também redistribui os assinantes entre os workers.
+MAX_STREAM_SECONDS = 300
+
+# Sugestão de intervalo de reconexão enviada ao navegador (ms).
+RETRY_MS = 3000
+
+
+# Campos das partidas enviados nos eventos `match`.
+MATCH_EVENT_PROJECTION = {
+    "categoriaNome": 1, "jogador1": 1, "jogador2": 1, "vencedorId": 1, "placar": 1, "status": 1,
+}
+
+
+class Event:
+    __slots__ = ("id", "type", "payload")
+
+    def __init__(self, event_id, event_type, payload):
+        self.id = event_id
+        self.type = event_type
+        self.payload = payload
+
+    def encode(self):
+        return f"id: {self.id}\nevent: {self.type}\ndata: {self.payload}\n\n"
+
+
+class _Topic:
+    __slots__ = ("condition", "events", "evicted")
+
+    def __init__(self, condition, buffer_size, evicted):
+        self.condition = condition
+        self.events = deque(maxlen=buffer_size)
+        # Maior ID que não pode mais ser reenviado: o último descartado do buffer ou,
+        # de início, o ID anterior ao primeiro deste processo.
+        self.evicted = evicted
+
+
+class EventBus:
+    """Publicação/assinatura em memória, um buffer circular por tópico (torneio).
+
+    Os assinantes não têm fila própria: guardam só o último ID recebido e leem do
+    buffer do tópico, então manter milhares de conexões ociosas custa uma espera em
+    `Condition` cada. O evento é serializado uma única vez na publicação.
+    """
+
+    def __init__(self, buffer_size=EVENT_BUFFER_SIZE):
+        self.buffer_size = buffer_size
+        self._lock = threading.Lock()
+        self._topics = {}
+        # IDs crescentes e diferentes a cada início de processo, para que um
+        # `Last-Event-ID` de outro processo nunca seja confundido com um daqui.
+        self._seq = self._start = int(time.time() * 1000) * 1000
+
+    def _topic(self, topic):
+        state = self._topics.get(topic)
+        if state is None:
+            state = self._topics[topic] = _Topic(threading.Condition(self._lock), self.buffer_size, self._start)
+        return state
+
+    def publish(self, topic, event_type, data):
+        payload = dumps(data).decode("utf-8")
+        with self._lock:
+            self._seq += 1
+            state = self._topic(topic)
+            if len(state.events) == self.buffer_size:
+                state.evicted = state.events[0].id
+            state.events.append(Event(self._seq, event_type, payload))
+            state.condition.notify_all()
+            return self._seq
+
+    def last_id(self, topic):
+        with self._lock:
+            events = self._topic(topic).events
+            return events[-1].id if events else self._seq
+
+    def _after(self, events, last_id):
+        # IDs crescentes: percorre do fim até encontrar o último já entregue.
+        pending = []
+        for event in reversed(events):
+            if event.id <= last_id:
+                break
+            pending.append(event)
+        pending.reverse()
+        return pending
+
+    def since(self, topic, last_id):
+        """Eventos após `last_id` e se houve perda (um evento posterior a ele já saiu
+        do buffer do tópico, ou o ID é de outro processo). Como a sequência é comum a
+        todos os tópicos, lacunas entre IDs do mesmo tópico não indicam perda."""
+        with self._lock:
+            state = self._topic(topic)
+            lost = last_id < state.evicted or last_id > self._seq
+            return self._after(state.events, last_id), lost
+
+    def wait(self, topic, last_id, timeout):
+        """Bloqueia até haver eventos após `last_id` ou até `timeout` segundos."""
+        with self._lock:
+            state = self._topic(topic)
+            if not (state.events and state.events[-1].id > last_id):
+                state.condition.wait(timeout)
+            return self._after(state.events, last_id)
+
+
+def parse_last_event_id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def sse_stream(bus, topic, last_event_id=None, heartbeat=HEARTBEAT_SECONDS, max_seconds=MAX_STREAM_SECONDS):
+    """Gerador do corpo `text/event-stream`.
+
+    Sem `Last-Event-ID`, começa a partir do próximo evento. Com ele, reenvia o que
+    ficou no buffer; se o ID não puder ser retomado, envia `reset` para o cliente
+    recarregar o estado completo. Comentários `: heartbeat` mantêm a conexão viva
+    através de proxies. O stream termina após `max_seconds`.
+    """
+    deadline = time.monotonic() + max_seconds
+    yield f"retry: {RETRY_MS}\n\n"
+    if last_event_id is None:
+        last = bus.last_id(topic)
+    else:
+        pending, lost = bus.since(topic, last_event_id)
+        last = last_event_id
+        if lost:
+            last = bus.last_id(topic)
+            pending = []
+            yield f"id: {last}\nevent: reset\ndata: {{}}\n\n"
+        for event in pending:
+            yield event.encode()
+            last = event.id
+
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        events = bus.wait(topic, last, min(heartbeat, remaining))
+        if not events:
+            if deadline > time.monotonic():
+                yield ": heartbeat\n\n"
+            continue
+        yield "".join(event.encode() for event in events)
+        last = events[-1].id
+
+
+class ChangeStreamRelay:
+    """Publica no barramento as alterações da coleção `matches` lidas de um change
+    stream (exige replica set). Assim, escritas feitas por qualquer worker ou processo
+    chegam a todos os assinantes.
+
+    Cada lote disponível no stream vira, por torneio, no máximo um evento `draw` por
+    categoria (inserções) e um evento `match` com os campos alterados de cada partida.
+    Roda em uma thread por processo, iniciada no primeiro assinante.
+    """
+
+    def __init__(self, bus, collection_getter):
+        self.bus = bus
+        self.collection_getter = collection_getter
+        self.resume_token = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def ensure_started(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                threading.Thread(target=self._run, name="change-stream-relay", daemon=True).start()
+
+    def _run(self):
+        pipeline = [
+            {"$match": {"operationType": {"$in": ["insert", "update", "replace"]}}},
+            {"$project": {
+                "operationType": 1, "documentKey": 1, "updateDescription.updatedFields": 1,
+                "fullDocument.torneioId": 1, "fullDocument.categoriaNome": 1,
+            }},
+        ]
+        while True:
+            try:
+                with self.collection_getter().watch(
+                    pipeline, full_document="updateLookup", resume_after=self.resume_token
+                ) as stream:
+                    batch = []
+                    while stream.alive:
+                        change = stream.try_next()
+                        if change is not None:
+                            batch.append(change)
+                            self.resume_token = stream.resume_token
+                            continue
+                        if batch:
+                            self.publish_batch(batch)
+                            batch = []
+                        time.sleep(0.05)
+            except Exception as e:
+                print(f"Erro no change stream de partidas: {e}")
+                time.sleep(1)
+
+    def publish_batch(self, changes):
+        por_torneio = {}
+        for change in changes:
+            doc = change.get("fullDocument") or {}
+            torneio_id = doc.get("torneioId")
+            if not torneio_id:
+                continue
+            entry = por_torneio.setdefault(torneio_id, {"inserted": {}, "updates": {}})
+            categoria = doc.get("categoriaNome")
+            if change["operationType"] == "insert":
+                entry["inserted"][categoria] = entry["inserted"].get(categoria, 0) + 1
+                continue
+            fields = (change.get("updateDescription") or {}).get("updatedFields") or {}
+            delta = entry["updates"].setdefault(str(change["documentKey"]["_id"]), {"categoriaNome": categoria})
+            delta.update(fields)
+
+        for torneio_id, entry in por_torneio.items():
+            for categoria, total in entry["inserted"].items():
+                self.bus.publish(torneio_id, "draw", {"categoria": categoria, "totalMatches": total})
+            if entry["updates"]:
+                self.bus.publish(torneio_id, "match", {
+                    "matches": [{"_id": match_id, **delta} for match_id, delta in entry["updates"].items()],
+                })
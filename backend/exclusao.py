@@ -0,0 +1,125 @@
+from bson.objectid import ObjectId
+
+from vagas import OCCUPYING_STATUSES, reconcile_slots, release_many
+
+BATCH_SIZE = 1000
+
+# Coleções com um documento por categoria do torneio.
+TOURNAMENT_STATE_COLLECTIONS = ("category_slots", "group_standings", "bracket_versions")
+
+# Pai marcado como excluído (aguardando a remoção em cascata): fora de todas as consultas.
+ACTIVE_FILTER = {"excluidoEm": None}
+
+
+def _lotes(collection, query, batch_size, projection=None):
+    """Apaga os documentos de `query` em lotes de até `batch_size`, devolvendo cada lote apagado."""
+    while True:
+        docs = list(collection.find(query, projection or {"_id": 1}).limit(batch_size))
+        if not docs:
+            return
+        collection.delete_many({"_id": {"$in": [doc["_id"] for doc in docs]}})
+        yield docs
+
+
+def _hashes(registrations):
+    return [h for h in (reg.get("pixDetails", {}).get("qrCodeHash") for reg in registrations) if h]
+
+
+def excluir_torneio(db, qr_code_cache, torneio_id, batch_size=BATCH_SIZE):
+    """Remove em lotes as inscrições (com as imagens PIX), as partidas e o estado por
+    categoria do torneio e, por último, o próprio torneio. Gerador de `(contador, n)`."""
+    for docs in _lotes(db.registrations, {"torneioId": torneio_id}, batch_size, {"pixDetails.qrCodeHash": 1}):
+        yield "registrations", len(docs)
+        # O txid do PIX é o ID da inscrição, então cada imagem pertence a uma só inscrição.
+        yield "pix_images", qr_code_cache.discard(_hashes(docs))
+    for docs in _lotes(db.matches, {"torneioId": torneio_id}, batch_size):
+        yield "matches", len(docs)
+    for name in TOURNAMENT_STATE_COLLECTIONS:
+        yield name, db[name].delete_many({"torneioId": torneio_id}).deleted_count
+    yield "tournaments", db.tournaments.delete_one({"_id": ObjectId(torneio_id)}).deleted_count
+
+
+def excluir_jogador(db, qr_code_cache, jogador_id, batch_size=BATCH_SIZE, on_release=None):
+    """Remove em lotes as inscrições do jogador, liberando as vagas que ocupavam, e
+    depois o jogador. As partidas são mantidas: guardam nome e ID, e a chave já
+    disputada continua válida. `on_release(torneio_id)` é chamado para cada torneio
+    com vagas liberadas."""
+    projection = {"torneioId": 1, "categoriaInscrita.nome": 1, "statusPagamento": 1, "pixDetails.qrCodeHash": 1}
+    for docs in _lotes(db.registrations, {"jogadorId": jogador_id}, batch_size, projection):
+        occupied = {}
+        for reg in docs:
+            if reg.get("statusPagamento") in OCCUPYING_STATUSES:
+                key = (reg["torneioId"], reg["categoriaInscrita"]["nome"])
+                occupied[key] = occupied.get(key, 0) + 1
+        # Uma falha entre a exclusão do lote e esta liberação é corrigida por `reconcile-slots`.
+        release_many(db.category_slots, occupied)
+        for torneio_id, _ in occupied:
+            if on_release:
+                on_release(torneio_id)
+        yield "registrations", len(docs)
+        yield "pix_images", qr_code_cache.discard(_hashes(docs))
+    yield "players", db.players.delete_one({"_id": ObjectId(jogador_id)}).deleted_count
+
+
+def _ids_sem_pai(db, collection_name, field, parents_name, batch_size):
+    """Valores de `field` em `collection_name` sem documento ativo correspondente em
+    `parents_name`; os valores distintos vêm de um `$group` e são conferidos em lotes."""
+    pendentes, sem_pai = [], []
+
+    def conferir():
+        object_ids = [ObjectId(v) for v in pendentes if ObjectId.is_valid(v)]
+        ativos = {
+            str(doc["_id"])
+            for doc in db[parents_name].find({"_id": {"$in": object_ids}, **ACTIVE_FILTER}, {"_id": 1})
+        }
+        sem_pai.extend(v for v in pendentes if v not in ativos)
+        pendentes.clear()
+
+    for row in db[collection_name].aggregate([{"$group": {"_id": f"${field}"}}], allowDiskUse=True):
+        pendentes.append(row["_id"])
+        if len(pendentes) >= batch_size:
+            conferir()
+    if pendentes:
+        conferir()
+    return sem_pai
+
+
+def varrer_orfaos(db, qr_code_cache, batch_size=BATCH_SIZE):
+    """Varredura avulsa (`flask purge-orphans`): apaga inscrições, partidas e estado por
+    categoria de torneios ou jogadores inexistentes ou marcados como excluídos, imagens
+    PIX sem inscrição e os próprios pais marcados. Termina recalculando as vagas.
+    Gerador de `(contador, n)`."""
+    for field, parents_name in (("torneioId", "tournaments"), ("jogadorId", "players")):
+        for parent_id in _ids_sem_pai(db, "registrations", field, parents_name, batch_size):
+            for docs in _lotes(db.registrations, {field: parent_id}, batch_size, {"pixDetails.qrCodeHash": 1}):
+                yield "registrations", len(docs)
+                yield "pix_images", qr_code_cache.discard(_hashes(docs))
+    for name in ("matches",) + TOURNAMENT_STATE_COLLECTIONS:
+        for torneio_id in _ids_sem_pai(db, name, "torneioId", "tournaments", batch_size):
+            for docs in _lotes(db[name], {"torneioId": torneio_id}, batch_size):
+                yield name, len(docs)
+
+    for docs in _lotes_sem_referencia(db, batch_size):
+        yield "pix_images", qr_code_cache.discard(docs)
+    for name in ("tournaments", "players"):
+        yield name, db[name].delete_many({"excluidoEm": {"$ne": None}}).deleted_count
+    reconcile_slots(db)
+
+
+def _lotes_sem_referencia(db, batch_size):
+    """Hashes de imagens PIX que nenhuma inscrição referencia (ex.: PIX regerado com
+    outro valor), em lotes."""
+    ultimo = None
+    while True:
+        query = {"_id": {"$gt": ultimo}} if ultimo else {}
+        hashes = [doc["_id"] for doc in db.pix_images.find(query, {"_id": 1}).sort("_id", 1).limit(batch_size)]
+        if not hashes:
+            return
+        ultimo = hashes[-1]
+        usados = {
+            reg["pixDetails"]["qrCodeHash"]
+            for reg in db.registrations.find({"pixDetails.qrCodeHash": {"$in": hashes}}, {"pixDetails.qrCodeHash": 1})
+        }
+        orfaos = [h for h in hashes if h not in usados]
+        if orfaos:
+            yield orfaos
@@ -0,0 +1,277 @@
+import math
+import random
+import re
+from datetime import datetime
+
+from bson.objectid import ObjectId
+from pymongo import ReplaceOne, ReturnDocument
+
+FASE_GRUPOS = "Grupos"
+
+TAMANHO_GRUPO_PADRAO = 4
+
+# Do mais forte para o mais fraco; níveis desconhecidos ficam no fim.
+ORDEM_NIVEIS = ["Profissional", "Avançado", "Intermediário", "Iniciante"]
+
+_SET = re.compile(r"(\d+)\s*[xX\-/:]\s*(\d+)")
+
+
+class PlacarError(ValueError):
+    """Placar de partida de grupo que não pode ser contabilizado (400)."""
+
+
+def standings_key(torneio_id, categoria_nome, grupo):
+    return f"{torneio_id}:{categoria_nome}:{grupo}"
+
+
+def nome_grupo(indice):
+    letras = ""
+    indice += 1
+    while indice:
+        indice, resto = divmod(indice - 1, 26)
+        letras = chr(ord("A") + resto) + letras
+    return f"Grupo {letras}"
+
+
+def dividir_grupos(jogadores, tamanho_grupo=TAMANHO_GRUPO_PADRAO, rng=random):
+    """Divide os jogadores em grupos equilibrados.
+
+    Os tamanhos diferem em no máximo um. Os jogadores são ordenados por
+    `nivelHabilidade` (embaralhados dentro do mesmo nível) e distribuídos em serpentina,
+    para que cada grupo receba cabeças de chave e jogadores mais fracos.
+    """
+    jogadores = list(jogadores)
+    rng.shuffle(jogadores)
+    posicao = {nivel: i for i, nivel in enumerate(ORDEM_NIVEIS)}
+    jogadores.sort(key=lambda j: posicao.get(j.get("nivel"), len(ORDEM_NIVEIS)))
+
+    num_grupos = max(1, math.ceil(len(jogadores) / tamanho_grupo))
+    grupos = [[] for _ in range(num_grupos)]
+    for i, jogador in enumerate(jogadores):
+        volta, coluna = divmod(i, num_grupos)
+        grupos[coluna if volta % 2 == 0 else num_grupos - 1 - coluna].append(jogador)
+    return grupos
+
+
+def rodizio(jogadores):
+    """Rodadas de todos contra todos pelo método do círculo.
+
+    Devolve uma lista de rodadas, cada uma com os confrontos `(jogador1, jogador2)`;
+    com número ímpar de jogadores, um deles folga em cada rodada.
+    """
+    posicoes = list(jogadores)
+    if len(posicoes) % 2:
+        posicoes.append(None)
+    n = len(posicoes)
+    rodadas = []
+    for rodada in range(n - 1):
+        confrontos = []
+        for i in range(n // 2):
+            a, b = posicoes[i], posicoes[n - 1 - i]
+            if a is None or b is None:
+                continue
+            # Alterna os lados do jogador fixo para equilibrar quem aparece como jogador1.
+            confrontos.append((b, a) if i == 0 and rodada % 2 else (a, b))
+        rodadas.append(confrontos)
+        posicoes = [posicoes[0], posicoes[-1]] + posicoes[1:-1]
+    return rodadas
+
+
+def montar_grupos(torneio_id, categoria_nome, grupos):
+    """Partidas de todos os grupos e a classificação inicial (zerada) de cada um.
+
+    As partidas seguem o formato das da chave, com `fase` e `grupo`; `rodadaNumero` é
+    a rodada dentro do grupo, então a rodada 1 de todos os grupos vem primeiro.
+    """
+    partidas = []
+    classificacoes = []
+    partida_numero = 0
+    agora = datetime.utcnow()
+    for indice, membros in enumerate(grupos):
+        grupo = nome_grupo(indice)
+        membros = [{"id": j["id"], "nome": j["nome"]} for j in membros]
+        rodadas = rodizio(membros)
+        for rodada_numero, confrontos in enumerate(rodadas, start=1):
+            for jogador1, jogador2 in confrontos:
+                partida_numero += 1
+                partidas.append({
+                    "_id": ObjectId(),
+                    "torneioId": torneio_id,
+                    "categoriaNome": categoria_nome,
+                    "fase": FASE_GRUPOS,
+                    "grupo": grupo,
+                    "rodada": f"{grupo} - Rodada {rodada_numero}",
+                    "rodadaNumero": rodada_numero,
+                    "rodadasTotal": len(rodadas),
+                    "partidaNumero": partida_numero,
+                    "jogador1": jogador1,
+                    "jogador2": jogador2,
+                    "vencedorId": None,
+                    "placar": None,
+                    "dataHora": None,
+                    "quadra": None,
+                    "status": "Agendada",
+                    "proximaPartidaId": None,
+                    "proximaPartidaSlot": None,
+                })
+        classificacoes.append({
+            "_id": standings_key(torneio_id, categoria_nome, grupo),
+            "torneioId": torneio_id,
+            "categoriaNome": categoria_nome,
+            "grupo": grupo,
+            "jogadores": {j["id"]: _linha_zerada(j["nome"]) for j in membros},
+            "atualizadoEm": agora,
+        })
+    return partidas, classificacoes
+
+
+def games(placar):
+    """Games de cada lado em um placar como '6x4' ou '6-4 3-6 10-8' (jogador1 primeiro)."""
+    sets = _SET.findall(placar or "")
+    if not sets:
+        raise PlacarError("Placar de partida de grupo deve estar no formato '6x4' (games do jogador1 primeiro).")
+    return sum(int(a) for a, _ in sets), sum(int(b) for _, b in sets)
+
+
+def conferir_placar(partida, vencedor_id, placar):
+    """Recusa placares ilegíveis ou em que o vencedor informado ganhou menos sets."""
+    sets = [(int(a), int(b)) for a, b in _SET.findall(placar or "")]
+    if not sets:
+        games(placar)
+    sets1 = sum(1 for a, b in sets if a > b)
+    sets2 = sum(1 for a, b in sets if b > a)
+    vencedor_e_jogador1 = vencedor_id == partida["jogador1"]["id"]
+    if (sets1 < sets2) if vencedor_e_jogador1 else (sets2 < sets1):
+        raise PlacarError("O placar não confere com o vencedor informado (games do jogador1 primeiro).")
+
+
+def _contribuicao(partida, vencedor_id, placar):
+    """Incrementos que um resultado soma à classificação do grupo."""
+    if not vencedor_id:
+        return {}
+    j1, j2 = partida["jogador1"]["id"], partida["jogador2"]["id"]
+    g1, g2 = games(placar)
+    perdedor = j2 if vencedor_id == j1 else j1
+    return {
+        f"jogadores.{j1}.jogos": 1,
+        f"jogadores.{j2}.jogos": 1,
+        f"jogadores.{vencedor_id}.vitorias": 1,
+        f"jogadores.{perdedor}.derrotas": 1,
+        f"jogadores.{j1}.gamesPro": g1,
+        f"jogadores.{j1}.gamesContra": g2,
+        f"jogadores.{j2}.gamesPro": g2,
+        f"jogadores.{j2}.gamesContra": g1,
+    }
+
+
+def registrar_resultado_grupo(matches_collection, standings_collection, partida, vencedor_id, placar):
+    """Grava o resultado de uma partida de grupo e atualiza a classificação do grupo.
+
+    A partida é atualizada com `find_one_and_update` devolvendo o estado anterior, de
+    modo que, em correções ou envios simultâneos, a classificação recebe exatamente a
+    diferença entre o resultado antigo e o novo, em uma única atualização com `$inc`.
+    """
+    conferir_placar(partida, vencedor_id, placar)
+    anterior = matches_collection.find_one_and_update(
+        {"_id": partida["_id"]},
+        {"$set": {"placar": placar, "vencedorId": vencedor_id, "status": "Finalizada"}},
+        projection={"vencedorId": 1, "placar": 1, "jogador1": 1, "jogador2": 1},
+        return_document=ReturnDocument.BEFORE,
+    )
+    if anterior is None:
+        return None
+
+    incrementos = _contribuicao(partida, vencedor_id, placar)
+    try:
+        contabilizado = _contribuicao(anterior, anterior.get("vencedorId"), anterior.get("placar"))
+    except PlacarError:
+        # Placar antigo ilegível nunca entrou na classificação.
+        contabilizado = {}
+    for campo, valor in contabilizado.items():
+        incrementos[campo] = incrementos.get(campo, 0) - valor
+    update = {"$set": {"atualizadoEm": datetime.utcnow()}}
+    incrementos = {campo: valor for campo, valor in incrementos.items() if valor}
+    if incrementos:
+        update["$inc"] = incrementos
+
+    antigo = anterior.get("vencedorId")
+    if antigo != vencedor_id:
+        j1, j2 = partida["jogador1"]["id"], partida["jogador2"]["id"]
+        update["$set"][f"jogadores.{vencedor_id}.venceu.{j2 if vencedor_id == j1 else j1}"] = True
+        if antigo:
+            update["$unset"] = {f"jogadores.{antigo}.venceu.{j2 if antigo == j1 else j1}": ""}
+
+    return standings_collection.find_one_and_update(
+        {"_id": standings_key(partida["torneioId"], partida["categoriaNome"], partida["grupo"])},
+        update,
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+def ordenar_classificacao(doc):
+    """Linhas da classificação: vitórias, saldo de games, games pró e, entre dois
+    jogadores empatados nesses critérios, o confronto direto."""
+    linhas = [
+        {"jogadorId": jogador_id, "nome": dados["nome"], "jogos": dados["jogos"], "vitorias": dados["vitorias"],
+         "derrotas": dados["derrotas"], "gamesPro": dados["gamesPro"], "gamesContra": dados["gamesContra"],
+         "saldoGames": dados["gamesPro"] - dados["gamesContra"], "_venceu": dados.get("venceu", {})}
+        for jogador_id, dados in doc.get("jogadores", {}).items()
+    ]
+
+    def criterio(linha):
+        return -linha["vitorias"], -linha["saldoGames"], -linha["gamesPro"]
+
+    linhas.sort(key=lambda l: criterio(l) + (l["nome"],))
+    i = 0
+    while i < len(linhas):
+        j = i
+        while j + 1 < len(linhas) and criterio(linhas[j + 1]) == criterio(linhas[i]):
+            j += 1
+        if j == i + 1 and linhas[j]["_venceu"].get(linhas[i]["jogadorId"]):
+            linhas[i], linhas[j] = linhas[j], linhas[i]
+        i = j + 1
+
+    for posicao, linha in enumerate(linhas, start=1):
+        del linha["_venceu"]
+        linha["posicao"] = posicao
+    return {"grupo": doc["grupo"], "classificacao": linhas, "atualizadoEm": doc.get("atualizadoEm")}
+
+
+def _linha_zerada(nome):
+    return {"nome": nome, "jogos": 0, "vitorias": 0, "derrotas": 0, "gamesPro": 0, "gamesContra": 0, "venceu": {}}
+
+
+def recalcular_classificacoes(db, torneio_id=None):
+    """Reconstrói as classificações a partir das partidas de grupo (uma leitura e um
+    `bulk_write`). Corrige desvios deixados por falhas entre a gravação da partida e a
+    da classificação."""
+    filtro = {"fase": FASE_GRUPOS}
+    if torneio_id:
+        filtro["torneioId"] = torneio_id
+    docs = {}
+    for partida in db.matches.find(filtro):
+        key = standings_key(partida["torneioId"], partida["categoriaNome"], partida["grupo"])
+        doc = docs.setdefault(key, {
+            "torneioId": partida["torneioId"], "categoriaNome": partida["categoriaNome"],
+            "grupo": partida["grupo"], "jogadores": {},
+        })
+        for jogador in (partida["jogador1"], partida["jogador2"]):
+            doc["jogadores"].setdefault(jogador["id"], _linha_zerada(jogador["nome"]))
+        if partida.get("status") != "Finalizada":
+            continue
+        try:
+            contribuicao = _contribuicao(partida, partida.get("vencedorId"), partida.get("placar"))
+        except PlacarError:
+            continue
+        for campo, valor in contribuicao.items():
+            _, jogador_id, chave = campo.split(".")
+            doc["jogadores"][jogador_id][chave] += valor
+        j1, j2 = partida["jogador1"]["id"], partida["jogador2"]["id"]
+        doc["jogadores"][partida["vencedorId"]]["venceu"][j2 if partida["vencedorId"] == j1 else j1] = True
+
+    agora = datetime.utcnow()
+    if docs:
+        db.group_standings.bulk_write([
+            ReplaceOne({"_id": key}, {**doc, "atualizadoEm": agora}, upsert=True) for key, doc in docs.items()
+        ], ordered=False)
+    return len(docs)
@@ -0,0 +1,111 @@
+from datetime import datetime
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+# Índices exigidos pelas consultas da API, por coleção.
+REQUIRED_INDEXES = {
+    "players": [
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+        IndexModel([("buscaTokens", ASCENDING)], name="busca_tokens"),
+        IndexModel([("nomeBusca", ASCENDING)], name="nome_busca"),
+    ],
+    "registrations": [
+        IndexModel(
+            [("torneioId", ASCENDING), ("categoriaInscrita.nome", ASCENDING), ("statusPagamento", ASCENDING)],
+            name="torneio_categoria_status",
+        ),
+        IndexModel([("jogadorId", ASCENDING)], name="jogador"),
+        IndexModel([("pixDetails.qrCodeHash", ASCENDING)], name="pix_hash", sparse=True),
+    ],
+    "matches": [
+        IndexModel(
+            [("torneioId", ASCENDING), ("categoriaNome", ASCENDING), ("rodadaNumero", ASCENDING), ("partidaNumero", ASCENDING)],
+            name="torneio_categoria_rodada_partida",
+        ),
+    ],
+    "rankings": [
+        IndexModel(
+            [("categoria", ASCENDING), ("genero", ASCENDING), ("pontos", DESCENDING), ("jogadorId", ASCENDING)],
+            name="categoria_genero_pontos",
+        ),
+        IndexModel([("categoria", ASCENDING), ("pontos", DESCENDING), ("jogadorId", ASCENDING)], name="categoria_pontos"),
+        IndexModel([("jogadorId", ASCENDING)], name="jogador"),
+    ],
+    "jobs": [
+        IndexModel([("status", ASCENDING), ("disponivelEm", ASCENDING)], name="status_disponivel"),
+    ],
+    "group_standings": [
+        IndexModel([("torneioId", ASCENDING), ("categoriaNome", ASCENDING), ("grupo", ASCENDING)], name="torneio_categoria_grupo"),
+    ],
+}
+
+# Consultas quentes da API: (coleção, filtro, ordenação). Os valores são exemplos,
+# só o formato da consulta importa para o plano escolhido.
+HOT_QUERIES = [
+    ("players", {"email": "exemplo@exemplo.com"}, None),
+    ("players", {"buscaTokens": {"$regex": "^exemplo"}}, None),
+    ("players", {"buscaTokens": {"$regex": "^exemplo"}, "nomeBusca": {"$regex": "^exemplo"}}, [("nomeBusca", ASCENDING)]),
+    ("registrations", {"torneioId": "000000000000000000000000"}, None),
+    ("registrations", {"jogadorId": "000000000000000000000000"}, None),
+    ("registrations", {
+        "torneioId": "000000000000000000000000",
+        "jogadorId": "000000000000000000000000",
+        "categoriaInscrita.nome": "Categoria",
+    }, None),
+    ("registrations", {
+        "torneioId": "000000000000000000000000",
+        "categoriaInscrita.nome": "Categoria",
+        "statusPagamento": "Confirmado",
+    }, None),
+    ("matches", {"torneioId": "000000000000000000000000", "categoriaNome": "Categoria"},
+     [("rodadaNumero", ASCENDING), ("partidaNumero", ASCENDING)]),
+    ("rankings", {"categoria": "Categoria", "genero": "Feminino"}, [("pontos", DESCENDING), ("jogadorId", ASCENDING)]),
+    ("rankings", {"categoria": "Categoria"}, [("pontos", DESCENDING), ("jogadorId", ASCENDING)]),
+    ("jobs", {"status": {"$in": ["pendente", "executando"]}, "disponivelEm": {"$lte": datetime(2026, 1, 1)}},
+     [("disponivelEm", ASCENDING)]),
+    ("group_standings", {"torneioId": "000000000000000000000000", "categoriaNome": "Categoria"},
+     [("grupo", ASCENDING)]),
+]
+
+
+class QueryPlanError(Exception):
+    """Uma consulta quente foi planejada com varredura completa da coleção."""
+
+
+def ensure_indexes(db):
+    """Cria os índices exigidos. `create_indexes` é idempotente: índices já existentes
+    com a mesma definição são ignorados pelo servidor."""
+    created = {}
+    for collection_name, models in REQUIRED_INDEXES.items():
+        created[collection_name] = db[collection_name].create_indexes(models)
+    return created
+
+
+def _plan_stages(plan):
+    # Com o motor SBE (MongoDB 7+) o plano clássico fica aninhado em "queryPlan".
+    if "queryPlan" in plan:
+        plan = plan["queryPlan"]
+    yield plan.get("stage")
+    if "inputStage" in plan:
+        yield from _plan_stages(plan["inputStage"])
+    for child in plan.get("inputStages", []):
+        yield from _plan_stages(child)
+
+
+def verify_query_plans(db):
+    """Roda `explain()` em cada consulta quente e falha se alguma usar COLLSCAN."""
+    report = []
+    failures = []
+    for collection_name, query, sort in HOT_QUERIES:
+        cursor = db[collection_name].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        winning_plan = cursor.explain()["queryPlanner"]["winningPlan"]
+        stages = [stage for stage in _plan_stages(winning_plan) if stage]
+        report.append({"collection": collection_name, "query": query, "stages": stages})
+        if "COLLSCAN" in stages:
+            failures.append(f"{collection_name} {query}")
+
+    if failures:
+        raise QueryPlanError("Consultas sem índice (COLLSCAN): " + "; ".join(failures))
+    return report
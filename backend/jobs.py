@@ -0,0 +1,156 @@
+import os
+import socket
+import threading
+from datetime import datetime, timedelta
+
+from bson.objectid import ObjectId
+from pymongo import ReturnDocument
+
+# Tempo que um worker tem para concluir o próximo lote antes que outro assuma o job.
+LEASE_SECONDS = 60
+MAX_ATTEMPTS = 5
+POLL_SECONDS = 2
+
+PENDENTE = "pendente"
+EXECUTANDO = "executando"
+CONCLUIDO = "concluido"
+FALHOU = "falhou"
+
+# Campos devolvidos por GET /jobs/<id>.
+JOB_PROJECTION = {
+    "tipo": 1, "alvoId": 1, "status": 1, "tentativas": 1, "progresso": 1, "erro": 1,
+    "criadoEm": 1, "atualizadoEm": 1, "concluidoEm": 1,
+}
+
+
+def enqueue(jobs_collection, tipo, alvo_id):
+    """Grava um job pendente e devolve o seu ID (str)."""
+    agora = datetime.utcnow()
+    doc = {
+        "tipo": tipo,
+        "alvoId": alvo_id,
+        "status": PENDENTE,
+        "tentativas": 0,
+        "progresso": {},
+        "erro": None,
+        "criadoEm": agora,
+        "atualizadoEm": agora,
+        "disponivelEm": agora,
+    }
+    return str(jobs_collection.insert_one(doc).inserted_id)
+
+
+def _espera(tentativas):
+    return timedelta(seconds=min(5 * 2 ** tentativas, 300))
+
+
+class JobQueue:
+    """Fila de jobs na coleção `jobs`, com lease.
+
+    `disponivelEm` diz quando o job pode ser pego: na criação, agora; durante a
+    execução, o fim do lease, renovado a cada lote. Se o processo morrer, o lease
+    expira e outro worker retoma o job. Os handlers são geradores que apagam por
+    consulta (idempotentes) e produzem `(contador, quantidade)` a cada lote.
+    """
+
+    def __init__(self, collection, handlers, lease_seconds=LEASE_SECONDS, max_attempts=MAX_ATTEMPTS):
+        self.collection = collection
+        self.handlers = handlers
+        self.lease = timedelta(seconds=lease_seconds)
+        self.max_attempts = max_attempts
+
+    def claim(self, worker_id):
+        agora = datetime.utcnow()
+        return self.collection.find_one_and_update(
+            {"status": {"$in": [PENDENTE, EXECUTANDO]}, "disponivelEm": {"$lte": agora}},
+            {
+                "$set": {"status": EXECUTANDO, "worker": worker_id, "disponivelEm": agora + self.lease, "atualizadoEm": agora},
+                "$inc": {"tentativas": 1},
+            },
+            sort=[("disponivelEm", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    def _finish(self, job, worker_id, update):
+        update.setdefault("$set", {})["atualizadoEm"] = datetime.utcnow()
+        self.collection.update_one({"_id": job["_id"], "worker": worker_id}, update)
+
+    def run(self, job, worker_id):
+        """Executa um job já reservado. Devolve False se o lease foi perdido."""
+        if job["tentativas"] > self.max_attempts:
+            self._finish(job, worker_id, {"$set": {"status": FALHOU}})
+            return True
+        try:
+            for contador, quantidade in self.handlers[job["tipo"]](job["alvoId"]):
+                agora = datetime.utcnow()
+                update = {"$set": {"disponivelEm": agora + self.lease, "atualizadoEm": agora}}
+                if quantidade:
+                    update["$inc"] = {f"progresso.{contador}": quantidade}
+                renovado = self.collection.update_one({"_id": job["_id"], "worker": worker_id}, update)
+                if renovado.matched_count == 0:
+                    return False
+        except Exception as e:
+            print(f"Erro no job {job['_id']} ({job['tipo']}): {e}")
+            falhou = job["tentativas"] >= self.max_attempts
+            self._finish(job, worker_id, {"$set": {
+                "status": FALHOU if falhou else PENDENTE,
+                "erro": str(e),
+                "disponivelEm": datetime.utcnow() + _espera(job["tentativas"]),
+            }})
+            return True
+        agora = datetime.utcnow()
+        self._finish(job, worker_id, {"$set": {"status": CONCLUIDO, "erro": None, "concluidoEm": agora}})
+        return True
+
+    def run_pending(self, worker_id):
+        """Executa os jobs disponíveis até a fila esvaziar; devolve quantos foram pegos."""
+        total = 0
+        while True:
+            job = self.claim(worker_id)
+            if job is None:
+                return total
+            total += 1
+            self.run(job, worker_id)
+
+    def status(self, job_id):
+        if not ObjectId.is_valid(job_id):
+            return None
+        return self.collection.find_one({"_id": ObjectId(job_id)}, JOB_PROJECTION)
+
+
+class JobWorker:
+    """Thread que consome a fila, uma por processo (iniciada na primeira requisição
+    de cada worker, depois do fork). `flask run-jobs` roda o mesmo laço em primeiro plano."""
+
+    def __init__(self, queue, poll_seconds=POLL_SECONDS):
+        self.queue = queue
+        self.poll_seconds = poll_seconds
+        self._wake = threading.Event()
+        self._pid = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def worker_id():
+        return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+    def ensure_started(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                threading.Thread(target=self.run_forever, name="job-worker", daemon=True).start()
+
+    def notify(self):
+        """Acorda o worker deste processo logo após enfileirar um job."""
+        self._wake.set()
+
+    def run_forever(self):
+        worker_id = self.worker_id()
+        while True:
+            try:
+                self.queue.run_pending(worker_id)
+            except Exception as e:
+                print(f"Erro no worker de jobs: {e}")
+            self._wake.wait(self.poll_seconds)
+            self._wake.clear()
@@ -0,0 +1,201 @@
+import bisect
+import logging
+import threading
+import time
+
+from flask import Response, g, request
+from pymongo import monitoring
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COMMAND_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250, 500)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+logger = logging.getLogger("torneiobt.metrics")
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class RequestStats:
+    """Comandos Mongo emitidos durante uma requisição."""
+
+    __slots__ = ("commands", "started_at")
+
+    def __init__(self):
+        self.commands = []
+        self.started_at = time.perf_counter()
+
+    @property
+    def command_seconds(self):
+        return sum(duration for _, _, duration in self.commands)
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    """Atribui cada comando à requisição em andamento na mesma thread (o PyMongo
+    síncrono chama os listeners na thread que executou o comando)."""
+
+    def __init__(self, registry):
+        self.registry = registry
+        self._local = threading.local()
+
+    def begin(self):
+        self._local.stats = RequestStats()
+        return self._local.stats
+
+    def end(self):
+        stats = getattr(self._local, "stats", None)
+        self._local.stats = None
+        return stats
+
+    def _record(self, event, failed):
+        duration = event.duration_micros / 1e6
+        self.registry.observe_command(event.command_name, duration, failed)
+        stats = getattr(self._local, "stats", None)
+        if stats is not None:
+            stats.commands.append((event.command_name, event.database_name, duration))
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self._record(event, failed=False)
+
+    def failed(self, event):
+        self._record(event, failed=True)
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.request_latency = {}
+        self.request_commands = {}
+        self.request_command_seconds = {}
+        self.response_size = {}
+        self.requests_total = {}
+        self.commands_total = {}
+        self.command_seconds = {}
+
+    def _histogram(self, family, key, buckets):
+        histogram = family.get(key)
+        if histogram is None:
+            histogram = family[key] = Histogram(buckets)
+        return histogram
+
+    def observe_request(self, route, method, status, seconds, stats, size):
+        key = (route, method)
+        with self._lock:
+            self.requests_total[key + (str(status),)] = self.requests_total.get(key + (str(status),), 0) + 1
+            self._histogram(self.request_latency, key, LATENCY_BUCKETS).observe(seconds)
+            if stats is not None:
+                self._histogram(self.request_commands, key, COMMAND_COUNT_BUCKETS).observe(len(stats.commands))
+                self._histogram(self.request_command_seconds, key, LATENCY_BUCKETS).observe(stats.command_seconds)
+            if size is not None:
+                self._histogram(self.response_size, key, SIZE_BUCKETS).observe(size)
+
+    def observe_command(self, command, seconds, failed):
+        key = (command, "failed" if failed else "ok")
+        with self._lock:
+            self.commands_total[key] = self.commands_total.get(key, 0) + 1
+            self.command_seconds[command] = self.command_seconds.get(command, 0.0) + seconds
+
+    def render(self):
+        """Exposição no formato texto do Prometheus."""
+        lines = []
+        with self._lock:
+            _counter(lines, "http_requests_total", "Requisições HTTP atendidas.",
+                     ("route", "method", "status"), self.requests_total)
+            _histograms(lines, "http_request_duration_seconds", "Latência das requisições por rota.",
+                        self.request_latency)
+            _histograms(lines, "http_request_mongo_commands", "Comandos MongoDB emitidos por requisição.",
+                        self.request_commands)
+            _histograms(lines, "http_request_mongo_seconds", "Tempo em comandos MongoDB por requisição.",
+                        self.request_command_seconds)
+            _histograms(lines, "http_response_size_bytes", "Tamanho do corpo das respostas.",
+                        self.response_size)
+            _counter(lines, "mongo_commands_total", "Comandos MongoDB por nome e resultado.",
+                     ("command", "outcome"), self.commands_total)
+            _counter(lines, "mongo_command_seconds_total", "Tempo acumulado por comando MongoDB.",
+                     ("command",), {(k,): v for k, v in self.command_seconds.items()})
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values):
+    return ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values))
+
+
+def _counter(lines, name, help_text, label_names, values):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} counter")
+    for key, value in sorted(values.items()):
+        lines.append(f"{name}{{{_labels(label_names, key)}}} {value}")
+
+
+def _histograms(lines, name, help_text, family):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} histogram")
+    for (route, method), histogram in sorted(family.items()):
+        labels = _labels(("route", "method"), (route, method))
+        cumulative = 0
+        for bound, count in zip(histogram.buckets, histogram.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+        lines.append(f"{name}_sum{{{labels}}} {histogram.sum}")
+        lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+
+
+class Metrics:
+    """Ganchos do Flask + listener do PyMongo. O listener precisa ser passado ao
+    `MongoClient(event_listeners=[metrics.listener])`."""
+
+    def __init__(self, slow_request_ms=None):
+        self.registry = MetricsRegistry()
+        self.listener = MongoCommandListener(self.registry)
+        self.slow_request_ms = slow_request_ms
+
+    def init_app(self, app):
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.add_url_rule('/metrics', 'metrics', self._metrics_view, methods=['GET'])
+
+    def _before_request(self):
+        g.request_stats = self.listener.begin()
+
+    def _after_request(self, response):
+        stats = self.listener.end()
+        if stats is None:
+            return response
+        seconds = time.perf_counter() - stats.started_at
+        route = request.url_rule.rule if request.url_rule else "<unmatched>"
+        size = None if response.is_streamed else response.calculate_content_length()
+        self.registry.observe_request(route, request.method, response.status_code, seconds, stats, size)
+
+        if self.slow_request_ms is not None and seconds * 1000 >= self.slow_request_ms:
+            breakdown = {}
+            for command, _, duration in stats.commands:
+                count, total = breakdown.get(command, (0, 0.0))
+                breakdown[command] = (count + 1, total + duration)
+            details = ", ".join(f"{cmd} x{count} ({total * 1000:.1f}ms)" for cmd, (count, total) in breakdown.items())
+            logger.warning(
+                "Requisição lenta: %s %s %.1fms, %d comandos Mongo (%.1fms): %s",
+                request.method, request.full_path, seconds * 1000, len(stats.commands),
+                stats.command_seconds * 1000, details or "nenhum",
+            )
+        return response
+
+    def _metrics_view(self):
+        return Response(self.registry.render(), mimetype="text/plain; version=0.0.4")
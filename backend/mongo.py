@@ -0,0 +1,87 @@
+import os
+import threading
+
+from pymongo import MongoClient
+from werkzeug.local import LocalProxy
+
+DEFAULT_DB_NAME = "torneiobt_db"
+
+# Variável de ambiente -> (opção do MongoClient, valor padrão).
+POOL_SETTINGS = {
+    "MONGO_MAX_POOL_SIZE": ("maxPoolSize", 50),
+    "MONGO_MIN_POOL_SIZE": ("minPoolSize", 0),
+    "MONGO_MAX_IDLE_TIME_MS": ("maxIdleTimeMS", None),
+    "MONGO_CONNECT_TIMEOUT_MS": ("connectTimeoutMS", 5000),
+    "MONGO_SERVER_SELECTION_TIMEOUT_MS": ("serverSelectionTimeoutMS", 5000),
+    "MONGO_SOCKET_TIMEOUT_MS": ("socketTimeoutMS", None),
+    "MONGO_WAIT_QUEUE_TIMEOUT_MS": ("waitQueueTimeoutMS", None),
+}
+
+
+def settings_from_env():
+    """Configuração do cliente a partir das variáveis de ambiente (chaves do `app.config`)."""
+    config = {
+        "MONGO_URI": os.getenv("MONGO_URI"),
+        "MONGO_DB_NAME": os.getenv("MONGO_DB_NAME", DEFAULT_DB_NAME),
+    }
+    for name, (_, default) in POOL_SETTINGS.items():
+        value = os.getenv(name)
+        config[name] = int(value) if value else default
+    return config
+
+
+class Mongo:
+    """Cliente MongoDB criado no primeiro uso, um por processo.
+
+    Com gunicorn em prefork, um cliente aberto antes do fork seria compartilhado pelos
+    workers (o PyMongo não é seguro entre forks). Aqui o cliente só é criado na primeira
+    consulta e é recriado se o PID mudar. `on_connect(db)` roda uma vez por cliente novo.
+    """
+
+    def __init__(self, event_listeners=(), on_connect=None):
+        self.event_listeners = list(event_listeners)
+        self.on_connect = on_connect
+        self.uri = None
+        self.db_name = DEFAULT_DB_NAME
+        self.options = {}
+        self._client = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        if not app.config.get("MONGO_URI"):
+            raise ValueError("MONGO_URI não encontrada nas variáveis de ambiente.")
+        self.uri = app.config["MONGO_URI"]
+        self.db_name = app.config.get("MONGO_DB_NAME", DEFAULT_DB_NAME)
+        self.options = {
+            option: app.config[name]
+            for name, (option, _) in POOL_SETTINGS.items()
+            if app.config.get(name) is not None
+        }
+        app.extensions["mongo"] = self
+
+    @property
+    def client(self):
+        if self._client is None or self._pid != os.getpid():
+            with self._lock:
+                if self._client is None or self._pid != os.getpid():
+                    if self.uri is None:
+                        raise RuntimeError("Mongo.init_app(app) não foi chamado.")
+                    client = MongoClient(
+                        self.uri, connect=False, event_listeners=self.event_listeners, **self.options
+                    )
+                    self._client, self._pid = client, os.getpid()
+                    if self.on_connect:
+                        try:
+                            self.on_connect(client[self.db_name])
+                        except Exception as e:
+                            print(f"Erro ao preparar o banco: {e}")
+        return self._client
+
+    @property
+    def db(self):
+        return self.client[self.db_name]
+
+    def collection(self, name):
+        """Proxy para `db[name]`, resolvido a cada uso; pode ser criado em tempo de import."""
+        return LocalProxy(lambda: self.db[name])
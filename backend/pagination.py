@@ -0,0 +1,176 @@
+from datetime import datetime, timedelta
+from urllib.parse import urlencode
+
+from bson.objectid import ObjectId
+from flask import jsonify, request
+
+from streaming import streaming_response, wants_stream
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+
+class QueryParamError(ValueError):
+    """Parâmetro de consulta inválido; a mensagem é devolvida ao cliente com status 400."""
+
+
+def parse_limit(args):
+    raw = args.get('limit')
+    if raw is None:
+        return DEFAULT_LIMIT
+    try:
+        limit = int(raw)
+    except ValueError:
+        raise QueryParamError("Parâmetro 'limit' deve ser um inteiro.")
+    if limit < 1 or limit > MAX_LIMIT:
+        raise QueryParamError(f"Parâmetro 'limit' deve estar entre 1 e {MAX_LIMIT}.")
+    return limit
+
+
+def parse_after(args):
+    raw = args.get('after')
+    if raw is None:
+        return None
+    if not ObjectId.is_valid(raw):
+        raise QueryParamError("Parâmetro 'after' inválido.")
+    return ObjectId(raw)
+
+
+def parse_fields(args, default_projection=None):
+    """Converte `fields=nome,local` em uma projeção de inclusão. Sem `fields`,
+    usa a projeção padrão da rota (tipicamente excluindo campos pesados)."""
+    raw = args.get('fields')
+    if not raw:
+        return default_projection
+    fields = [f.strip() for f in raw.split(',') if f.strip()]
+    if not fields or any(f.startswith('$') for f in fields):
+        raise QueryParamError("Parâmetro 'fields' inválido.")
+    return {f: 1 for f in fields}
+
+
+def parse_expand(args, expansions):
+    """Converte `expand=player,tournament` nos estágios `$lookup` correspondentes.
+
+    `expansions` mapeia cada nome aceito para `(coleção, campo local, campo de saída,
+    projeção)`. O campo local guarda o `_id` como texto, convertido no próprio `$lookup`;
+    só os campos da projeção são trazidos. Devolve a lista de estágios (vazia sem `expand`).
+    """
+    raw = args.get('expand')
+    if not raw:
+        return []
+    stages = []
+    for name in dict.fromkeys(n.strip() for n in raw.split(',') if n.strip()):
+        if name not in expansions:
+            raise QueryParamError(f"Parâmetro 'expand' aceita: {', '.join(expansions)}.")
+        collection_name, local_field, as_field, projection = expansions[name]
+        stages.append({"$lookup": {
+            "from": collection_name,
+            "let": {"id": {"$convert": {"input": f"${local_field}", "to": "objectId", "onError": None, "onNull": None}}},
+            "pipeline": [
+                {"$match": {"$expr": {"$eq": ["$_id", "$$id"]}}},
+                {"$project": {"_id": 0, **projection}},
+            ],
+            "as": as_field,
+        }})
+        stages.append({"$unwind": {"path": f"${as_field}", "preserveNullAndEmptyArrays": True}})
+    return stages
+
+
+def _expanded_projection(projection, lookups):
+    # Projeções de inclusão (`fields`) precisam manter os campos trazidos pelo `$lookup`.
+    if not projection or not lookups or 0 in projection.values():
+        return projection
+    return {**projection, **{stage["$lookup"]["as"]: 1 for stage in lookups if "$lookup" in stage}}
+
+
+def _query(collection, query, projection, limit=None, lookups=None):
+    """`find` ordenado por `_id`; com `lookups`, uma agregação equivalente em que os
+    `$lookup` rodam só sobre a página já limitada."""
+    if not lookups:
+        cursor = collection.find(query, projection).sort("_id", 1)
+        return cursor.limit(limit) if limit is not None else cursor
+    pipeline = [{"$match": query}, {"$sort": {"_id": 1}}]
+    if limit is not None:
+        pipeline.append({"$limit": limit})
+    pipeline.extend(lookups)
+    projection = _expanded_projection(projection, lookups)
+    if projection:
+        pipeline.append({"$project": projection})
+    return collection.aggregate(pipeline)
+
+
+def parse_date(value, param):
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise QueryParamError(f"Parâmetro '{param}' deve ser uma data ISO (AAAA-MM-DD).")
+
+
+def date_range(args, as_datetime=True):
+    """Filtro de intervalo a partir de `de`/`ate`. Datas gravadas como texto ISO
+    (ex.: `dataInicio` dos torneios) são comparadas como texto."""
+    condition = {}
+    start = args.get('de')
+    if start:
+        condition['$gte'] = parse_date(start, 'de') if as_datetime else start
+    end = args.get('ate')
+    if end:
+        parsed = parse_date(end, 'ate')
+        if not as_datetime:
+            condition['$lte'] = end
+        elif len(end) == 10:
+            # Data sem horário: inclui o dia inteiro.
+            condition['$lt'] = parsed + timedelta(days=1)
+        else:
+            condition['$lte'] = parsed
+    return condition
+
+
+def paginate(collection, query, args, default_projection=None, lookups=None):
+    """Página por chave (`_id` crescente): devolve os documentos e o cursor da
+    próxima página, ou None quando não há mais resultados."""
+    limit = parse_limit(args)
+    after = parse_after(args)
+    projection = parse_fields(args, default_projection)
+
+    if after is not None:
+        query = {**query, "_id": {"$gt": after}}
+
+    docs = list(_query(collection, query, projection, limit + 1, lookups))
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        next_cursor = str(docs[-1]["_id"])
+    return docs, next_cursor
+
+
+def export_cursor(collection, query, args, default_projection=None, lookups=None):
+    """Cursor para o modo streaming: mesmos filtros, `after` e `fields` da paginação,
+    mas `limit` só é aplicado quando informado."""
+    after = parse_after(args)
+    projection = parse_fields(args, default_projection)
+    if after is not None:
+        query = {**query, "_id": {"$gt": after}}
+
+    limit = parse_limit(args) if args.get('limit') is not None else None
+    return _query(collection, query, projection, limit, lookups)
+
+
+def paginated_response(collection, query, default_projection=None, lookups=None):
+    """Lista paginada no formato já usado pelas rotas (array JSON). O cursor da
+    próxima página vai nos cabeçalhos `X-Next-Cursor` e `Link`. `lookups` são os
+    estágios de `parse_expand` para embutir documentos relacionados.
+
+    Com `?stream=1` ou `Accept: application/x-ndjson`, devolve todos os resultados
+    em streaming (ver `streaming.streaming_response`)."""
+    if wants_stream():
+        return streaming_response(export_cursor(collection, query, request.args, default_projection, lookups))
+
+    docs, next_cursor = paginate(collection, query, request.args, default_projection, lookups)
+    response = jsonify(docs)
+    if next_cursor:
+        args = request.args.to_dict()
+        args['after'] = next_cursor
+        response.headers['X-Next-Cursor'] = next_cursor
+        response.headers['Link'] = f'<{request.base_url}?{urlencode(args)}>; rel="next"'
+    return response
@@ -0,0 +1,240 @@
+import hashlib
+import io
+import os
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from multiprocessing import get_context
+
+from bson.binary import Binary
+from pymongo import UpdateOne
+
+# Quantidade de PNGs de QR Code mantidos em memória por processo.
+QR_CACHE_SIZE = 512
+
+# Abaixo deste número de imagens a renderizar, o pool de processos não compensa.
+PROCESS_POOL_THRESHOLD = 32
+
+# Processos do pool de renderização (padrão: um por CPU).
+RENDER_WORKERS = int(os.getenv("PIX_RENDER_WORKERS", "0")) or None
+
+PIX_RECEIVER = {
+    "chave": os.getenv("PIX_CHAVE", "jlteambt@gmail.com"),
+    "nome": os.getenv("PIX_NOME", "ASSESP"),
+    "cidade": os.getenv("PIX_CIDADE", "Santos"),
+}
+
+
+# --- BR Code (EMV QRCPS-MPM) ---
+
+def _crc16_table():
+    table = []
+    for byte in range(256):
+        crc = byte << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x1021) if crc & 0x8000 else (crc << 1)
+        table.append(crc & 0xFFFF)
+    return table
+
+_CRC16_TABLE = _crc16_table()
+
+
+def crc16_ccitt(data):
+    """CRC16-CCITT (polinômio 0x1021, valor inicial 0xFFFF), exigido no campo 63 do BR Code."""
+    crc = 0xFFFF
+    for byte in data:
+        crc = ((crc << 8) & 0xFFFF) ^ _CRC16_TABLE[((crc >> 8) ^ byte) & 0xFF]
+    return crc
+
+
+def _emv(field_id, value):
+    return f"{field_id}{len(value):02d}{value}"
+
+
+def _ascii(text, max_length):
+    text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('ascii')
+    return text.strip()[:max_length]
+
+
+def build_br_code(chave, nome, cidade, valor, txid):
+    """Monta o payload PIX "copia e cola" (BR Code estático com valor e txid)."""
+    txid = re.sub(r'[^A-Za-z0-9]', '', txid)[:25] or '***'
+    payload = (
+        _emv("00", "01")
+        + _emv("26", _emv("00", "BR.GOV.BCB.PIX") + _emv("01", chave))
+        + _emv("52", "0000")
+        + _emv("53", "986")
+        + _emv("54", f"{float(valor):.2f}")
+        + _emv("58", "BR")
+        + _emv("59", _ascii(nome, 25))
+        + _emv("60", _ascii(cidade, 15))
+        + _emv("62", _emv("05", txid))
+        + "6304"
+    )
+    return payload + f"{crc16_ccitt(payload.encode('utf-8')):04X}"
+
+
+def build_pix_details(registration_id, valor, qr_code_hash, payload, receiver=PIX_RECEIVER):
+    """Conteúdo de `pixDetails`: o payload (já montado por `build_br_code`) e a
+    referência à imagem, nunca a imagem."""
+    return {
+        "pixCopiaECola": payload,
+        "qrCodeHash": qr_code_hash,
+        "qrCodeUrl": f"/registrations/{registration_id}/pix.png",
+        "valor": valor,
+        "chaveRecebedor": receiver["chave"],
+        "nomeRecebedor": receiver["nome"],
+        "cidadeRecebedor": receiver["cidade"],
+    }
+
+
+def payload_hash(payload):
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def render_qr_png(payload):
+    # qrcode (e o PIL, que ele usa para gerar o PNG) só é importado aqui, no primeiro uso.
+    import qrcode
+
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=qrcode.constants.ERROR_CORRECT_L,
+        box_size=10,
+        border=4,
+    )
+    qr.add_data(payload)
+    qr.make(fit=True)
+    img = qr.make_image(fill_color="black", back_color="white")
+
+    buffer = io.BytesIO()
+    img.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+_render_pool = None
+_render_pool_pid = None
+_render_pool_lock = threading.Lock()
+
+
+def render_pool():
+    """Pool de processos de renderização, criado no primeiro lote grande de cada
+    processo e reaproveitado depois. Os filhos são iniciados com `spawn`: um `fork`
+    a partir de um worker com threads e um MongoClient aberto não é seguro."""
+    global _render_pool, _render_pool_pid
+    with _render_pool_lock:
+        if _render_pool is None or _render_pool_pid != os.getpid():
+            _render_pool = ProcessPoolExecutor(max_workers=RENDER_WORKERS, mp_context=get_context("spawn"))
+            _render_pool_pid = os.getpid()
+        return _render_pool
+
+
+def _render_in_pool(payloads):
+    global _render_pool
+    pool = render_pool()
+    try:
+        return list(pool.map(render_qr_png, payloads, chunksize=16))
+    except BrokenProcessPool:
+        # Um filho morreu (ex.: OOM): descarta o pool, que será recriado no próximo
+        # lote, e renderiza este no próprio processo.
+        with _render_pool_lock:
+            if _render_pool is pool:
+                _render_pool = None
+        return [render_qr_png(payload) for payload in payloads]
+
+
+class QRCodeCache:
+    """PNGs de QR Code indexados pelo hash do payload PIX.
+
+    Camada LRU em memória na frente da coleção `pix_images` (`_id` = hash), de modo
+    que cada payload é renderizado uma única vez e as inscrições guardam apenas o hash.
+    """
+
+    def __init__(self, collection, maxsize=QR_CACHE_SIZE):
+        self.collection = collection
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _remember(self, key, png):
+        with self._lock:
+            self._items[key] = png
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def _cached(self, key):
+        with self._lock:
+            png = self._items.get(key)
+            if png is not None:
+                self._items.move_to_end(key)
+            return png
+
+    def get_or_render(self, payload):
+        """Devolve (hash, png), renderizando e persistindo só se o payload for novo."""
+        key = payload_hash(payload)
+        png = self.get(key)
+        if png is None:
+            png = render_qr_png(payload)
+            self.collection.update_one(
+                {"_id": key},
+                {"$setOnInsert": {"png": Binary(png), "criadoEm": datetime.utcnow()}},
+                upsert=True,
+            )
+            self._remember(key, png)
+        return key, png
+
+    def get_or_render_many(self, payloads):
+        """Versão em lote de `get_or_render`: uma consulta `$in` para as imagens já
+        persistidas, renderização das faltantes no pool de processos (`render_pool`)
+        e uma única escrita em lote. Devolve {payload: hash}."""
+        keys = {payload: payload_hash(payload) for payload in payloads}
+        with self._lock:
+            missing = {key for key in keys.values() if key not in self._items}
+        if missing:
+            for doc in self.collection.find({"_id": {"$in": list(missing)}}, {"_id": 1}):
+                missing.discard(doc["_id"])
+
+        to_render = [payload for payload, key in keys.items() if key in missing]
+        if len(to_render) >= PROCESS_POOL_THRESHOLD:
+            rendered = _render_in_pool(to_render)
+        else:
+            rendered = [render_qr_png(payload) for payload in to_render]
+
+        if rendered:
+            now = datetime.utcnow()
+            self.collection.bulk_write([
+                UpdateOne(
+                    {"_id": keys[payload]},
+                    {"$setOnInsert": {"png": Binary(png), "criadoEm": now}},
+                    upsert=True,
+                )
+                for payload, png in zip(to_render, rendered)
+            ], ordered=False)
+            for payload, png in zip(to_render, rendered):
+                self._remember(keys[payload], png)
+        return keys
+
+    def discard(self, keys):
+        """Apaga as imagens (coleção e memória); devolve quantas saíram da coleção."""
+        keys = list(keys)
+        if not keys:
+            return 0
+        with self._lock:
+            for key in keys:
+                self._items.pop(key, None)
+        return self.collection.delete_many({"_id": {"$in": keys}}).deleted_count
+
+    def get(self, key):
+        png = self._cached(key)
+        if png is not None:
+            return png
+        doc = self.collection.find_one({"_id": key}, {"png": 1})
+        if not doc:
+            return None
+        png = bytes(doc["png"])
+        self._remember(key, png)
+        return png
@@ -0,0 +1,252 @@
+import json
+
+from bson.objectid import ObjectId
+from pymongo import UpdateOne
+
+from exclusao import ACTIVE_FILTER
+from grupos import FASE_GRUPOS
+
+# Fase alcançada na chave, da melhor para a pior; a posição é a distância até a final
+# mais um (o campeão fica antes da final). Rodadas anteriores às oitavas valem Participação.
+FASES = ["Campeão", "Final", "Semifinal", "Quartas de Final", "Oitavas de Final"]
+PARTICIPACAO = "Participação"
+
+PONTOS_PADRAO = {
+    "Campeão": 1000, "Final": 600, "Semifinal": 360, "Quartas de Final": 180, "Oitavas de Final": 90,
+    PARTICIPACAO: 45,
+}
+
+# Campos das partidas usados para saber até onde cada jogador chegou.
+RANKING_MATCH_PROJECTION = {"rodadaNumero": 1, "rodadasTotal": 1, "vencedorId": 1, "jogador1": 1, "jogador2": 1}
+
+# Campos devolvidos por GET /rankings.
+RANKING_LIST_PROJECTION = {"_id": 0, "jogadorId": 1, "nome": 1, "genero": 1, "categoria": 1, "pontos": 1}
+
+
+class RankingConfigError(ValueError):
+    """RANKING_POINTS inválida."""
+
+
+def tabela_pontos(raw=None):
+    """Pontos por fase: PONTOS_PADRAO com as substituições de `raw`, um JSON como
+    `{"Campeão": 2000, "Participação": 10}` (variável RANKING_POINTS)."""
+    tabela = dict(PONTOS_PADRAO)
+    if not raw:
+        return tabela
+    try:
+        valores = json.loads(raw)
+    except ValueError:
+        raise RankingConfigError("RANKING_POINTS deve ser um objeto JSON {fase: pontos}.")
+    if not isinstance(valores, dict):
+        raise RankingConfigError("RANKING_POINTS deve ser um objeto JSON {fase: pontos}.")
+    for fase, pontos in valores.items():
+        if fase not in PONTOS_PADRAO:
+            raise RankingConfigError(f"Fase desconhecida em RANKING_POINTS: '{fase}'. Aceitas: {', '.join(PONTOS_PADRAO)}.")
+        if not isinstance(pontos, int) or isinstance(pontos, bool) or pontos < 0:
+            raise RankingConfigError(f"Pontos da fase '{fase}' devem ser um inteiro não negativo.")
+        tabela[fase] = pontos
+    return tabela
+
+
+def ranking_key(categoria, jogador_id):
+    return f"{categoria}:{jogador_id}"
+
+
+def nome_fase(distancia):
+    return FASES[distancia + 1] if distancia + 1 < len(FASES) else PARTICIPACAO
+
+
+def colocacoes(partidas):
+    """`{jogador_id: distancia}`: a rodada mais avançada em que cada jogador entrou,
+    contada até a final (0 = final; -1 = campeão)."""
+    melhor = {}
+    for partida in partidas:
+        distancia = partida["rodadasTotal"] - partida["rodadaNumero"]
+        for slot in ("jogador1", "jogador2"):
+            jogador = partida.get(slot)
+            if not jogador or jogador["id"] == "BYE":
+                continue
+            d = -1 if distancia == 0 and partida.get("vencedorId") == jogador["id"] else distancia
+            if d < melhor.get(jogador["id"], d + 1):
+                melhor[jogador["id"]] = d
+    return melhor
+
+
+def colocacoes_partida(partida):
+    """Colocações que o resultado de uma partida da chave define, sem ler as demais:
+    o perdedor para na rodada da partida e o vencedor chega à seguinte (na final,
+    campeão). Vale para um resultado novo ou repetido, não para uma correção."""
+    distancia = partida["rodadasTotal"] - partida["rodadaNumero"]
+    vencedor = partida["vencedorId"]
+    return {
+        jogador["id"]: distancia - 1 if jogador["id"] == vencedor else distancia
+        for jogador in (partida.get("jogador1"), partida.get("jogador2"))
+        if jogador and jogador["id"] != "BYE"
+    }
+
+
+def atualizar_ranking(db, tabela, torneio_id, categoria, partida=None):
+    """Atualiza a contribuição do torneio no ranking da categoria.
+
+    Sem `partida`, lê a chave da categoria (uma consulta, limitada ao tamanho da
+    chave, não ao histórico) e recalcula a categoria inteira, removendo quem saiu da
+    chave (ex.: novo sorteio ou correção de resultado). Com `partida` (a partida com
+    o `vencedorId` recém-registrado), só os dois jogadores dela, cujas colocações vêm
+    da própria partida, sem ler a chave. Grava só as diferenças:
+    `resultados.<torneioId>` com a fase e os pontos, e `pontos` com `$inc` da
+    diferença, em um único `bulk_write`.
+    """
+    anteriores_query = {"categoria": categoria, f"resultados.{torneio_id}": {"$exists": True}}
+    if partida is None:
+        atuais = colocacoes(db.matches.find(
+            {"torneioId": torneio_id, "categoriaNome": categoria, "fase": {"$ne": FASE_GRUPOS}},
+            RANKING_MATCH_PROJECTION,
+        ))
+    else:
+        atuais = colocacoes_partida(partida)
+        anteriores_query = {"_id": {"$in": [ranking_key(categoria, j) for j in atuais]}, **anteriores_query}
+    anteriores = {
+        doc["jogadorId"]: doc["resultados"][torneio_id]
+        for doc in db.rankings.find(anteriores_query, {"jogadorId": 1, f"resultados.{torneio_id}": 1})
+    }
+
+    novos = {}
+    for jogador_id, distancia in atuais.items():
+        fase = nome_fase(distancia)
+        resultado = {"fase": fase, "pontos": tabela[fase]}
+        if anteriores.get(jogador_id) != resultado:
+            novos[jogador_id] = resultado
+    # Nome e gênero vêm do cadastro; jogadores excluídos ficam fora do ranking.
+    jogadores = {}
+    if novos:
+        jogadores = {
+            str(doc["_id"]): doc
+            for doc in db.players.find(
+                {"_id": {"$in": [ObjectId(j) for j in novos if ObjectId.is_valid(j)]}, **ACTIVE_FILTER},
+                {"nomeCompleto": 1, "genero": 1},
+            )
+        }
+
+    operacoes = []
+    for jogador_id, resultado in novos.items():
+        jogador = jogadores.get(jogador_id)
+        if jogador is None:
+            continue
+        anterior = anteriores.get(jogador_id, {}).get("pontos", 0)
+        operacoes.append(UpdateOne(
+            {"_id": ranking_key(categoria, jogador_id)},
+            {
+                "$set": {
+                    f"resultados.{torneio_id}": resultado, "jogadorId": jogador_id, "categoria": categoria,
+                    "nome": jogador["nomeCompleto"], "genero": jogador.get("genero"),
+                },
+                "$inc": {"pontos": resultado["pontos"] - anterior},
+            },
+            upsert=True,
+        ))
+    removidos = []
+    for jogador_id, anterior in anteriores.items():
+        if jogador_id not in atuais:
+            removidos.append(ranking_key(categoria, jogador_id))
+            operacoes.append(UpdateOne(
+                {"_id": removidos[-1]},
+                {"$unset": {f"resultados.{torneio_id}": ""}, "$inc": {"pontos": -anterior["pontos"]}},
+            ))
+    if operacoes:
+        db.rankings.bulk_write(operacoes, ordered=False)
+        _apagar_vazios(db, removidos)
+    return len(operacoes)
+
+
+def _apagar_vazios(db, chaves):
+    """Remove as entradas que ficaram sem nenhum torneio."""
+    if chaves:
+        db.rankings.delete_many({"_id": {"$in": chaves}, "resultados": {}})
+
+
+def retirar_torneio(db, torneio_id, batch_size):
+    """Tira a contribuição de um torneio excluído dos rankings. Os jogadores afetados
+    vêm das partidas do torneio, então deve rodar antes delas serem apagadas."""
+    chaves = sorted({
+        ranking_key(partida["categoriaNome"], jogador["id"])
+        for partida in db.matches.find({"torneioId": torneio_id}, {"categoriaNome": 1, "jogador1.id": 1, "jogador2.id": 1})
+        for jogador in (partida.get("jogador1"), partida.get("jogador2"))
+        if jogador and jogador.get("id") not in (None, "BYE")
+    })
+    for inicio in range(0, len(chaves), batch_size):
+        operacoes = [
+            UpdateOne(
+                {"_id": doc["_id"]},
+                {"$unset": {f"resultados.{torneio_id}": ""}, "$inc": {"pontos": -doc["resultados"][torneio_id]["pontos"]}},
+            )
+            for doc in db.rankings.find(
+                {"_id": {"$in": chaves[inicio:inicio + batch_size]}, f"resultados.{torneio_id}": {"$exists": True}},
+                {f"resultados.{torneio_id}": 1},
+            )
+        ]
+        if operacoes:
+            db.rankings.bulk_write(operacoes, ordered=False)
+            _apagar_vazios(db, chaves[inicio:inicio + batch_size])
+        yield "rankings", len(operacoes)
+
+
+def retirar_jogador(db, jogador_id):
+    yield "rankings", db.rankings.delete_many({"jogadorId": jogador_id}).deleted_count
+
+
+def rebuild_pipeline(tabela):
+    """Agregação sobre `matches` que recalcula todos os rankings e os grava com `$out`
+    (a coleção é substituída de uma vez; os índices são mantidos)."""
+    pontos = [tabela[fase] for fase in FASES]
+    return [
+        {"$match": {"fase": {"$ne": FASE_GRUPOS}, "rodadasTotal": {"$gte": 1}}},
+        {"$project": {
+            "torneioId": 1, "categoriaNome": 1, "rodadaNumero": 1, "rodadasTotal": 1, "vencedorId": 1,
+            "jogador": ["$jogador1", "$jogador2"],
+        }},
+        {"$unwind": "$jogador"},
+        {"$match": {"jogador.id": {"$nin": [None, "BYE"]}}},
+        {"$group": {
+            "_id": {"torneioId": "$torneioId", "categoria": "$categoriaNome", "jogadorId": "$jogador.id"},
+            "distancia": {"$min": {"$cond": [
+                {"$and": [{"$eq": ["$rodadaNumero", "$rodadasTotal"]}, {"$eq": ["$vencedorId", "$jogador.id"]}]},
+                -1,
+                {"$subtract": ["$rodadasTotal", "$rodadaNumero"]},
+            ]}},
+        }},
+        {"$project": {
+            "fase": {"$ifNull": [{"$arrayElemAt": [FASES, {"$add": ["$distancia", 1]}]}, PARTICIPACAO]},
+            "pontos": {"$ifNull": [{"$arrayElemAt": [pontos, {"$add": ["$distancia", 1]}]}, tabela[PARTICIPACAO]]},
+        }},
+        {"$group": {
+            "_id": {"categoria": "$_id.categoria", "jogadorId": "$_id.jogadorId"},
+            "pontos": {"$sum": "$pontos"},
+            "resultados": {"$push": {"k": "$_id.torneioId", "v": {"fase": "$fase", "pontos": "$pontos"}}},
+        }},
+        {"$lookup": {
+            "from": "players",
+            "let": {"id": {"$convert": {"input": "$_id.jogadorId", "to": "objectId", "onError": None, "onNull": None}}},
+            "pipeline": [
+                {"$match": {"$expr": {"$eq": ["$_id", "$$id"]}, **ACTIVE_FILTER}},
+                {"$project": {"_id": 0, "nomeCompleto": 1, "genero": 1}},
+            ],
+            "as": "jogador",
+        }},
+        # Jogadores excluídos saem do ranking.
+        {"$unwind": "$jogador"},
+        {"$project": {
+            "_id": {"$concat": ["$_id.categoria", ":", "$_id.jogadorId"]},
+            "jogadorId": "$_id.jogadorId",
+            "categoria": "$_id.categoria",
+            "nome": "$jogador.nomeCompleto",
+            "genero": "$jogador.genero",
+            "pontos": 1,
+            "resultados": {"$arrayToObject": "$resultados"},
+        }},
+        {"$out": "rankings"},
+    ]
+
+
+def recalcular_rankings(db, tabela):
+    db.matches.aggregate(rebuild_pipeline(tabela), allowDiskUse=True)
+    return db.rankings.estimated_document_count()
@@ -0,0 +1,229 @@
+"""Gerador de dados sintéticos para desenvolvimento e benchmarks.
+
+Uso (a partir de backend/):
+
+    python seed.py --scale 1k --uri mongodb://localhost:27017 --db torneiobt_bench
+
+Escalas disponíveis: 1k, 10k, 100k e 1M documentos no total (aproximadamente).
+Gera jogadores, torneios com categorias, inscrições em status de pagamento variados
+e chaves já sorteadas para as categorias com inscritos confirmados. Com a mesma
+`--seed`, os dados gerados são os mesmos.
+"""
+import argparse
+import random
+import unicodedata
+from datetime import datetime, timedelta
+
+from bson.objectid import ObjectId
+
+from busca import search_fields
+from draw import distribuir_chave, montar_chave
+from indexes import ensure_indexes
+from ranking import atualizar_ranking, tabela_pontos
+from vagas import reconcile_slots
+
+SCALES = {"1k": 1_000, "10k": 10_000, "100k": 100_000, "1M": 1_000_000}
+
+BATCH_SIZE = 5_000
+
+NOMES = [
+    "Ana", "Beatriz", "Camila", "Daniela", "Fernanda", "Gabriela", "Helena", "Isabela", "Júlia", "Larissa",
+    "Mariana", "Natália", "Patrícia", "Rafaela", "Sofia", "Vitória", "André", "Bruno", "Carlos", "Diego",
+    "Eduardo", "Felipe", "Gustavo", "Henrique", "João", "Lucas", "Marcelo", "Otávio", "Pedro", "Rafael",
+    "Sérgio", "Thiago", "Vinícius",
+]
+SOBRENOMES = [
+    "Silva", "Santos", "Oliveira", "Souza", "Rodrigues", "Ferreira", "Alves", "Pereira", "Lima", "Gomes",
+    "Costa", "Ribeiro", "Martins", "Carvalho", "Araújo", "Melo", "Barbosa", "Cardoso", "Conceição", "Simões",
+]
+CIDADES = ["Santos", "São Vicente", "Guarujá", "Praia Grande", "Bertioga", "Cubatão", "Ubatuba", "Florianópolis"]
+NIVEIS = ["Iniciante", "Intermediário", "Avançado", "Profissional"]
+CATEGORIAS = [
+    ("Masculino A", 120), ("Masculino B", 100), ("Masculino C", 80), ("Feminino A", 120),
+    ("Feminino B", 100), ("Feminino C", 80), ("Misto Aberto", 150), ("Iniciante", 60),
+]
+STATUS_PESOS = [("Confirmado", 0.6), ("Pendente", 0.3), ("Cancelado", 0.1)]
+
+
+def _ascii(text):
+    return unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('ascii').lower()
+
+
+def _batched_insert(collection, docs):
+    batch = []
+    for doc in docs:
+        batch.append(doc)
+        if len(batch) >= BATCH_SIZE:
+            collection.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        collection.insert_many(batch, ordered=False)
+
+
+def _status(rng):
+    roll = rng.random()
+    for status, peso in STATUS_PESOS:
+        if roll < peso:
+            return status
+        roll -= peso
+    return STATUS_PESOS[-1][0]
+
+
+def plan(total):
+    """Divide o total de documentos entre as coleções."""
+    players = max(int(total * 0.35), 16)
+    tournaments = max(int(total * 0.005), 1)
+    registrations = max(int(total * 0.5), 16)
+    return {"players": players, "tournaments": tournaments, "registrations": registrations}
+
+
+def generate_players(rng, count, base_date):
+    for i in range(count):
+        nome = f"{rng.choice(NOMES)} {rng.choice(SOBRENOMES)} {rng.choice(SOBRENOMES)}"
+        player = {
+            "_id": ObjectId(),
+            "nomeCompleto": nome,
+            "email": f"{_ascii(nome).replace(' ', '.')}.{i}@exemplo.com.br",
+            "dataNascimento": f"{rng.randint(1960, 2010)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            "nivelHabilidade": rng.choice(NIVEIS),
+            "genero": rng.choice(["Masculino", "Feminino"]),
+            "dataCadastro": base_date - timedelta(days=rng.randint(0, 1500)),
+        }
+        player.update(search_fields(player))
+        yield player
+
+
+def generate_tournaments(rng, count, base_date):
+    for i in range(count):
+        inicio = base_date + timedelta(days=rng.randint(-720, 180))
+        categorias = rng.sample(CATEGORIAS, rng.randint(3, len(CATEGORIAS)))
+        yield {
+            "_id": ObjectId(),
+            "nome": f"Open de Beach Tennis {rng.choice(CIDADES)} {i + 1}",
+            "local": rng.choice(CIDADES),
+            "dataInicio": inicio.strftime("%Y-%m-%d"),
+            "dataFim": (inicio + timedelta(days=2)).strftime("%Y-%m-%d"),
+            "dataLimiteInscricao": (inicio - timedelta(days=7)).strftime("%Y-%m-%d"),
+            "categorias": [
+                {"nome": nome, "valorInscricao": valor, "vagas": rng.choice([16, 32, 64, 128])}
+                for nome, valor in categorias
+            ],
+            "status": "Finalizado" if inicio < base_date else "Inscrições Abertas",
+            "dataCriacao": inicio - timedelta(days=60),
+        }
+
+
+def generate_registrations(rng, count, tournaments, player_ids):
+    """Inscrições sem duplicar (jogador, categoria) e sem ultrapassar as vagas."""
+    slots = [(t, cat) for t in tournaments for cat in t["categorias"]]
+    filled = {}
+    taken = set()
+    produced = 0
+    attempts = 0
+    while produced < count and attempts < count * 4:
+        attempts += 1
+        tournament, cat = rng.choice(slots)
+        key = (tournament["_id"], cat["nome"])
+        if filled.get(key, 0) >= cat["vagas"]:
+            continue
+        jogador_id = rng.choice(player_ids)
+        if (key, jogador_id) in taken:
+            continue
+        taken.add((key, jogador_id))
+        filled[key] = filled.get(key, 0) + 1
+        produced += 1
+        yield {
+            "torneioId": str(tournament["_id"]),
+            "jogadorId": str(jogador_id),
+            "categoriaInscrita": {"nome": cat["nome"], "valorInscricao": cat["valorInscricao"]},
+            "dataInscricao": datetime.strptime(tournament["dataInicio"], "%Y-%m-%d") - timedelta(days=rng.randint(8, 60)),
+            "statusPagamento": _status(rng),
+            "pixDetails": {},
+        }
+
+
+def generate_brackets(rng, registrations, names):
+    confirmed = {}
+    for reg in registrations:
+        if reg["statusPagamento"] == "Confirmado":
+            key = (reg["torneioId"], reg["categoriaInscrita"]["nome"])
+            confirmed.setdefault(key, []).append({"id": reg["jogadorId"], "nome": names[reg["jogadorId"]]})
+    for (torneio_id, categoria_nome), jogadores in confirmed.items():
+        if len(jogadores) < 2:
+            continue
+        confrontos, _, _ = distribuir_chave(jogadores, rng)
+        yield from montar_chave(torneio_id, categoria_nome, confrontos)
+
+
+def seed(db, scale="1k", seed_value=42, drop=True):
+    """Popula `db` e devolve a quantidade de documentos por coleção."""
+    total = SCALES[scale] if isinstance(scale, str) else int(scale)
+    counts = plan(total)
+    rng = random.Random(seed_value)
+    base_date = datetime(2026, 1, 1)
+
+    if drop:
+        for name in ("players", "tournaments", "registrations", "matches", "category_slots", "rankings"):
+            db[name].drop()
+    ensure_indexes(db)
+
+    players = list(generate_players(rng, counts["players"], base_date))
+    _batched_insert(db.players, players)
+    names = {str(p["_id"]): p["nomeCompleto"] for p in players}
+
+    tournaments = list(generate_tournaments(rng, counts["tournaments"], base_date))
+    _batched_insert(db.tournaments, tournaments)
+
+    registrations = list(generate_registrations(rng, counts["registrations"], tournaments, [p["_id"] for p in players]))
+    _batched_insert(db.registrations, registrations)
+
+    matches = list(generate_brackets(rng, registrations, names))
+    _batched_insert(db.matches, matches)
+
+    reconcile_slots(db)
+    tabela = tabela_pontos()
+    for torneio_id, categoria_nome in sorted({(m["torneioId"], m["categoriaNome"]) for m in matches}):
+        atualizar_ranking(db, tabela, torneio_id, categoria_nome)
+    return {
+        "players": len(players),
+        "tournaments": len(tournaments),
+        "registrations": len(registrations),
+        "matches": len(matches),
+        "rankings": db.rankings.estimated_document_count(),
+    }
+
+
+def memory_client():
+    """Cliente MongoDB em memória (mongomock), para rodar sem um `mongod` local."""
+    try:
+        import mongomock
+    except ImportError:
+        raise SystemExit("O modo em memória requer o pacote 'mongomock' (pip install mongomock).")
+    return mongomock.MongoClient()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Popula o banco com dados sintéticos.")
+    parser.add_argument("--scale", default="1k", help="1k, 10k, 100k, 1M ou um número de documentos")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--uri", default="mongodb://localhost:27017")
+    parser.add_argument("--db", default="torneiobt_bench")
+    parser.add_argument("--memory", action="store_true", help="usa um MongoDB em memória (mongomock)")
+    parser.add_argument("--drop", action="store_true", help="apaga as coleções existentes antes de popular")
+    args = parser.parse_args()
+
+    if args.memory:
+        client = memory_client()
+    else:
+        from pymongo import MongoClient
+        client = MongoClient(args.uri)
+
+    db = client[args.db]
+    if not args.drop and db.players.estimated_document_count():
+        raise SystemExit(f"O banco '{args.db}' já tem dados; use --drop para apagá-los.")
+    counts = seed(db, args.scale if args.scale in SCALES else int(args.scale), args.seed)
+    print(", ".join(f"{name}: {count}" for name, count in counts.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from bson.decimal128 import Decimal128
+from bson.objectid import ObjectId
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # opcional: sem ele, o módulo json da biblioteca padrão
+    orjson = None
+
+
+def _default(value):
+    """Tipos do MongoDB que o JSON não conhece, em qualquer nível do documento:
+    ObjectId vira string, datas viram ISO 8601 e decimais viram string (sem perda
+    de precisão, como no `jsonify` padrão do Flask)."""
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal128):
+        return str(value.to_decimal())
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"{type(value).__name__} não é serializável")
+
+
+_encoder = json.JSONEncoder(default=_default, ensure_ascii=False, separators=(",", ":"))
+
+
+def json_dumps(obj):
+    return _encoder.encode(obj).encode("utf-8")
+
+
+def orjson_dumps(obj):
+    return orjson.dumps(obj, default=_default)
+
+
+# Serializa direto para bytes UTF-8, sem alterar os documentos.
+dumps = json_dumps if orjson is None else orjson_dumps
+loads = json.loads if orjson is None else orjson.loads
+
+
+class MongoJSONProvider(DefaultJSONProvider):
+    """Provider JSON da aplicação: `jsonify`, `current_app.json.dumps` e
+    `request.get_json` passam por `dumps`/`loads` deste módulo (orjson, se instalado).
+    As chaves saem na ordem do documento, sem ordenação."""
+
+    encode = staticmethod(dumps)
+
+    def dumps(self, obj, **kwargs):
+        return self.encode(obj).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        return loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.encode(obj), mimetype=self.mimetype)
@@ -0,0 +1,42 @@
+from flask import Response, request, stream_with_context
+
+from serializer import dumps
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+# Documentos trazidos do servidor por lote do cursor durante a exportação.
+STREAM_BATCH_SIZE = 500
+
+
+def wants_stream():
+    """Modo de streaming: `Accept: application/x-ndjson` ou `?stream=1`."""
+    return request.args.get('stream') == '1' or wants_ndjson()
+
+
+def wants_ndjson():
+    best = request.accept_mimetypes.best_match(['application/json', NDJSON_MIMETYPE])
+    return best == NDJSON_MIMETYPE
+
+
+def _ndjson_lines(cursor):
+    for doc in cursor:
+        yield dumps(doc) + b'\n'
+
+
+def _json_array_chunks(cursor):
+    # Array JSON enviado em pedaços: o primeiro byte sai antes de o cursor terminar.
+    yield b'['
+    first = True
+    for doc in cursor:
+        yield (dumps(doc) if first else b',' + dumps(doc))
+        first = False
+    yield b']'
+
+
+def streaming_response(cursor):
+    """Responde iterando o cursor do PyMongo lote a lote, sem montar a lista em memória.
+    NDJSON quando o cliente aceita `application/x-ndjson`; senão, array JSON fragmentado."""
+    cursor = cursor.batch_size(STREAM_BATCH_SIZE)
+    if wants_ndjson():
+        return Response(stream_with_context(_ndjson_lines(cursor)), mimetype=NDJSON_MIMETYPE)
+    return Response(stream_with_context(_json_array_chunks(cursor)), mimetype='application/json')
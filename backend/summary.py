@@ -0,0 +1,73 @@
+from vagas import OCCUPYING_STATUSES
+
+PAYMENT_STATUSES = ['Pendente', 'Confirmado', 'Cancelado']
+
+# Chave usada para status ou categoria ausentes ou inválidos (chaves JSON são strings).
+DESCONHECIDO = 'Desconhecido'
+
+
+def _chave(valor):
+    return valor if isinstance(valor, str) and valor else DESCONHECIDO
+
+
+def _empty_category(nome, vagas):
+    return {
+        "nome": nome,
+        "vagas": vagas,
+        "inscritos": 0,
+        "porStatus": {status: 0 for status in PAYMENT_STATUSES},
+        "receitaConfirmada": 0,
+        "receitaPrevista": 0,
+    }
+
+
+def tournament_summary(registrations_collection, tournament):
+    """Resumo do painel do organizador em uma única agregação `$facet`: inscritos por
+    categoria, contagem por status de pagamento e receita confirmada e prevista."""
+    torneio_id = str(tournament["_id"])
+    facets = next(registrations_collection.aggregate([
+        {"$match": {"torneioId": torneio_id}},
+        {"$facet": {
+            "porCategoria": [
+                {"$group": {
+                    "_id": {"categoria": "$categoriaInscrita.nome", "status": "$statusPagamento"},
+                    "inscricoes": {"$sum": 1},
+                    "valor": {"$sum": "$categoriaInscrita.valorInscricao"},
+                }},
+            ],
+            "porStatus": [
+                {"$group": {"_id": "$statusPagamento", "inscricoes": {"$sum": 1}}},
+            ],
+        }},
+    ]), {"porCategoria": [], "porStatus": []})
+
+    categories = {cat["nome"]: _empty_category(cat["nome"], cat.get("vagas")) for cat in tournament.get("categorias", [])}
+    revenue = {"confirmada": 0, "prevista": 0}
+    for row in facets["porCategoria"]:
+        nome, status = _chave(row["_id"].get("categoria")), _chave(row["_id"].get("status"))
+        entry = categories.setdefault(nome, _empty_category(nome, None))
+        entry["porStatus"][status] = entry["porStatus"].get(status, 0) + row["inscricoes"]
+        if status in OCCUPYING_STATUSES:
+            entry["inscritos"] += row["inscricoes"]
+            entry["receitaPrevista"] += row["valor"]
+            revenue["prevista"] += row["valor"]
+        if status == 'Confirmado':
+            entry["receitaConfirmada"] += row["valor"]
+            revenue["confirmada"] += row["valor"]
+
+    for entry in categories.values():
+        entry["vagasRestantes"] = None if entry["vagas"] is None else max(entry["vagas"] - entry["inscritos"], 0)
+
+    by_status = {status: 0 for status in PAYMENT_STATUSES}
+    for row in facets["porStatus"]:
+        status = _chave(row["_id"])
+        by_status[status] = by_status.get(status, 0) + row["inscricoes"]
+
+    return {
+        "torneioId": torneio_id,
+        "totalInscricoes": sum(by_status.values()),
+        "porStatus": by_status,
+        "receitaConfirmada": revenue["confirmada"],
+        "receitaPrevista": revenue["prevista"],
+        "categorias": list(categories.values()),
+    }
@@ -0,0 +1,156 @@
+from bson.objectid import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+# Inscrições nestes status ocupam uma vaga da categoria; canceladas liberam a vaga.
+OCCUPYING_STATUSES = ('Pendente', 'Confirmado')
+
+
+def occupies(status):
+    return status in OCCUPYING_STATUSES
+
+
+def slot_key(torneio_id, categoria_nome):
+    return f"{torneio_id}:{categoria_nome}"
+
+
+def category_vagas(tournament, categoria_nome):
+    for cat in tournament.get('categorias', []):
+        if cat['nome'] == categoria_nome:
+            return cat['vagas']
+    return None
+
+
+def sync_slots(slots_collection, torneio_id, categorias):
+    """Cria/atualiza o contador de cada categoria com as vagas declaradas no torneio."""
+    if not categorias:
+        return
+    slots_collection.bulk_write([
+        UpdateOne(
+            {"_id": slot_key(torneio_id, cat["nome"])},
+            {
+                "$set": {"vagas": cat["vagas"]},
+                "$setOnInsert": {"torneioId": torneio_id, "categoriaNome": cat["nome"], "ocupadas": 0},
+            },
+            upsert=True,
+        )
+        for cat in categorias
+    ], ordered=False)
+
+
+def reserve(slots_collection, torneio_id, categoria_nome, vagas, quantidade=1):
+    """Reserva `quantidade` vagas em uma única operação atômica.
+
+    O filtro `ocupadas < vagas - quantidade + 1` e o `$inc` são avaliados juntos pelo
+    servidor, então reservas concorrentes nunca ultrapassam o limite. Se o contador não
+    existir, o upsert o cria; se existir mas estiver cheio, o upsert colide com o `_id`
+    existente e a reserva é recusada.
+    """
+    if quantidade <= 0:
+        return True
+    if quantidade > vagas:
+        return False
+    try:
+        slots_collection.find_one_and_update(
+            {"_id": slot_key(torneio_id, categoria_nome), "ocupadas": {"$lt": vagas - quantidade + 1}},
+            {
+                "$inc": {"ocupadas": quantidade},
+                "$set": {"vagas": vagas},
+                "$setOnInsert": {"torneioId": torneio_id, "categoriaNome": categoria_nome},
+            },
+            projection={"_id": 1},
+            upsert=True,
+        )
+        return True
+    except DuplicateKeyError:
+        return False
+
+
+def reserve_up_to(slots_collection, torneio_id, categoria_nome, vagas, quantidade, attempts=5):
+    """Reserva até `quantidade` vagas (importação em lote) e devolve quantas conseguiu."""
+    for _ in range(attempts):
+        if reserve(slots_collection, torneio_id, categoria_nome, vagas, quantidade):
+            return quantidade
+        slot = slots_collection.find_one({"_id": slot_key(torneio_id, categoria_nome)}, {"ocupadas": 1})
+        quantidade = min(quantidade, vagas - (slot or {}).get("ocupadas", 0))
+        if quantidade <= 0:
+            return 0
+    return 0
+
+
+def release(slots_collection, torneio_id, categoria_nome, quantidade=1):
+    if quantidade <= 0:
+        return
+    slots_collection.update_one(
+        {"_id": slot_key(torneio_id, categoria_nome), "ocupadas": {"$gte": quantidade}},
+        {"$inc": {"ocupadas": -quantidade}},
+    )
+
+
+def release_many(slots_collection, counts):
+    """Libera vagas de várias categorias de uma vez: `counts` = {(torneioId, categoria): n}."""
+    operations = [
+        UpdateOne(
+            {"_id": slot_key(torneio_id, categoria_nome), "ocupadas": {"$gte": n}},
+            {"$inc": {"ocupadas": -n}},
+        )
+        for (torneio_id, categoria_nome), n in counts.items() if n > 0
+    ]
+    if operations:
+        slots_collection.bulk_write(operations, ordered=False)
+
+
+def transition(slots_collection, old, new, vagas_of):
+    """Ajusta os contadores quando uma inscrição muda de categoria ou de status.
+
+    `old`/`new` são tuplas (torneioId, categoria, statusPagamento); `old` é None em
+    inscrições novas. A nova vaga é reservada antes de a antiga ser liberada.
+    Devolve False se a categoria de destino estiver lotada."""
+    old_key = (old[0], old[1]) if old and occupies(old[2]) else None
+    new_key = (new[0], new[1]) if new and occupies(new[2]) else None
+    if old_key == new_key:
+        return True
+    if new_key:
+        vagas = vagas_of(new_key[1])
+        if vagas is None or not reserve(slots_collection, new_key[0], new_key[1], vagas):
+            return False
+    if old_key:
+        release(slots_collection, *old_key)
+    return True
+
+
+def reconcile_slots(db, torneio_id=None):
+    """Recalcula os contadores a partir das inscrições (uma agregação) e das vagas
+    declaradas nos torneios. Corrige desvios deixados por falhas entre a reserva e a
+    gravação da inscrição."""
+    match = {"statusPagamento": {"$in": list(OCCUPYING_STATUSES)}}
+    tournaments_query = {}
+    if torneio_id:
+        match["torneioId"] = torneio_id
+        tournaments_query["_id"] = ObjectId(torneio_id)
+    counts = {
+        (row["_id"]["torneioId"], row["_id"]["categoria"]): row["total"]
+        for row in db.registrations.aggregate([
+            {"$match": match},
+            {"$group": {
+                "_id": {"torneioId": "$torneioId", "categoria": "$categoriaInscrita.nome"},
+                "total": {"$sum": 1},
+            }},
+        ])
+    }
+
+    operations = []
+    for tournament in db.tournaments.find(tournaments_query, {"categorias": 1}):
+        tid = str(tournament["_id"])
+        for cat in tournament.get("categorias", []):
+            operations.append(UpdateOne(
+                {"_id": slot_key(tid, cat["nome"])},
+                {
+                    "$set": {"vagas": cat["vagas"], "ocupadas": counts.get((tid, cat["nome"]), 0)},
+                    "$setOnInsert": {"torneioId": tid, "categoriaNome": cat["nome"]},
+                },
+                upsert=True,
+            ))
+    if operations:
+        db.category_slots.bulk_write(operations, ordered=False)
+    return len(operations)